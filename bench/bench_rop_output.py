@@ -0,0 +1,82 @@
+"""
+Compare the per-prim attribValue loop with the bulk extraction in rop_output.
+
+    python bench/bench_rop_output.py --counts 1000 10000 50000 --hom-cost-us 1
+"""
+
+import argparse
+import time
+
+import fake_hou
+
+fake_hou.install()
+
+# export.py reloads hou_bevy.component, import it first so the classes match
+from hou_bevy.nodes.rop.export import build_hou_data  # noqa: E402
+from hou_bevy.component import HouData, HouRect, Vec2, Vec3  # noqa: E402
+
+
+def per_prim_reference(geo):
+    """
+    The exporter loop before bulk extraction, kept as the baseline
+    """
+    hou_data = HouData()
+    for prim in geo.prims():
+        layer_name = prim.attribValue("name")
+        layer_type = prim.attribValue("type")
+
+        data = None
+        if layer_type == "HouRect":
+            center = prim.attribValue("center")
+            translation = Vec3.new(center[0], center[1], center[2])
+
+            size = list(prim.attribValue("size"))[:2]
+            size = Vec2.new(size[0], size[1])
+
+            uv = prim.attribValue("uv")
+            uv_list = Vec2.to_list(uv)
+
+            data = HouRect.new(size, translation, uv_list)
+
+        hou_data.create_layer(layer_name)
+        hou_data.append_data(layer_name, data)
+    return hou_data
+
+
+def measure(function, geo):
+    geo.hom_calls = 0
+    start = time.perf_counter()
+    result = function(geo)
+    return time.perf_counter() - start, geo.hom_calls, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument(
+        "--hom-cost-us",
+        type=float,
+        default=1.0,
+        help="simulated cost of one HOM call in microseconds",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'prims':>8} {'per-prim s':>11} {'calls':>8} {'bulk s':>9} {'calls':>6} {'speedup':>8}"
+    )
+    for count in args.counts:
+        geo = fake_hou.rect_geometry(count, hom_cost=args.hom_cost_us * 1e-6)
+        ref_time, ref_calls, reference = measure(per_prim_reference, geo)
+        bulk_time, bulk_calls, bulk = measure(build_hou_data, geo)
+
+        for name, layer in reference.layer.items():
+            assert layer.to_dict() == bulk.layer[name].to_dict(), name
+
+        print(
+            f"{count:>8} {ref_time:>11.4f} {ref_calls:>8} {bulk_time:>9.4f} "
+            f"{bulk_calls:>6} {ref_time / bulk_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Replay a mouse path through the DrawRect snapping and compare the cached
+SnapGrid lookup with a linear scan over every point, which is what a lookup
+costs without an index. Levels grow in area with the rect count, so the
+density around the cursor stays the same.
+
+    python bench/bench_snap.py --counts 1000 10000 100000 --events 2000
+"""
+
+import argparse
+import random
+import time
+import types
+
+import fake_hou
+
+fake_hou.install()
+
+from hou_bevy.nodes.platformer.tools.rect.rect_draw import (  # noqa: E402
+    SNAP_RADIUS,
+    DrawRect,
+)
+
+
+def linear_nearest(positions, x, y, max_radius):
+    best = None
+    best_distance = max_radius * max_radius
+    for i in range(len(positions) // 3):
+        dx = positions[i * 3] - x
+        dy = positions[i * 3 + 1] - y
+        distance = dx * dx + dy * dy
+        if distance < best_distance:
+            best = i
+            best_distance = distance
+    return best
+
+
+def mouse_path(events, extent, seed=1):
+    """
+    Random walk in small steps, like a cursor dragged over the level
+    """
+    rng = random.Random(seed)
+    x, y = 0.0, 0.0
+    path = []
+    for _ in range(events):
+        x = min(max(x + rng.uniform(-8, 8), -extent), extent)
+        y = min(max(y + rng.uniform(-8, 8), -extent), extent)
+        path.append((x, y))
+    return path
+
+
+def draw_tool(geo):
+    # skip __init__, it creates viewport drawables
+    tool = DrawRect.__new__(DrawRect)
+    tool.state = types.SimpleNamespace(node=types.SimpleNamespace(geometry=lambda: geo))
+    tool.invalidate_snap_index()
+    return tool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--events", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'rects':>8} {'build ms':>9} {'grid us/event':>14} {'scan us/event':>14}")
+    for count in args.counts:
+        # ~one rect per 20x20 units
+        extent = 10.0 * count**0.5
+        geo = fake_hou.rect_point_geometry(count, extent=extent)
+        path = mouse_path(args.events, extent)
+        positions = geo.point_attribs["P"][1]
+        tool = draw_tool(geo)
+
+        start = time.perf_counter()
+        tool.snap_index()
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        snapped = [tool.snap(x, y) for x, y in path]
+        grid = (time.perf_counter() - start) / len(path)
+
+        # the scan is slow, replay a prefix of the path only
+        sample = path[: max(1, min(len(path), 2_000_000 // (count * 4)))]
+        start = time.perf_counter()
+        reference = [linear_nearest(positions, x, y, SNAP_RADIUS) for x, y in sample]
+        scan = (time.perf_counter() - start) / len(sample)
+
+        for expected, position in zip(reference, snapped):
+            if expected is None:
+                assert position is None
+            else:
+                assert tuple(position) == tuple(
+                    positions[expected * 3 : expected * 3 + 3]
+                )
+
+        print(f"{count:>8} {build * 1e3:>9.2f} {grid * 1e6:>14.2f} {scan * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
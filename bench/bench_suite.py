@@ -0,0 +1,279 @@
+"""
+Time HouData serialization and the ROP export on synthetic levels.
+
+Every case runs ``--repeat`` times for the wall time, then once more under
+tracemalloc for the peak of Python allocations, which slows it down too much
+to time it in the same run. Results are written as JSON, pass an earlier
+result file to ``--compare`` to print the ratios against it.
+
+    python bench/bench_suite.py --levels 1k 10k -o results.json
+    python bench/bench_suite.py --levels 1k 10k --compare results.json
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import fake_hou
+from levels import LEVELS, generate_level, level_geometry
+
+fake_hou.install()
+
+from hou_bevy.component import HouData  # noqa: E402
+from hou_bevy.nodes.rop.export import rop_output  # noqa: E402
+
+RESULTS_VERSION = 1
+
+
+class Context:
+    """
+    Inputs of one level, built on first use and shared by the cases
+    """
+
+    def __init__(self, spec, directory):
+        self.spec = spec
+        self.directory = directory
+        self._hou_data = None
+        self._json_text = None
+        self._json_path = None
+        self._geometry = None
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    @property
+    def hou_data(self):
+        if self._hou_data is None:
+            self._hou_data = generate_level(self.spec)
+        return self._hou_data
+
+    @property
+    def json_text(self):
+        if self._json_text is None:
+            self._json_text = self.hou_data.to_json()
+        return self._json_text
+
+    @property
+    def json_path(self):
+        if self._json_path is None:
+            self._json_path = self.path("input.json")
+            self.hou_data.export_as_json(self._json_path)
+        return self._json_path
+
+    @property
+    def geometry(self):
+        if self._geometry is None:
+            self._geometry = level_geometry(self.spec)
+        return self._geometry
+
+
+# every case returns the bytes written, or read for the import cases
+
+
+def case_to_dict(context):
+    context.hou_data.to_dict()
+    return None
+
+
+def case_to_json(context):
+    # the output is ASCII, characters are bytes
+    return len(context.hou_data.to_json())
+
+
+def case_export_as_json(context):
+    path = context.path("export.json")
+    context.hou_data.export_as_json(path)
+    return os.path.getsize(path)
+
+
+def case_from_json(context):
+    HouData.from_json(context.json_text, columnar=True)
+    return len(context.json_text)
+
+
+def case_import_from_json(context):
+    HouData.import_from_json(context.json_path, columnar=True)
+    return os.path.getsize(context.json_path)
+
+
+def case_rop_output(context):
+    path = context.path("rop.json")
+    node = fake_hou.FakeNode(context.geometry, sopoutput=path)
+    # rop_output prints the data and a summary
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        rop_output({"node": node})
+    return os.path.getsize(path)
+
+
+CASES = {
+    "to_dict": case_to_dict,
+    "to_json": case_to_json,
+    "export_as_json": case_export_as_json,
+    "from_json": case_from_json,
+    "import_from_json": case_import_from_json,
+    "rop_output": case_rop_output,
+}
+
+
+def prepare(case, context):
+    """
+    Build the inputs outside of the measured runs
+    """
+    if case == "from_json":
+        context.json_text
+    elif case == "import_from_json":
+        context.json_path
+    elif case == "rop_output":
+        context.geometry
+    else:
+        context.hou_data
+
+
+def measure(case, context, repeat, memory):
+    function = CASES[case]
+    prepare(case, context)
+    runs = []
+    output_bytes = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        output_bytes = function(context)
+        runs.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            function(context)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "seconds": min(runs),
+        "median_seconds": statistics.median(runs),
+        "runs": runs,
+        "peak_bytes": peak,
+        "output_bytes": output_bytes,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _size(value):
+    if value is None:
+        return "-"
+    for unit in ("B", "KiB", "MiB"):
+        if value < 1024:
+            return f"{value:.0f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GiB"
+
+
+def compare(results, baseline):
+    """
+    Ratios against an earlier run, below 1.0 is faster or smaller
+    """
+    previous = {(r["level"], r["case"]): r for r in baseline["results"]}
+    print(f"{'level':>6} {'case':>17} {'time':>7} {'peak':>7}", file=sys.stderr)
+    for result in results:
+        before = previous.get((result["level"], result["case"]))
+        if before is None:
+            continue
+        time_ratio = result["seconds"] / before["seconds"]
+        peak_ratio = "-"
+        if result["peak_bytes"] and before["peak_bytes"]:
+            peak_ratio = f"{result['peak_bytes'] / before['peak_bytes']:.2f}x"
+        print(
+            f"{result['level']:>6} {result['case']:>17} {time_ratio:>6.2f}x "
+            f"{peak_ratio:>7}",
+            file=sys.stderr,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--levels", nargs="+", choices=list(LEVELS), default=["1k", "10k", "100k"]
+    )
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip the tracemalloc run"
+    )
+    parser.add_argument("-o", "--output", help="result file, stdout by default")
+    parser.add_argument("--compare", help="earlier result file to compare with")
+    args = parser.parse_args()
+
+    results = []
+    print(
+        f"{'level':>6} {'case':>17} {'seconds':>9} {'median':>9} {'peak':>10} "
+        f"{'output':>10}",
+        file=sys.stderr,
+    )
+    for level in args.levels:
+        spec = LEVELS[level]
+        with tempfile.TemporaryDirectory(prefix="hou_bevy_bench_") as directory:
+            context = Context(spec, directory)
+            for case in args.cases:
+                result = measure(case, context, args.repeat, not args.no_memory)
+                results.append({"level": level, "case": case, **result})
+                print(
+                    f"{level:>6} {case:>17} {result['seconds']:>9.4f} "
+                    f"{result['median_seconds']:>9.4f} "
+                    f"{_size(result['peak_bytes']):>10} "
+                    f"{_size(result['output_bytes']):>10}",
+                    file=sys.stderr,
+                )
+
+    report = {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "revision": git_revision(),
+            "repeat": args.repeat,
+        },
+        "levels": {level: LEVELS[level].to_dict() for level in args.levels},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
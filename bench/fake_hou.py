@@ -0,0 +1,215 @@
+"""
+Stand-in for the parts of the ``hou`` module the exporters touch.
+
+Only meant for benchmarks outside Houdini. ``FakeGeometry`` answers both the
+per-prim ``prim.attribValue`` calls and the bulk ``prim*AttribValues`` calls
+and counts every call, ``hom_cost`` simulates the cost of crossing the HOM
+boundary.
+"""
+
+import os
+import random
+import sys
+import time
+import types
+
+SCRIPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "script")
+
+
+class FakeAttrib:
+    def __init__(self, name, size):
+        self._name = name
+        self._size = size
+
+    def name(self):
+        return self._name
+
+    def size(self):
+        return self._size
+
+
+class FakePrim:
+    def __init__(self, geo, number):
+        self._geo = geo
+        self._number = number
+
+    def number(self):
+        return self._number
+
+    def attribValue(self, name):
+        self._geo._call()
+        size, values = self._geo.prim_attribs[name]
+        if size <= 1:
+            # size 0 marks array attributes, one tuple per prim
+            return values[self._number]
+        start = self._number * size
+        return tuple(values[start : start + size])
+
+
+class FakeGeometry:
+    def __init__(self, prim_attribs=None, detail_attribs=None, hom_cost=0.0):
+        # name -> (tuple size, flat values)
+        self.prim_attribs = prim_attribs or {}
+        self.detail_attribs = detail_attribs or {}
+        self.point_attribs = {}
+        self.hom_cost = hom_cost
+        self.hom_calls = 0
+
+    def _call(self):
+        self.hom_calls += 1
+        if self.hom_cost:
+            end = time.perf_counter() + self.hom_cost
+            while time.perf_counter() < end:
+                pass
+
+    def __bool__(self):
+        return True
+
+    def prim_count(self):
+        size, values = self.prim_attribs["name"]
+        return len(values) // size
+
+    def prims(self):
+        self._call()
+        return [FakePrim(self, i) for i in range(self.prim_count())]
+
+    def prim(self, number):
+        self._call()
+        return FakePrim(self, number)
+
+    def findGlobalAttrib(self, name):
+        self._call()
+        if name not in self.detail_attribs:
+            return None
+        value = self.detail_attribs[name]
+        return FakeAttrib(name, len(value) if isinstance(value, tuple) else 1)
+
+    def findPrimAttrib(self, name):
+        self._call()
+        if name not in self.prim_attribs:
+            return None
+        return FakeAttrib(name, self.prim_attribs[name][0])
+
+    def primFloatAttribValues(self, name):
+        self._call()
+        return tuple(self.prim_attribs[name][1])
+
+    def primStringAttribValues(self, name):
+        self._call()
+        return tuple(self.prim_attribs[name][1])
+
+    def attribValue(self, name):
+        self._call()
+        return self.detail_attribs[name]
+
+    def pointFloatAttribValues(self, name):
+        self._call()
+        return tuple(self.point_attribs[name][1])
+
+
+class FakeParm:
+    def __init__(self, value):
+        self.value = value
+
+    def eval(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class FakeNode:
+    """
+    ROP node with the given parameters, ``parm`` returns None for any other
+    name like it does for parameters an HDA version does not have
+    """
+
+    def __init__(self, geo, **parms):
+        self._geo = geo
+        self.parms = {name: FakeParm(value) for name, value in parms.items()}
+
+    def geometry(self):
+        return self._geo
+
+    def parm(self, name):
+        return self.parms.get(name)
+
+
+class Vector3(tuple):
+    def __new__(cls, *values):
+        if len(values) == 1:
+            values = values[0]
+        return super().__new__(cls, (float(value) for value in values))
+
+
+def rect_geometry(count, layers=4, seed=0, hom_cost=0.0):
+    """
+    Geometry shaped like the platformer SOP output: one HouRect prim per
+    platform plus the detail attributes of one 2D mesh
+    """
+    rng = random.Random(seed)
+    names, types_, center, size, uv = [], [], [], [], []
+    for i in range(count):
+        names.append(f"layer_{i % layers}")
+        types_.append("HouRect")
+        center += [rng.uniform(-1000, 1000), rng.uniform(-1000, 1000), 0.0]
+        size += [rng.uniform(1, 20), rng.uniform(1, 5), 0.0]
+        uv += [0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 0.0]
+    detail = {
+        "P_list": (0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 0.0),
+        "N": (0.0, 0.0, 1.0) * 4,
+        "indices": (0, 1, 2, 0, 2, 3),
+        "z": 0.0,
+    }
+    return FakeGeometry(
+        {
+            "name": (1, names),
+            "type": (1, types_),
+            "center": (3, center),
+            "size": (3, size),
+            "uv": (12, uv),
+        },
+        detail,
+        hom_cost=hom_cost,
+    )
+
+
+def rect_point_geometry(count, extent=1000.0, seed=0, hom_cost=0.0):
+    """
+    Geometry shaped like the platformer stash: four corner points per rect
+    spread over ``[-extent, extent]``
+    """
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(count):
+        x = rng.uniform(-extent, extent)
+        y = rng.uniform(-extent, extent)
+        w = rng.uniform(1, 20)
+        h = rng.uniform(1, 5)
+        positions += [x, y, 0.0, x + w, y, 0.0, x + w, y + h, 0.0, x, y + h, 0.0]
+    geo = FakeGeometry(hom_cost=hom_cost)
+    geo.point_attribs["P"] = (3, positions)
+    return geo
+
+
+def install():
+    """
+    Register a minimal ``hou`` module and put ``script/`` on sys.path
+    """
+    if SCRIPT_DIR not in sys.path:
+        sys.path.insert(0, SCRIPT_DIR)
+    if "hou" in sys.modules:
+        return sys.modules["hou"]
+
+    hou = types.ModuleType("hou")
+    hou.Geometry = FakeGeometry
+    hou.Vector3 = Vector3
+    hou.severityType = types.SimpleNamespace(
+        Message=0, ImportantMessage=1, Warning=2, Error=3
+    )
+    hou.ui = types.SimpleNamespace(
+        setStatusMessage=lambda *args, **kwargs: None,
+        displayMessage=lambda *args, **kwargs: None,
+    )
+    sys.modules["hou"] = hou
+    return hou
@@ -0,0 +1,188 @@
+"""
+Deterministic synthetic levels for the benchmarks.
+
+A level is ``rects`` platforms spread over the layers plus ``meshes`` grid
+meshes of about ``indices_per_mesh`` indices each. The same seed always
+gives the same level, both as ``HouData`` and as the geometry the ROP reads.
+"""
+
+import random
+from array import array
+from dataclasses import dataclass
+
+import fake_hou
+
+fake_hou.install()
+
+from hou_bevy.component import (  # noqa: E402
+    Hou2dMesh,
+    HouData,
+    HouLayer,
+    HouRectColumns,
+    Vec2Array,
+    Vec3Array,
+)
+
+
+@dataclass(frozen=True)
+class LevelSpec:
+    rects: int
+    meshes: int = 0
+    indices_per_mesh: int = 0
+    layers: int = 4
+    seed: int = 0
+
+    @property
+    def grid_side(self):
+        # points per side, even so Vec2.to_list accepts the P_list length
+        side = max(1, round((self.indices_per_mesh / 6) ** 0.5)) + 1
+        return side + side % 2
+
+    @property
+    def indices(self):
+        return self.meshes * 6 * (self.grid_side - 1) ** 2
+
+    def to_dict(self):
+        return {
+            "rects": self.rects,
+            "meshes": self.meshes,
+            "indices": self.indices,
+            "layers": self.layers,
+            "seed": self.seed,
+        }
+
+
+LEVELS = {
+    "1k": LevelSpec(1_000, meshes=2, indices_per_mesh=6_000),
+    "10k": LevelSpec(10_000, meshes=4, indices_per_mesh=60_000),
+    "100k": LevelSpec(100_000, meshes=8, indices_per_mesh=250_000),
+    "1m": LevelSpec(1_000_000, meshes=16, indices_per_mesh=250_000),
+}
+
+
+def layer_name(index, spec):
+    return f"layer_{index % spec.layers}"
+
+
+def rect_buffers(spec):
+    """
+    Flat size (2), center (3) and uv (8) floats of every rect
+    """
+    rng = random.Random(spec.seed)
+    extent = 10.0 * spec.rects**0.5
+    size, center = array("d"), array("d")
+    for _ in range(spec.rects):
+        center.extend((rng.uniform(-extent, extent), rng.uniform(-extent, extent), 0))
+        size.extend((rng.uniform(1, 20), rng.uniform(1, 5)))
+    uv = array("d", (0.0, 0.0, 1.0, 0.0, 1.0, 1.0, 0.0, 1.0)) * spec.rects
+    return size, center, uv
+
+
+def grid_mesh(spec, number):
+    """
+    Flat xy vertices and triangle indices of a ``grid_side`` square grid
+    """
+    side = spec.grid_side
+    offset = number * side
+    vertices = array("d")
+    for y in range(side):
+        for x in range(side):
+            vertices.extend((offset + x, float(y)))
+    indices = array("I")
+    for y in range(side - 1):
+        row = y * side
+        for x in range(side - 1):
+            a = row + x
+            indices.extend((a, a + 1, a + side + 1, a, a + side + 1, a + side))
+    return vertices, indices
+
+
+def generate_level(spec):
+    """
+    The level as columnar ``HouData``, the layout ``build_hou_data`` creates
+    """
+    hou_data = HouData(columnar=True)
+    size, center, uv = rect_buffers(spec)
+    for i in range(spec.layers):
+        # rect i goes to layer i % layers
+        layer = HouLayer.new(columnar=True)
+        layer.rect = HouRectColumns()
+        layer.rect.extend_flat(
+            _strided(size, 2, i, spec.layers),
+            _strided(center, 3, i, spec.layers),
+            _strided(uv, 8, i, spec.layers),
+        )
+        hou_data.layer[layer_name(i, spec)] = layer
+
+    for number in range(spec.meshes):
+        vertices, indices = grid_mesh(spec, number)
+        mesh = Hou2dMesh(
+            vertices=Vec2Array(vertices),
+            normals=Vec3Array(array("d", (0.0, 0.0, 1.0)) * (len(vertices) // 2)),
+            indices=indices,
+            z=float(number),
+            id=number // spec.layers,
+        )
+        hou_data.create_layer(layer_name(number, spec))
+        hou_data.append_data(layer_name(number, spec), mesh)
+    return hou_data
+
+
+def _strided(values, width, start, step):
+    """
+    Every ``step``-th tuple of ``width`` values, starting at tuple ``start``
+    """
+    count = len(range(start, len(values) // width, step))
+    result = array("d", bytes(count * width * 8))
+    for component in range(width):
+        result[component::width] = values[start * width + component :: step * width]
+    return result
+
+
+def level_geometry(spec, hom_cost=0.0):
+    """
+    The level as platformer SOP output: one HouRect prim per rect, then one
+    Hou2dMesh prim per mesh with array attributes
+    """
+    size, center, uv = rect_buffers(spec)
+    names = [layer_name(i, spec) for i in range(spec.rects)]
+    types_ = ["HouRect"] * spec.rects
+    # attributes are stored as 3 and 12 floats per prim like in the HDA
+    size3 = array("d", bytes(spec.rects * 3 * 8))
+    size3[0::3] = size[0::2]
+    size3[1::3] = size[1::2]
+    uv12 = array("d", bytes(spec.rects * 12 * 8))
+    for component in range(4):
+        uv12[component * 3 :: 12] = uv[component * 2 :: 8]
+        uv12[component * 3 + 1 :: 12] = uv[component * 2 + 1 :: 8]
+
+    p_list, normals, mesh_indices, z = [], [], [], []
+    for number in range(spec.meshes):
+        vertices, indices = grid_mesh(spec, number)
+        points = array("d", bytes(len(vertices) // 2 * 3 * 8))
+        points[0::3] = vertices[0::2]
+        points[1::3] = vertices[1::2]
+        p_list.append(tuple(points))
+        normals.append((0.0, 0.0, 1.0) * (len(vertices) // 2))
+        mesh_indices.append(tuple(indices))
+        z.append(float(number))
+        names.append(layer_name(number, spec))
+        types_.append("Hou2dMesh")
+
+    # rect attributes cover every prim, mesh prims read as zeros
+    padding = array("d", bytes(spec.meshes * 8))
+    return fake_hou.FakeGeometry(
+        {
+            "name": (1, names),
+            "type": (1, types_),
+            "center": (3, center + padding * 3),
+            "size": (3, size3 + padding * 3),
+            "uv": (12, uv12 + padding * 12),
+            # size 0 marks array attributes, one tuple per prim
+            "P_list": (0, [()] * spec.rects + p_list),
+            "N": (0, [()] * spec.rects + normals),
+            "indices": (0, [()] * spec.rects + mesh_indices),
+            "z": (1, [0.0] * spec.rects + z),
+        },
+        hom_cost=hom_cost,
+    )
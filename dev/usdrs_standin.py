@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the usdrs executable, for testing hou_bevy.nodes.usdrs without
+a Rust build. It speaks the worker protocol of ``hou_bevy.nodes.usdrs.worker``
+and the one-shot command line:
+
+    usdrs_standin.py serve
+    usdrs_standin.py export input.usd [-o output.json] [--remove-input]
+    usdrs_standin.py --version
+
+An export writes a small JSON summary of the input. Inputs whose name
+contains "crash" make the process exit, inputs containing "hang" never
+finish and inputs containing "slow" report progress for about a second.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+VERSION = "usdrs-standin 0.1.0"
+PROTOCOL_VERSION = 1
+
+
+def export(input_file, output_file=None, remove_input=False, progress=None):
+    name = os.path.basename(input_file)
+    if "crash" in name:
+        sys.stderr.write(f"panicked while parsing {input_file}\n")
+        sys.stderr.flush()
+        os._exit(101)
+    if "hang" in name:
+        while True:
+            time.sleep(1)
+
+    with open(input_file, "rb") as f:
+        data = f.read()
+    stages = ["read", "parse", "write"]
+    if "slow" in name:
+        stages[1:2] = ["parse"] * 100
+    for i, stage in enumerate(stages):
+        if progress:
+            progress({"event": "progress", "stage": stage, "progress": i / len(stages)})
+        if "slow" in name:
+            time.sleep(0.01)
+
+    output_file = output_file or os.path.splitext(input_file)[0] + ".json"
+    with open(output_file, "w") as f:
+        json.dump({"input": input_file, "bytes": len(data)}, f)
+    if remove_input:
+        os.remove(input_file)
+    return output_file
+
+
+def _send(message):
+    sys.stdout.write(json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+def serve():
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        request_id = request.get("id")
+        cmd = request.get("cmd")
+        if cmd == "hello":
+            _send(
+                {
+                    "id": request_id,
+                    "ok": True,
+                    "protocol": PROTOCOL_VERSION,
+                    "version": VERSION,
+                }
+            )
+        elif cmd == "export":
+
+            def progress(event):
+                _send({"id": request_id, **event})
+
+            try:
+                output = export(
+                    request["input"],
+                    request.get("output"),
+                    request.get("remove_input", False),
+                    progress,
+                )
+            except OSError as e:
+                _send({"id": request_id, "ok": False, "error": str(e)})
+            else:
+                _send({"id": request_id, "ok": True, "output": output})
+        else:
+            _send({"id": request_id, "ok": False, "error": f"unknown command {cmd}"})
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="usdrs")
+    parser.add_argument("--version", action="store_true")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("serve")
+    export_parser = commands.add_parser("export")
+    export_parser.add_argument("input")
+    export_parser.add_argument("-o", "--output")
+    export_parser.add_argument("--remove-input", action="store_true")
+    args = parser.parse_args()
+
+    if args.version:
+        print(VERSION)
+    elif args.command == "serve":
+        serve()
+    elif args.command == "export":
+        try:
+            output = export(
+                args.input,
+                args.output,
+                args.remove_input,
+                _send,
+            )
+        except OSError as e:
+            sys.stderr.write(f"{e}\n")
+            return 1
+        print(f"exported {output}")
+    else:
+        parser.print_help()
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
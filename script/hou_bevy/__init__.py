@@ -2,14 +2,49 @@ def reload_module():
     from importlib import reload
 
     print("reloaded: houdini_bevy")
+    import hou_bevy.binary
+    import hou_bevy.chunks
+    import hou_bevy.component
+    import hou_bevy.compressed
+    import hou_bevy.incremental
+    import hou_bevy.json_stream
+    import hou_bevy.live
     import hou_bevy.nodes.platformer.geometry
+    import hou_bevy.nodes.platformer.journal
     import hou_bevy.nodes.platformer.state
     import hou_bevy.nodes.platformer.tools.rect.rect_draw
     import hou_bevy.nodes.platformer.tools.rect.rect_edit
     import hou_bevy.nodes.rop.export
+    import hou_bevy.optimize
+    import hou_bevy.quantize
+    import hou_bevy.spatial
 
+    # data modules first, in import order, so every module below binds the
+    # reloaded classes
+    for module in (
+        hou_bevy.spatial,
+        hou_bevy.component,
+        hou_bevy.binary,
+        hou_bevy.quantize,
+        hou_bevy.json_stream,
+        hou_bevy.compressed,
+        hou_bevy.incremental,
+        hou_bevy.chunks,
+        hou_bevy.optimize,
+    ):
+        reload(module)
+
+    # the live server lives in the module, restart it on the reloaded one
+    server = hou_bevy.live.get_server()
+    hou_bevy.live.stop_server()
+    reload(hou_bevy.live)
+    if server is not None:
+        hou_bevy.live.start_server(server.host, server.port, server.unix_path)
+
+    reload(hou_bevy.nodes.rop.export)
     reload(hou_bevy.nodes.platformer.geometry)
-    reload(hou_bevy.nodes.platformer.state)
+    reload(hou_bevy.nodes.platformer.journal)
+    # tools before the state, it imports the tool classes
     reload(hou_bevy.nodes.platformer.tools.rect.rect_draw)
     reload(hou_bevy.nodes.platformer.tools.rect.rect_edit)
-    reload(hou_bevy.nodes.rop.export)
+    reload(hou_bevy.nodes.platformer.state)
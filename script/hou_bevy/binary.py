@@ -0,0 +1,448 @@
+"""
+Versioned little-endian binary container for HouData.
+
+Layout (all integers and floats little-endian, floats are f32)::
+
+    header      magic "HOUB", version u16, flags u16, layer_count u32, reserved u32
+    layer table layer_count * (blob_offset u64, blob_size u64, name_offset u32, name_size u32)
+    names       utf-8 layer names referenced by the table
+    blobs       one packed layer per table entry, 8 byte aligned
+
+Packed layer (offsets are relative to the start of the blob)::
+
+    header      flags u32, rect_count u32, mesh_count u32, reserved u32
+    rects       size f32[2n], translation f32[3n], uv f32[8n]
+    mesh table  mesh_count * MESH_ENTRY
+    batch       BATCH_HEADER + BATCH_ENTRY per mesh, only with LAYER_HAS_MESH2D_BATCH
+    buffers     vertices f32[2v], normals f32[3k], indices u16/u32 per mesh,
+                then the shared batch buffers. Indices are written as u16
+                whenever every index fits.
+
+``HouBinaryFile`` memory-maps a file and hands out ``LayerView`` objects whose
+columns are ``memoryview`` slices of the mapping, so nothing is copied until
+``LayerView.to_layer`` is called.
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Optional
+
+from hou_bevy.component import (
+    Hou2dMesh,
+    Hou2dMeshBatch,
+    Hou2dMeshRange,
+    HouData,
+    HouLayer,
+    HouRectColumns,
+    Vec2Array,
+    Vec3Array,
+)
+
+MAGIC = b"HOUB"
+VERSION = 2
+BINARY_EXTENSION = ".houb"
+
+FILE_HEADER = struct.Struct("<4sHHII")
+LAYER_ENTRY = struct.Struct("<QQII")
+LAYER_HEADER = struct.Struct("<IIII")
+MESH_ENTRY = struct.Struct("<ifIIIIQQQ")
+BATCH_HEADER = struct.Struct("<IIIIQQQ")
+BATCH_ENTRY = struct.Struct("<iIIIf")
+
+LAYER_HAS_RECT = 1 << 0
+LAYER_HAS_MESH2D = 1 << 1
+# added in version 2
+LAYER_HAS_MESH2D_BATCH = 1 << 2
+
+ALIGNMENT = 8
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+def _padding(size: int, alignment: int = ALIGNMENT) -> int:
+    return -size % alignment
+
+
+def _f32(values: Any) -> bytes:
+    data = array("f", values)
+    if _BIG_ENDIAN:
+        data.byteswap()
+    return data.tobytes()
+
+
+def index_width(vertex_count: int) -> int:
+    """
+    Narrowest index size in bytes able to address ``vertex_count`` vertices
+    """
+    return 2 if vertex_count <= 0x10000 else 4
+
+
+def _index_width(indices: Any) -> int:
+    return index_width(max(indices, default=-1) + 1)
+
+
+def _indices(values: Any, width: int) -> bytes:
+    data = array("H" if width == 2 else "I", values)
+    if _BIG_ENDIAN:
+        data.byteswap()
+    return data.tobytes()
+
+
+def _flat_rects(layer: HouLayer):
+    rects = layer.rect
+    if isinstance(rects, HouRectColumns):
+        return rects.size.data, rects.translation.data, rects.uv.data
+
+    size: List[float] = []
+    translation: List[float] = []
+    uv: List[float] = []
+    for rect in rects:
+        size += (rect.size.x, rect.size.y)
+        translation += (rect.translation.x, rect.translation.y, rect.translation.z)
+        for coord in rect.uv:
+            uv += (coord.x, coord.y)
+    return size, translation, uv
+
+
+def _flat_vectors(values: Any) -> Any:
+    if isinstance(values, (Vec2Array, Vec3Array)):
+        return values.data
+    flat: List[float] = []
+    for value in values:
+        flat += value.to_dict()
+    return flat
+
+
+def pack_layer(layer: HouLayer) -> bytes:
+    """
+    Pack a single HouLayer into a self-contained binary blob
+    """
+    flags = 0
+    rect_count = 0
+    chunks: List[bytes] = []
+
+    if layer.rect is not None:
+        flags |= LAYER_HAS_RECT
+        rect_count = len(layer.rect)
+        size, translation, uv = _flat_rects(layer)
+        chunks += [_f32(size), _f32(translation), _f32(uv)]
+
+    meshes = layer.mesh2d or []
+    if layer.mesh2d is not None:
+        flags |= LAYER_HAS_MESH2D
+    batch = layer.mesh2d_batch
+    if batch is not None:
+        flags |= LAYER_HAS_MESH2D_BATCH
+
+    offset = LAYER_HEADER.size + sum(len(chunk) for chunk in chunks)
+    chunks.append(bytes(_padding(offset)))
+    offset += len(chunks[-1])
+
+    # buffers start after the mesh table and the batch tables
+    buffer_offset = offset + MESH_ENTRY.size * len(meshes)
+    if batch is not None:
+        buffer_offset += BATCH_HEADER.size + BATCH_ENTRY.size * len(batch.meshes)
+        buffer_offset += _padding(buffer_offset)
+
+    buffers: List[bytes] = []
+    tables: List[bytes] = []
+
+    def add_buffer(data: bytes) -> int:
+        nonlocal buffer_offset
+        start = buffer_offset
+        pad = bytes(_padding(len(data)))
+        buffers.extend((data, pad))
+        buffer_offset += len(data) + len(pad)
+        return start
+
+    for mesh in meshes:
+        width = _index_width(mesh.indices)
+        tables.append(
+            MESH_ENTRY.pack(
+                int(mesh.id),
+                float(mesh.z),
+                len(mesh.vertices),
+                len(mesh.normals),
+                len(mesh.indices),
+                width,
+                add_buffer(_f32(_flat_vectors(mesh.vertices))),
+                add_buffer(_f32(_flat_vectors(mesh.normals))),
+                add_buffer(_indices(mesh.indices, width)),
+            )
+        )
+
+    if batch is not None:
+        width = _index_width(batch.indices)
+        tables.append(
+            BATCH_HEADER.pack(
+                len(batch.meshes),
+                len(batch.vertices),
+                len(batch.indices),
+                width,
+                add_buffer(_f32(batch.vertices.data)),
+                add_buffer(_f32(batch.normals.data)),
+                add_buffer(_indices(batch.indices, width)),
+            )
+        )
+        for mesh_range in batch.meshes:
+            tables.append(
+                BATCH_ENTRY.pack(
+                    int(mesh_range.id),
+                    mesh_range.index_offset,
+                    mesh_range.index_count,
+                    mesh_range.vertex_offset,
+                    float(mesh_range.z),
+                )
+            )
+        tables.append(bytes(_padding(offset + sum(len(table) for table in tables))))
+
+    header = LAYER_HEADER.pack(flags, rect_count, len(meshes), 0)
+    return b"".join([header] + chunks + tables + buffers)
+
+
+class MeshView:
+    """Zero-copy view of a packed Hou2dMesh"""
+
+    def __init__(self, buffer: memoryview, entry: tuple):
+        (
+            self.id,
+            self.z,
+            vertex_count,
+            normal_count,
+            index_count,
+            self.index_width,
+            vertex_offset,
+            normal_offset,
+            index_offset,
+        ) = entry
+        self.vertices = _cast(buffer, vertex_offset, vertex_count * 2, "f")
+        self.normals = _cast(buffer, normal_offset, normal_count * 3, "f")
+        self.indices = _cast(
+            buffer, index_offset, index_count, "H" if self.index_width == 2 else "I"
+        )
+
+    def to_mesh(self, columnar: bool = True) -> Hou2dMesh:
+        mesh = Hou2dMesh(
+            vertices=Vec2Array(self.vertices),
+            normals=Vec3Array(self.normals),
+            indices=array("I", self.indices),
+            z=self.z,
+            id=self.id,
+        )
+        if not columnar:
+            mesh.vertices = list(mesh.vertices)
+            mesh.normals = list(mesh.normals)
+            mesh.indices = mesh.indices.tolist()
+        return mesh
+
+
+def _cast(buffer: memoryview, offset: int, count: int, fmt: str) -> Any:
+    """
+    memoryview of ``count`` items at ``offset``; copies only on big-endian hosts
+    """
+    itemsize = struct.calcsize(fmt)
+    view = buffer[offset : offset + count * itemsize]
+    if _BIG_ENDIAN:
+        data = array(fmt, view.tobytes())
+        data.byteswap()
+        return data
+    return view.cast(fmt)
+
+
+class BatchView:
+    """Zero-copy view of a packed Hou2dMeshBatch"""
+
+    def __init__(self, buffer: memoryview, offset: int):
+        (
+            mesh_count,
+            vertex_count,
+            index_count,
+            self.index_width,
+            vertex_offset,
+            normal_offset,
+            index_offset,
+        ) = BATCH_HEADER.unpack_from(buffer, offset)
+        offset += BATCH_HEADER.size
+        self.meshes = [
+            Hou2dMeshRange(
+                *BATCH_ENTRY.unpack_from(buffer, offset + i * BATCH_ENTRY.size)
+            )
+            for i in range(mesh_count)
+        ]
+        self.vertices = _cast(buffer, vertex_offset, vertex_count * 2, "f")
+        self.normals = _cast(buffer, normal_offset, vertex_count * 3, "f")
+        self.indices = _cast(
+            buffer, index_offset, index_count, "H" if self.index_width == 2 else "I"
+        )
+
+    def to_batch(self) -> Hou2dMeshBatch:
+        return Hou2dMeshBatch(
+            vertices=Vec2Array(self.vertices),
+            normals=Vec3Array(self.normals),
+            indices=array("I", self.indices),
+            meshes=list(self.meshes),
+        )
+
+
+class LayerView:
+    """Zero-copy view of a packed HouLayer"""
+
+    def __init__(self, buffer: memoryview):
+        self.buffer = buffer
+        flags, self.rect_count, mesh_count, _ = LAYER_HEADER.unpack_from(buffer, 0)
+        self.has_rect = bool(flags & LAYER_HAS_RECT)
+        self.has_mesh2d = bool(flags & LAYER_HAS_MESH2D)
+
+        n = self.rect_count
+        offset = LAYER_HEADER.size
+        self.size = _cast(buffer, offset, n * 2, "f")
+        offset += n * 2 * 4
+        self.translation = _cast(buffer, offset, n * 3, "f")
+        offset += n * 3 * 4
+        self.uv = _cast(buffer, offset, n * 8, "f")
+        offset += n * 8 * 4
+        offset += _padding(offset)
+
+        self.meshes: List[MeshView] = []
+        for i in range(mesh_count):
+            entry = MESH_ENTRY.unpack_from(buffer, offset + i * MESH_ENTRY.size)
+            self.meshes.append(MeshView(buffer, entry))
+        offset += mesh_count * MESH_ENTRY.size
+
+        self.has_mesh2d_batch = bool(flags & LAYER_HAS_MESH2D_BATCH)
+        self.batch: Optional[BatchView] = None
+        if self.has_mesh2d_batch:
+            self.batch = BatchView(buffer, offset)
+
+    def to_layer(self, columnar: bool = True) -> HouLayer:
+        """
+        Copy the view into a HouLayer
+        """
+        layer = HouLayer.new(columnar=columnar)
+        if self.has_rect:
+            rects = HouRectColumns()
+            rects.extend_flat(self.size, self.translation, self.uv)
+            layer.rect = rects if columnar else list(rects)
+        if self.has_mesh2d:
+            layer.mesh2d = [mesh.to_mesh(columnar=columnar) for mesh in self.meshes]
+        if self.batch is not None:
+            layer.mesh2d_batch = self.batch.to_batch()
+        return layer
+
+
+def unpack_layer(buffer: Any) -> LayerView:
+    return LayerView(memoryview(buffer))
+
+
+def write_binary(hou_data: HouData, file_path: str) -> None:
+    names = [name.encode("utf-8") for name in hou_data.layer.keys()]
+    blobs = [pack_layer(layer) for layer in hou_data.layer.values()]
+
+    table_offset = FILE_HEADER.size
+    names_offset = table_offset + LAYER_ENTRY.size * len(blobs)
+    offset = names_offset + sum(len(name) for name in names)
+
+    entries: List[bytes] = []
+    body: List[bytes] = []
+    name_offset = names_offset
+    for name, blob in zip(names, blobs):
+        pad = bytes(_padding(offset))
+        offset += len(pad)
+        entries.append(LAYER_ENTRY.pack(offset, len(blob), name_offset, len(name)))
+        body += [pad, blob]
+        offset += len(blob)
+        name_offset += len(name)
+
+    with open(file_path, "wb") as f:
+        f.write(FILE_HEADER.pack(MAGIC, VERSION, 0, len(blobs), 0))
+        f.writelines(entries)
+        f.writelines(names)
+        f.writelines(body)
+
+
+class HouBinaryFile:
+    """
+    Memory-mapped reader for files written by ``write_binary``.
+
+    Views returned by ``layer`` reference the mapping; release them before
+    calling ``close``.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._file = open(file_path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            self._file.close()
+            raise ValueError(f"{file_path} is not a HouData binary file")
+        self._buffer = memoryview(self._mmap)
+
+        if len(self._buffer) < FILE_HEADER.size:
+            self.close()
+            raise ValueError(f"{file_path} is not a HouData binary file")
+        magic, version, _, layer_count, _ = FILE_HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{file_path} is not a HouData binary file")
+        if version > VERSION:
+            self.close()
+            raise ValueError(f"Unsupported HouData binary version {version}")
+        self.version = version
+        if len(self._buffer) < FILE_HEADER.size + layer_count * LAYER_ENTRY.size:
+            self.close()
+            raise ValueError(f"{file_path} is truncated")
+
+        self._layers: Dict[str, tuple] = {}
+        for i in range(layer_count):
+            offset, size, name_offset, name_size = LAYER_ENTRY.unpack_from(
+                self._buffer, FILE_HEADER.size + i * LAYER_ENTRY.size
+            )
+            name = bytes(self._buffer[name_offset : name_offset + name_size])
+            self._layers[name.decode("utf-8")] = (offset, size)
+
+    def __enter__(self) -> HouBinaryFile:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._layers)
+
+    def __len__(self) -> int:
+        return len(self._layers)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._layers
+
+    def layer_names(self) -> List[str]:
+        return list(self._layers)
+
+    def layer(self, name: str) -> LayerView:
+        offset, size = self._layers[name]
+        return LayerView(self._buffer[offset : offset + size])
+
+    def get_layer(self, name: str) -> Optional[LayerView]:
+        if name not in self._layers:
+            return None
+        return self.layer(name)
+
+    def to_hou_data(self, columnar: bool = True) -> HouData:
+        hou_data = HouData(columnar=columnar)
+        for name in self._layers:
+            hou_data.layer[name] = self.layer(name).to_layer(columnar=columnar)
+        return hou_data
+
+    def close(self) -> None:
+        if self._mmap is None:
+            return
+        self._buffer.release()
+        self._mmap.close()
+        self._file.close()
+        self._mmap = None
@@ -0,0 +1,243 @@
+"""
+World-space chunk tiling for streamed level loading.
+
+Every layer is split over a grid of ``chunk_size`` squares. A rect goes to the
+chunk containing the center of its AABB, a Hou2dMesh triangle to the chunk
+containing its centroid (vertices are copied into each chunk that uses them).
+Batched meshes are split the same way and written as plain ``mesh2d``.
+Each chunk is written as its own HouData JSON file next to a manifest::
+
+    {
+      "version": 1,
+      "chunk_size": 64.0,
+      "chunks": [
+        {
+          "key": [cx, cy],
+          "file": "<relative path>",
+          "bounds": [min_x, min_y, max_x, max_y],
+          "extent": [min_x, min_y, max_x, max_y],
+          "layers": ["<layer name>", ...]
+        }
+      ]
+    }
+
+``bounds`` is the grid cell, ``extent`` the AABB of the chunk content, which
+may reach past the cell for rects and triangles straddling a border.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from hou_bevy.component import (
+    Hou2dMesh,
+    HouData,
+    HouLayer,
+    Vec2Array,
+    Vec3Array,
+)
+from hou_bevy.spatial import rect_bounds
+
+MANIFEST_VERSION = 1
+
+ChunkKey = Tuple[int, int]
+
+
+def chunk_key(x: float, y: float, chunk_size: float) -> ChunkKey:
+    return (math.floor(x / chunk_size), math.floor(y / chunk_size))
+
+
+class _Chunk:
+    def __init__(self, key: ChunkKey):
+        self.key = key
+        self.hou_data = HouData(columnar=True)
+        self.extent = [math.inf, math.inf, -math.inf, -math.inf]
+
+    def grow(self, min_x: float, min_y: float, max_x: float, max_y: float) -> None:
+        extent = self.extent
+        extent[0] = min(extent[0], min_x)
+        extent[1] = min(extent[1], min_y)
+        extent[2] = max(extent[2], max_x)
+        extent[3] = max(extent[3], max_y)
+
+    def layer(self, name: str) -> HouLayer:
+        return self.hou_data.get_layer(name)
+
+
+def _flat(values: Any) -> List[float]:
+    if isinstance(values, (Vec2Array, Vec3Array)):
+        return values.data.tolist()
+    return [component for value in values for component in value.to_dict()]
+
+
+def _split_rects(
+    name: str, layer: HouLayer, chunk_size: float, chunks: Dict[ChunkKey, _Chunk]
+) -> None:
+    bounds = rect_bounds(layer.rect)
+    for i, rect in enumerate(layer.rect):
+        min_x, min_y, max_x, max_y = bounds[i * 4 : i * 4 + 4]
+        key = chunk_key((min_x + max_x) * 0.5, (min_y + max_y) * 0.5, chunk_size)
+        chunk = chunks.get(key) or chunks.setdefault(key, _Chunk(key))
+        chunk.grow(min_x, min_y, max_x, max_y)
+        chunk.layer(name).append_rect(rect)
+
+
+def _split_mesh(
+    name: str, mesh: Hou2dMesh, chunk_size: float, chunks: Dict[ChunkKey, _Chunk]
+) -> None:
+    vertices = _flat(mesh.vertices)
+    normals = _flat(mesh.normals)
+    per_vertex_normals = len(normals) == len(vertices) // 2 * 3
+    indices = list(mesh.indices)
+
+    # triangles of each chunk, in source order
+    triangles: Dict[ChunkKey, List[int]] = {}
+    for t in range(0, len(indices) - 2, 3):
+        a, b, c = indices[t : t + 3]
+        x = (vertices[a * 2] + vertices[b * 2] + vertices[c * 2]) / 3.0
+        y = (vertices[a * 2 + 1] + vertices[b * 2 + 1] + vertices[c * 2 + 1]) / 3.0
+        triangles.setdefault(chunk_key(x, y, chunk_size), []).append(t)
+
+    for key, starts in triangles.items():
+        remap: Dict[int, int] = {}
+        sub_vertices: List[float] = []
+        sub_normals: List[float] = []
+        sub_indices: List[int] = []
+        for t in starts:
+            for index in indices[t : t + 3]:
+                local = remap.get(index)
+                if local is None:
+                    local = remap[index] = len(remap)
+                    sub_vertices += vertices[index * 2 : index * 2 + 2]
+                    if per_vertex_normals:
+                        sub_normals += normals[index * 3 : index * 3 + 3]
+                sub_indices.append(local)
+
+        chunk = chunks.get(key) or chunks.setdefault(key, _Chunk(key))
+        chunk.grow(
+            min(sub_vertices[0::2]),
+            min(sub_vertices[1::2]),
+            max(sub_vertices[0::2]),
+            max(sub_vertices[1::2]),
+        )
+        chunk.layer(name).append_data(
+            Hou2dMesh(
+                vertices=Vec2Array(sub_vertices),
+                normals=Vec3Array(sub_normals if per_vertex_normals else normals),
+                indices=sub_indices,
+                z=mesh.z,
+                id=mesh.id,
+            )
+        )
+
+
+def split_into_chunks(
+    hou_data: HouData, chunk_size: float
+) -> Dict[ChunkKey, Tuple[HouData, List[float]]]:
+    """
+    Split every layer over a ``chunk_size`` grid, returns
+    ``{(cx, cy): (chunk data, content extent)}``
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+
+    chunks: Dict[ChunkKey, _Chunk] = {}
+    for name, layer in hou_data.layer.items():
+        if layer.rect:
+            _split_rects(name, layer, chunk_size, chunks)
+        for mesh in layer.mesh2d or []:
+            _split_mesh(name, mesh, chunk_size, chunks)
+        batch = layer.mesh2d_batch
+        for i in range(len(batch) if batch is not None else 0):
+            _split_mesh(name, batch.mesh(i), chunk_size, chunks)
+
+    return {
+        key: (chunk.hou_data, chunk.extent) for key, chunk in sorted(chunks.items())
+    }
+
+
+def chunk_file_name(manifest_path: str, key: ChunkKey) -> str:
+    stem = os.path.splitext(os.path.basename(manifest_path))[0]
+    return f"{stem}.chunk_{key[0]}_{key[1]}.json"
+
+
+def export_chunks(
+    hou_data: HouData,
+    manifest_path: str,
+    chunk_size: float,
+    compact: bool = False,
+    precision: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Write one file per chunk plus the manifest, returns the manifest
+    """
+    directory = os.path.dirname(os.path.abspath(manifest_path))
+
+    previous_files = set()
+    try:
+        with open(manifest_path, "r") as f:
+            previous_files = {chunk["file"] for chunk in json.load(f)["chunks"]}
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    entries = []
+    for key, (chunk_data, extent) in split_into_chunks(hou_data, chunk_size).items():
+        file_name = chunk_file_name(manifest_path, key)
+        chunk_data.export_as_json(
+            os.path.join(directory, file_name), compact=compact, precision=precision
+        )
+        entries.append(
+            {
+                "key": list(key),
+                "file": file_name,
+                "bounds": [
+                    key[0] * chunk_size,
+                    key[1] * chunk_size,
+                    (key[0] + 1) * chunk_size,
+                    (key[1] + 1) * chunk_size,
+                ],
+                "extent": extent,
+                "layers": list(chunk_data.layer),
+            }
+        )
+
+    for file_name in previous_files - {entry["file"] for entry in entries}:
+        try:
+            os.remove(os.path.join(directory, file_name))
+        except OSError:
+            pass
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "chunk_size": chunk_size,
+        "chunks": entries,
+    }
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def import_chunks(manifest_path: str, keys: Optional[List[ChunkKey]] = None) -> HouData:
+    """
+    Merge the chunks listed in ``keys`` (all by default) back into one HouData
+    """
+    directory = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+
+    wanted = None if keys is None else {tuple(key) for key in keys}
+    hou_data = HouData()
+    for entry in manifest["chunks"]:
+        if wanted is not None and tuple(entry["key"]) not in wanted:
+            continue
+        chunk = HouData.import_from_json(os.path.join(directory, entry["file"]))
+        for name, layer in chunk.layer.items():
+            target = hou_data.get_layer(name)
+            for rect in layer.rect or []:
+                target.append_rect(rect)
+            for mesh in layer.mesh2d or []:
+                target.append_data(mesh)
+    return hou_data
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 import json
+import math
+from array import array
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from hou_bevy import stats
 
 
 @dataclass
@@ -22,7 +26,9 @@ class Int2:
         return [self.x, self.y]
 
     @classmethod
-    def from_dict(cls, data: Dict[str, int]) -> Int2:
+    def from_dict(cls, data: Dict[str, int] | Sequence[int]) -> Int2:
+        if not isinstance(data, dict):
+            return cls(x=data[0], y=data[1])
         return cls(x=data.get("x", 0), y=data.get("y", 0))
 
     @classmethod
@@ -53,7 +59,9 @@ class Vec2:
         return [self.x, self.y]
 
     @classmethod
-    def from_dict(cls, data: Dict[str, float]) -> Vec2:
+    def from_dict(cls, data: Dict[str, float] | Sequence[float]) -> Vec2:
+        if not isinstance(data, dict):
+            return cls(x=data[0], y=data[1])
         return cls(x=data.get("x", 0.0), y=data.get("y", 0.0))
 
     @classmethod
@@ -85,7 +93,9 @@ class Vec3:
         return [self.x, self.y, self.z]
 
     @classmethod
-    def from_dict(cls, data: Dict[str, float]) -> Vec3:
+    def from_dict(cls, data: Dict[str, float] | Sequence[float]) -> Vec3:
+        if not isinstance(data, dict):
+            return cls(x=data[0], y=data[1], z=data[2])
         return cls(x=data.get("x", 0.0), y=data.get("y", 0.0), z=data.get("z", 0.0))
 
     @classmethod
@@ -99,6 +109,113 @@ class Vec3:
         return result
 
 
+class VecArray:
+    """
+    Flat ``array("d")`` backed sequence of vectors.
+
+    Behaves like a ``List[Vec2]``/``List[Vec3]`` but stores the components
+    contiguously, so millions of vectors cost one buffer instead of millions
+    of dataclass instances. Items are materialized on access.
+    """
+
+    stride = 0
+    item_type: Any = None
+
+    def __init__(self, data: Iterable[float] = ()):
+        self.data = array("d", data)
+        if len(self.data) % self.stride != 0:
+            raise ValueError(
+                f"Flat data length must be a multiple of {self.stride}, "
+                f"got {len(self.data)}"
+            )
+
+    @classmethod
+    def from_list(cls, values: Iterable[Any]) -> VecArray:
+        result = cls()
+        result.extend(values)
+        return result
+
+    def __len__(self) -> int:
+        return len(self.data) // self.stride
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("VecArray index out of range")
+        start = index * self.stride
+        return self.item_type(*self.data[start : start + self.stride])
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, VecArray):
+            return self.stride == other.stride and self.data == other.data
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(len={len(self)})"
+
+    def append(self, value: Any) -> None:
+        self.data.extend(value.to_dict())
+
+    def extend(self, values: Iterable[Any]) -> None:
+        if isinstance(values, VecArray):
+            self.data.extend(values.data)
+            return
+        for value in values:
+            self.data.extend(value.to_dict())
+
+    def to_dict(self) -> List[List[float]]:
+        data = self.data.tolist()
+        stride = self.stride
+        return [data[i : i + stride] for i in range(0, len(data), stride)]
+
+    def as_numpy(self):
+        """Zero-copy ``(n, stride)`` float64 NumPy view, NumPy is imported lazily."""
+        import numpy
+
+        return numpy.frombuffer(self.data, dtype=numpy.float64).reshape(-1, self.stride)
+
+
+class Vec2Array(VecArray):
+    stride = 2
+    item_type = Vec2
+
+
+class Vec3Array(VecArray):
+    stride = 3
+    item_type = Vec3
+
+
+def vec_list_to_dict(values: Sequence[Any]) -> List[List[float]]:
+    if isinstance(values, VecArray):
+        return values.to_dict()
+    return [value.to_dict() for value in values]
+
+
+def _components(data: Dict[str, float] | Sequence[float], axes: str) -> List[float]:
+    """
+    The components of a ``Vec2.to_dict``/``Vec3.to_dict`` value or of its
+    ``{"x": ..}`` form
+    """
+    if not isinstance(data, dict):
+        return list(data[: len(axes)])
+    return [data.get(axis, 0.0) for axis in axes]
+
+
+def index_list(indices: Sequence[int]) -> Sequence[int]:
+    if isinstance(indices, array):
+        return indices.tolist()
+    return indices
+
+
 @dataclass
 class Hou2dMesh:
     vertices: List[Vec2] = field(default_factory=lambda: [])
@@ -109,13 +226,166 @@ class Hou2dMesh:
 
     def to_dict(self) -> Dict[str, Any]:
         return {
-            "vertices": [vert.to_dict() for vert in self.vertices],
-            "indices": self.indices,
-            "normals": [norm.to_dict() for norm in self.normals],
+            "vertices": vec_list_to_dict(self.vertices),
+            "indices": index_list(self.indices),
+            "normals": vec_list_to_dict(self.normals),
             "z": self.z,
             "id": self.id,
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], columnar: bool = False) -> Hou2dMesh:
+        mesh = cls(
+            vertices=[Vec2.from_dict(vert) for vert in data.get("vertices", [])],
+            normals=[Vec3.from_dict(norm) for norm in data.get("normals", [])],
+            indices=list(data.get("indices", [])),
+            z=data.get("z", 0.0),
+            id=data.get("id", 0),
+        )
+        if columnar:
+            return mesh.to_columnar()
+        return mesh
+
+    def __eq__(self, other: object) -> bool:
+        # list and columnar meshes compare equal, the index buffers differ
+        # in type only
+        if not isinstance(other, Hou2dMesh):
+            return NotImplemented
+        return (
+            self.vertices == other.vertices
+            and self.normals == other.normals
+            and list(self.indices) == list(other.indices)
+            and self.z == other.z
+            and self.id == other.id
+        )
+
+    def to_columnar(self) -> Hou2dMesh:
+        """
+        Return a copy backed by flat vertex/normal/index buffers
+        """
+        return Hou2dMesh(
+            vertices=Vec2Array.from_list(self.vertices),
+            normals=Vec3Array.from_list(self.normals),
+            indices=array("I", self.indices),
+            z=self.z,
+            id=self.id,
+        )
+
+
+@dataclass
+class Hou2dMeshRange:
+    """Location of one mesh inside a Hou2dMeshBatch"""
+
+    id: int = 0
+    index_offset: int = 0
+    index_count: int = 0
+    vertex_offset: int = 0
+    z: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "index_offset": self.index_offset,
+            "index_count": self.index_count,
+            "vertex_offset": self.vertex_offset,
+            "z": self.z,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Hou2dMeshRange:
+        return cls(
+            id=data.get("id", 0),
+            index_offset=data.get("index_offset", 0),
+            index_count=data.get("index_count", 0),
+            vertex_offset=data.get("vertex_offset", 0),
+            z=data.get("z", 0.0),
+        )
+
+
+@dataclass
+class Hou2dMeshBatch:
+    """
+    Many Hou2dMesh packed into one shared vertex/normal/index buffer.
+
+    Indices stay local to their mesh, ``vertex_offset`` is the base vertex to
+    add when drawing ``indices[index_offset : index_offset + index_count]``.
+    Every vertex has a normal, meshes without per-vertex normals get +Z.
+    """
+
+    vertices: Vec2Array = field(default_factory=lambda: Vec2Array())
+    normals: Vec3Array = field(default_factory=lambda: Vec3Array())
+    indices: array = field(default_factory=lambda: array("I"))
+    meshes: List[Hou2dMeshRange] = field(default_factory=list)
+
+    @classmethod
+    def from_meshes(cls, meshes: Iterable[Hou2dMesh]) -> Hou2dMeshBatch:
+        batch = cls()
+        for mesh in meshes:
+            batch.append(mesh)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.meshes)
+
+    def append(self, mesh: Hou2dMesh) -> Hou2dMeshRange:
+        mesh_range = Hou2dMeshRange(
+            id=mesh.id,
+            index_offset=len(self.indices),
+            index_count=len(mesh.indices),
+            vertex_offset=len(self.vertices),
+            z=mesh.z,
+        )
+        self.vertices.extend(mesh.vertices)
+        if len(mesh.normals) == len(mesh.vertices):
+            self.normals.extend(mesh.normals)
+        else:
+            self.normals.data.extend((0.0, 0.0, 1.0) * len(mesh.vertices))
+        self.indices.extend(mesh.indices)
+        self.meshes.append(mesh_range)
+        return mesh_range
+
+    def mesh(self, index: int) -> Hou2dMesh:
+        """
+        Copy mesh ``index`` back out of the batch
+        """
+        mesh_range = self.meshes[index]
+        indices = self.indices[
+            mesh_range.index_offset : mesh_range.index_offset + mesh_range.index_count
+        ]
+        start = mesh_range.vertex_offset
+        if index + 1 < len(self.meshes):
+            end = self.meshes[index + 1].vertex_offset
+        else:
+            end = len(self.vertices)
+        return Hou2dMesh(
+            vertices=Vec2Array(self.vertices.data[start * 2 : end * 2]),
+            normals=Vec3Array(self.normals.data[start * 3 : end * 3]),
+            indices=indices,
+            z=mesh_range.z,
+            id=mesh_range.id,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "vertices": self.vertices.to_dict(),
+            "normals": self.normals.to_dict(),
+            "indices": self.indices.tolist(),
+            "meshes": [mesh_range.to_dict() for mesh_range in self.meshes],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Hou2dMeshBatch:
+        return cls(
+            vertices=Vec2Array.from_list(
+                Vec2.from_dict(vert) for vert in data.get("vertices", [])
+            ),
+            normals=Vec3Array.from_list(
+                Vec3.from_dict(norm) for norm in data.get("normals", [])
+            ),
+            indices=array("I", data.get("indices", [])),
+            meshes=[Hou2dMeshRange.from_dict(item) for item in data.get("meshes", [])],
+        )
+
 
 @dataclass
 class HouRect:
@@ -148,14 +418,134 @@ class HouRect:
         return cls(size=size, translation=translation, uv=uv)
 
 
+class HouRectColumns:
+    """
+    Struct-of-arrays storage for HouRect.
+
+    ``size``, ``translation`` and ``uv`` (4 per rect) are flat columns. Indexing
+    and iteration build HouRect copies on the fly, so code written against
+    ``List[HouRect]`` keeps working.
+    """
+
+    def __init__(self):
+        self.size = Vec2Array()
+        self.translation = Vec3Array()
+        self.uv = Vec2Array()
+
+    @classmethod
+    def from_rects(cls, rects: Iterable[HouRect]) -> HouRectColumns:
+        columns = cls()
+        for rect in rects:
+            columns.append(rect)
+        return columns
+
+    @classmethod
+    def from_dict(cls, data: Iterable[Dict[str, Any]]) -> HouRectColumns:
+        """
+        Read ``HouRect.to_dict`` items straight into the columns
+        """
+        size: List[float] = []
+        translation: List[float] = []
+        uv: List[float] = []
+        for rect_data in data:
+            size += _components(rect_data.get("size", (0.5, 0.5)), "xy")
+            translation += _components(
+                rect_data.get("translation", (0.0, 0.0, 0.0)), "xyz"
+            )
+            rect_uv = rect_data.get("uv", [])
+            if len(rect_uv) != 4:
+                raise ValueError(f"uv must have 4 elements, got {len(rect_uv)}")
+            for uv_data in rect_uv:
+                uv += _components(uv_data, "xy")
+        columns = cls()
+        columns.extend_flat(size, translation, uv)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.size)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("HouRectColumns index out of range")
+        return HouRect(
+            size=self.size[index],
+            translation=self.translation[index],
+            uv=self.uv[index * 4 : index * 4 + 4],
+        )
+
+    def __iter__(self) -> Iterator[HouRect]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, HouRectColumns):
+            return (
+                self.size == other.size
+                and self.translation == other.translation
+                and self.uv == other.uv
+            )
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"HouRectColumns(len={len(self)})"
+
+    def append(self, rect: HouRect) -> None:
+        self.size.append(rect.size)
+        self.translation.append(rect.translation)
+        self.uv.extend(rect.uv)
+
+    def extend_flat(
+        self,
+        size: Iterable[float],
+        translation: Iterable[float],
+        uv: Iterable[float],
+    ) -> None:
+        """
+        Append many rects from flat component buffers (2, 3 and 8 floats per rect)
+        """
+        size = array("d", size)
+        translation = array("d", translation)
+        uv = array("d", uv)
+        count = len(size) // 2
+        if len(size) != count * 2 or len(translation) != count * 3:
+            raise ValueError("size/translation buffers do not describe the same rects")
+        if len(uv) != count * 8:
+            raise ValueError(f"uv must have 4 elements per rect, got {len(uv)} floats")
+        self.size.data.extend(size)
+        self.translation.data.extend(translation)
+        self.uv.data.extend(uv)
+
+    def to_dict(self) -> List[Dict[str, Any]]:
+        size = self.size.data.tolist()
+        translation = self.translation.data.tolist()
+        uv = self.uv.data.tolist()
+        return [
+            {
+                "size": size[i * 2 : i * 2 + 2],
+                "translation": translation[i * 3 : i * 3 + 3],
+                "uv": [uv[j : j + 2] for j in range(i * 8, i * 8 + 8, 2)],
+            }
+            for i in range(len(self))
+        ]
+
+
 @dataclass
 class HouLayer:
     rect: Optional[List[HouRect]] = None
     mesh2d: Optional[List[Hou2dMesh]] = None
+    mesh2d_batch: Optional[Hou2dMeshBatch] = None
+    columnar: bool = field(default=False, compare=False)
+    _spatial_index: Any = field(default=None, init=False, repr=False, compare=False)
 
     @classmethod
-    def new(cls) -> "HouLayer":
-        return HouLayer()
+    def new(cls, columnar: bool = False) -> "HouLayer":
+        return HouLayer(columnar=columnar)
 
     def append_data(self, data: Any):
         if isinstance(data, HouRect):
@@ -163,46 +553,149 @@ class HouLayer:
         if isinstance(data, Hou2dMesh):
             if self.mesh2d is None:
                 self.mesh2d = []
+            if self.columnar:
+                data = data.to_columnar()
             self.mesh2d.append(data)
 
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, quantize: bool = False) -> Dict[str, Any]:
+        """
+        With ``quantize`` geometry is written as 16-bit fixed point relative to
+        the layer bounds, see ``hou_bevy.quantize``
+        """
+        if quantize:
+            from hou_bevy.quantize import quantize_layer
+
+            return quantize_layer(self)
         result = {}
         if self.rect is not None:
-            result["rect"] = [rect.to_dict() for rect in self.rect]
+            if isinstance(self.rect, HouRectColumns):
+                result["rect"] = self.rect.to_dict()
+            else:
+                result["rect"] = [rect.to_dict() for rect in self.rect]
         if self.mesh2d is not None:
             result["mesh2d"] = [mesh2d.to_dict() for mesh2d in self.mesh2d]
+        if self.mesh2d_batch is not None:
+            result["mesh2d_batch"] = self.mesh2d_batch.to_dict()
         return result
 
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> HouLayer:
+    def from_dict(cls, data: Dict[str, Any], columnar: bool = False) -> HouLayer:
+        if "quantization" in data:
+            from hou_bevy.quantize import dequantize_layer
+
+            return dequantize_layer(data, columnar=columnar)
         rect = None
         if "rect" in data and data["rect"] is not None:
-            rect = [HouRect.from_dict(rect_data) for rect_data in data["rect"]]
-        return cls(rect=rect)
+            if columnar:
+                rect = HouRectColumns.from_dict(data["rect"])
+            else:
+                rect = [HouRect.from_dict(rect_data) for rect_data in data["rect"]]
+        mesh2d = None
+        if "mesh2d" in data and data["mesh2d"] is not None:
+            mesh2d = [
+                Hou2dMesh.from_dict(mesh_data, columnar=columnar)
+                for mesh_data in data["mesh2d"]
+            ]
+        mesh2d_batch = None
+        if data.get("mesh2d_batch") is not None:
+            mesh2d_batch = Hou2dMeshBatch.from_dict(data["mesh2d_batch"])
+        return cls(
+            rect=rect, mesh2d=mesh2d, mesh2d_batch=mesh2d_batch, columnar=columnar
+        )
+
+    def to_columnar(self) -> HouLayer:
+        """
+        Return a copy of the layer using struct-of-arrays storage
+        """
+        layer = HouLayer.new(columnar=True)
+        if self.rect is not None:
+            layer.rect = HouRectColumns.from_rects(self.rect)
+        if self.mesh2d is not None:
+            layer.mesh2d = [mesh.to_columnar() for mesh in self.mesh2d]
+        layer.mesh2d_batch = self.mesh2d_batch
+        return layer
+
+    def batch_meshes(self) -> Optional[Hou2dMeshBatch]:
+        """
+        Move every mesh of ``mesh2d`` into ``mesh2d_batch``
+        """
+        if not self.mesh2d:
+            return self.mesh2d_batch
+        if self.mesh2d_batch is None:
+            self.mesh2d_batch = Hou2dMeshBatch()
+        for mesh in self.mesh2d:
+            self.mesh2d_batch.append(mesh)
+        self.mesh2d = None
+        return self.mesh2d_batch
 
     def append_rect(self, rect: HouRect) -> None:
         if self.rect is None:
-            self.rect = []
+            self.rect = HouRectColumns() if self.columnar else []
         self.rect.append(rect)
+        self._spatial_index = None
+
+    def spatial_index(self):
+        """
+        Grid over the rect AABBs, rebuilt when the rect count changed
+        """
+        from hou_bevy.spatial import RectGrid
+
+        rects = self.rect or []
+        index = self._spatial_index
+        if index is None or index.count != len(rects):
+            index = RectGrid.from_rects(rects)
+            self._spatial_index = index
+        return index
+
+    def invalidate_spatial_index(self) -> None:
+        """
+        Call after editing rects in place
+        """
+        self._spatial_index = None
+
+    def query_aabb(self, min: Vec2, max: Vec2) -> List[int]:
+        """
+        Indices of rects overlapping the box
+        """
+        return self.spatial_index().query_aabb(min.x, min.y, max.x, max.y)
+
+    def query_point(self, point: Vec2) -> List[int]:
+        """
+        Indices of rects containing the point
+        """
+        return self.spatial_index().query_point(point.x, point.y)
+
+    def raycast(
+        self, origin: Vec2, direction: Vec2, max_distance: float = math.inf
+    ) -> Optional[Tuple[int, float]]:
+        """
+        ``(index, t)`` of the first rect hit, the hit is at origin + t * direction
+        """
+        return self.spatial_index().raycast(
+            origin.x, origin.y, direction.x, direction.y, max_distance
+        )
 
 
 @dataclass
 class HouData:
     layer: Dict[str, HouLayer] = field(default_factory=dict)
-
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "layer": {
-                layer_name: layer.to_dict() for layer_name, layer in self.layer.items()
+    columnar: bool = field(default=False, compare=False)
+
+    def to_dict(self, quantize: bool = False) -> Dict[str, Any]:
+        with stats.stage("to_dict"):
+            return {
+                "layer": {
+                    layer_name: layer.to_dict(quantize=quantize)
+                    for layer_name, layer in self.layer.items()
+                }
             }
-        }
 
     def create_layer(self, name: str):
         """
         Create HouLayer if not exists
         """
         if name not in self.layer.keys():
-            layer = HouLayer.new()
+            layer = HouLayer.new(columnar=self.columnar)
             self.layer[name] = layer
 
     def get_layer(self, name: str) -> HouLayer | None:
@@ -214,27 +707,195 @@ class HouData:
     def append_data(self, layer_name: str, data: Any):
         self.layer[layer_name].append_data(data)
 
+    def query_aabb(self, min: Vec2, max: Vec2) -> List[Tuple[str, int]]:
+        """
+        ``(layer name, rect index)`` of rects overlapping the box in all layers
+        """
+        return [
+            (name, index)
+            for name, layer in self.layer.items()
+            for index in layer.query_aabb(min, max)
+        ]
+
+    def query_point(self, point: Vec2) -> List[Tuple[str, int]]:
+        return [
+            (name, index)
+            for name, layer in self.layer.items()
+            for index in layer.query_point(point)
+        ]
+
+    def raycast(
+        self, origin: Vec2, direction: Vec2, max_distance: float = math.inf
+    ) -> Optional[Tuple[str, int, float]]:
+        """
+        Nearest hit over all layers as ``(layer name, rect index, t)``
+        """
+        best = None
+        for name, layer in self.layer.items():
+            hit = layer.raycast(origin, direction, max_distance)
+            if hit is not None and (best is None or hit[1] < best[2]):
+                best = (name, hit[0], hit[1])
+        return best
+
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> HouData:
+    def from_dict(cls, data: Dict[str, Any], columnar: bool = False) -> HouData:
         layers = {}
         for layer_name, layer_data in data.get("layer", {}).items():
-            layers[layer_name] = HouLayer.from_dict(layer_data)
-        return cls(layer=layers)
+            layers[layer_name] = HouLayer.from_dict(layer_data, columnar=columnar)
+        return cls(layer=layers, columnar=columnar)
+
+    @classmethod
+    def from_json(
+        cls, json_str: str, columnar: bool = False, lazy: bool = False
+    ) -> HouData:
+        """
+        With ``lazy`` only the layer offsets are indexed up front, each layer
+        is decoded on first access.
+        """
+        if lazy:
+            from hou_bevy.json_stream import LazyLayers
+
+            layers = LazyLayers.from_bytes(json_str.encode("utf-8"), columnar=columnar)
+            return cls(layer=layers, columnar=columnar)
+        stats.count("json_bytes_read", len(json_str))
+        with stats.stage("json_loads"):
+            data = json.loads(json_str)
+        with stats.stage("from_dict"):
+            return cls.from_dict(data, columnar=columnar)
+
+    def to_json(
+        self,
+        compact: bool = False,
+        precision: Optional[int] = None,
+        quantize: bool = False,
+    ) -> str:
+        from hou_bevy.json_stream import iter_json
+
+        indent = None if compact else 2
+        with stats.stage("to_json"):
+            text = "".join(
+                iter_json(self, indent=indent, precision=precision, quantize=quantize)
+            )
+        # the output is ASCII
+        stats.count("json_bytes", len(text))
+        return text
+
+    def export_as_json(
+        self,
+        file_path: str,
+        compact: bool = False,
+        precision: Optional[int] = None,
+        quantize: bool = False,
+    ) -> None:
+        """
+        Stream the data to ``file_path`` without building the full dict tree.
+        ``compact`` drops indentation, ``precision`` rounds floats to N decimals,
+        ``quantize`` writes geometry as 16-bit fixed point.
+        """
+        from hou_bevy.json_stream import write_json
+
+        indent = None if compact else 2
+        with stats.stage("export_as_json"), open(file_path, "w") as f:
+            write_json(self, f, indent=indent, precision=precision, quantize=quantize)
+        stats.count_file("output_bytes", file_path)
+
+    def export_as_binary(self, file_path: str) -> None:
+        """
+        Write the data using the binary container from ``hou_bevy.binary``
+        """
+        from hou_bevy.binary import write_binary
+
+        with stats.stage("export_as_binary"):
+            write_binary(self, file_path)
+        stats.count_file("output_bytes", file_path)
+
+    @classmethod
+    def import_from_binary(cls, file_path: str, columnar: bool = True) -> HouData:
+        from hou_bevy.binary import HouBinaryFile
+
+        with HouBinaryFile(file_path) as binary_file:
+            return binary_file.to_hou_data(columnar=columnar)
+
+    def export_as_compressed(
+        self,
+        file_path: str,
+        codec: str = "zlib",
+        level: Optional[int] = None,
+        quantize: bool = False,
+    ) -> None:
+        """
+        Write every layer as an independently compressed frame, see
+        ``hou_bevy.compressed``
+        """
+        from hou_bevy.compressed import write_compressed
+
+        with stats.stage("export_as_compressed"):
+            write_compressed(
+                self, file_path, codec=codec, level=level, quantize=quantize
+            )
+        stats.count_file("output_bytes", file_path)
 
     @classmethod
-    def from_json(cls, json_str: str) -> HouData:
-        data = json.loads(json_str)
-        return cls.from_dict(data)
+    def import_from_compressed(
+        cls, file_path: str, columnar: bool = False, lazy: bool = False
+    ) -> HouData:
+        """
+        With ``lazy`` only the index is read, each layer is decompressed on
+        first access.
+        """
+        from hou_bevy.compressed import HouCompressedFile
 
-    def to_json(self) -> str:
-        return json.dumps(self.to_dict(), indent=2)
+        with HouCompressedFile(file_path) as compressed_file:
+            if lazy:
+                layers = compressed_file.lazy_layers(columnar=columnar)
+                return cls(layer=layers, columnar=columnar)
+            return compressed_file.to_hou_data(columnar=columnar)
 
-    def export_as_json(self, file_path: str) -> None:
-        with open(file_path, "w") as f:
-            json.dump(self.to_dict(), f, indent=2)
+    @staticmethod
+    def open_layer(file_path: str, name: str, columnar: bool = False) -> HouLayer:
+        """
+        Read a single layer without decoding the others. Compressed (.houz)
+        and binary (.houb) files are picked by extension, anything else is
+        read as JSON.
+        """
+        from hou_bevy.binary import BINARY_EXTENSION, HouBinaryFile
+        from hou_bevy.compressed import COMPRESSED_EXTENSION, HouCompressedFile
+
+        if file_path.endswith(COMPRESSED_EXTENSION):
+            with HouCompressedFile(file_path) as compressed_file:
+                return compressed_file.layer(name, columnar=columnar)
+        if file_path.endswith(BINARY_EXTENSION):
+            with HouBinaryFile(file_path) as binary_file:
+                return binary_file.layer(name).to_layer(columnar=columnar)
+        from hou_bevy.json_stream import LazyLayers
+
+        return LazyLayers.from_file(file_path, columnar=columnar)[name]
 
     @classmethod
-    def import_from_json(cls, file_path: str) -> HouData:
-        with open(file_path, "r") as f:
+    def import_from_json(
+        cls, file_path: str, columnar: bool = False, lazy: bool = False
+    ) -> HouData:
+        """
+        With ``lazy`` the file is scanned once for layer offsets and each
+        layer is read and decoded from disk on first access.
+        """
+        if lazy:
+            from hou_bevy.json_stream import LazyLayers
+
+            layers = LazyLayers.from_file(file_path, columnar=columnar)
+            return cls(layer=layers, columnar=columnar)
+        stats.count_file("json_bytes_read", file_path)
+        with stats.stage("json_load"), open(file_path, "r") as f:
             data = json.load(f)
-        return cls.from_dict(data)
+        with stats.stage("from_dict"):
+            return cls.from_dict(data, columnar=columnar)
+
+    @staticmethod
+    def iter_layer(file_path: str, name: str) -> Iterator[HouRect | Hou2dMesh]:
+        """
+        Yield the rects and meshes of one layer while reading the file in
+        chunks, only a single element is decoded at a time.
+        """
+        from hou_bevy.json_stream import iter_layer
+
+        return iter_layer(file_path, name)
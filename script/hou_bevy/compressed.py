@@ -0,0 +1,244 @@
+"""
+Compressed HouData container with per-layer random access.
+
+Every layer is encoded as the compact JSON value found under ``"layer"`` in a
+regular export and compressed as its own frame, so one layer can be read
+without decompressing the others. The index stays uncompressed.
+
+Layout (all integers little-endian)::
+
+    header      magic "HOUZ", version u16, codec u16, layer_count u32, reserved u32
+    layer table layer_count * (frame_offset u64, frame_size u64, raw_size u64,
+                               name_offset u32, name_size u32)
+    names       utf-8 layer names referenced by the table
+    frames      one compressed layer per table entry
+
+``codec`` is one of ``CODECS``; every frame of a file uses the same codec.
+"""
+
+from __future__ import annotations
+
+import json
+import lzma
+import struct
+import zlib
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from hou_bevy.component import HouData, HouLayer
+from hou_bevy.json_stream import LazyLayers, iter_layer_json
+
+MAGIC = b"HOUZ"
+VERSION = 1
+COMPRESSED_EXTENSION = ".houz"
+
+FILE_HEADER = struct.Struct("<4sHHII")
+LAYER_ENTRY = struct.Struct("<QQQII")
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+CODECS = {"none": CODEC_NONE, "zlib": CODEC_ZLIB, "lzma": CODEC_LZMA}
+
+
+class _Identity:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def _compressor(codec: int, level: Optional[int]):
+    if codec == CODEC_ZLIB:
+        return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level)
+    if codec == CODEC_LZMA:
+        return lzma.LZMACompressor(preset=6 if level is None else level)
+    return _Identity()
+
+
+def _decompress(codec: int, frame: bytes) -> bytes:
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(frame)
+    if codec == CODEC_LZMA:
+        return lzma.decompress(frame)
+    return frame
+
+
+def _codec_id(codec: str) -> int:
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec '{codec}', expected one of {list(CODECS)}")
+    return CODECS[codec]
+
+
+def compress_layer(
+    layer: HouLayer,
+    codec: str = "zlib",
+    level: Optional[int] = None,
+    quantize: bool = False,
+) -> Tuple[bytes, int]:
+    """
+    Compressed frame of ``layer`` and its uncompressed size
+    """
+    compressor = _compressor(_codec_id(codec), level)
+    parts: List[bytes] = []
+    raw_size = 0
+    for piece in iter_layer_json(layer, quantize=quantize):
+        data = piece.encode("utf-8")
+        raw_size += len(data)
+        parts.append(compressor.compress(data))
+    parts.append(compressor.flush())
+    return b"".join(parts), raw_size
+
+
+def write_compressed(
+    hou_data: HouData,
+    file_path: str,
+    codec: str = "zlib",
+    level: Optional[int] = None,
+    quantize: bool = False,
+) -> None:
+    names = [name.encode("utf-8") for name in hou_data.layer.keys()]
+    frames = [
+        compress_layer(layer, codec, level, quantize)
+        for layer in hou_data.layer.values()
+    ]
+
+    names_offset = FILE_HEADER.size + LAYER_ENTRY.size * len(frames)
+    offset = names_offset + sum(len(name) for name in names)
+
+    entries: List[bytes] = []
+    name_offset = names_offset
+    for name, (frame, raw_size) in zip(names, frames):
+        entries.append(
+            LAYER_ENTRY.pack(offset, len(frame), raw_size, name_offset, len(name))
+        )
+        offset += len(frame)
+        name_offset += len(name)
+
+    with open(file_path, "wb") as f:
+        f.write(FILE_HEADER.pack(MAGIC, VERSION, _codec_id(codec), len(frames), 0))
+        f.writelines(entries)
+        f.writelines(names)
+        f.writelines(frame for frame, _ in frames)
+
+
+def _read_exact(f: IO[bytes], size: int) -> bytes:
+    data = f.read(size)
+    if len(data) < size:
+        raise ValueError("truncated HOUZ file")
+    return data
+
+
+class HouCompressedFile:
+    """
+    Reader for files written by ``write_compressed``, only the index is read
+    up front
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._file: Optional[IO[bytes]] = open(file_path, "rb")
+        try:
+            header = self._file.read(FILE_HEADER.size)
+            if not header or not MAGIC.startswith(header[: len(MAGIC)]):
+                raise ValueError(f"{file_path} is not a compressed HouData file")
+            if len(header) < FILE_HEADER.size:
+                raise ValueError("truncated HOUZ file")
+            magic, version, codec, layer_count, _ = FILE_HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError(f"{file_path} is not a compressed HouData file")
+            if version > VERSION:
+                raise ValueError(f"Unsupported compressed HouData version {version}")
+            if codec not in CODECS.values():
+                raise ValueError(f"Unknown codec id {codec} in {file_path}")
+            self.version = version
+            self.codec = codec
+
+            table = _read_exact(self._file, LAYER_ENTRY.size * layer_count)
+            entries = [
+                LAYER_ENTRY.unpack_from(table, i * LAYER_ENTRY.size)
+                for i in range(layer_count)
+            ]
+            names_size = sum(entry[4] for entry in entries)
+            names = _read_exact(self._file, names_size)
+            names_offset = FILE_HEADER.size + len(table)
+        except Exception:
+            self.close()
+            raise
+
+        # name -> (frame_offset, frame_size, raw_size)
+        self._layers: Dict[str, Tuple[int, int, int]] = {}
+        for offset, size, raw_size, name_offset, name_size in entries:
+            start = name_offset - names_offset
+            name = names[start : start + name_size].decode("utf-8")
+            self._layers[name] = (offset, size, raw_size)
+
+    def __enter__(self) -> HouCompressedFile:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._layers)
+
+    def __len__(self) -> int:
+        return len(self._layers)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._layers
+
+    def layer_names(self) -> List[str]:
+        return list(self._layers)
+
+    def layer_sizes(self, name: str) -> Tuple[int, int]:
+        """
+        ``(compressed, uncompressed)`` size of a layer in bytes
+        """
+        _, size, raw_size = self._layers[name]
+        return size, raw_size
+
+    def _read_frame(self, offset: int, size: int) -> bytes:
+        self._file.seek(offset)
+        return _decompress(self.codec, _read_exact(self._file, size))
+
+    def layer_bytes(self, name: str) -> bytes:
+        """
+        Decompressed JSON of a single layer
+        """
+        offset, size, _ = self._layers[name]
+        return self._read_frame(offset, size)
+
+    def layer(self, name: str, columnar: bool = False) -> HouLayer:
+        return HouLayer.from_dict(json.loads(self.layer_bytes(name)), columnar=columnar)
+
+    def lazy_layers(self, columnar: bool = False) -> LazyLayers:
+        """
+        Layer mapping that decompresses each frame on first access, frames
+        are read by reopening the file so it outlives this reader
+        """
+        spans = {
+            name: (offset, offset + size)
+            for name, (offset, size, _) in self._layers.items()
+        }
+        file_path = self.file_path
+        codec = self.codec
+
+        def read_span(start: int, end: int) -> bytes:
+            with open(file_path, "rb") as f:
+                f.seek(start)
+                return _decompress(codec, _read_exact(f, end - start))
+
+        return LazyLayers(spans, read_span, columnar=columnar)
+
+    def to_hou_data(self, columnar: bool = False) -> HouData:
+        hou_data = HouData(columnar=columnar)
+        for name in self._layers:
+            hou_data.layer[name] = self.layer(name, columnar=columnar)
+        return hou_data
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
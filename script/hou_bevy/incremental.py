@@ -0,0 +1,175 @@
+"""
+Incremental, per-layer export.
+
+Each layer is written to its own JSON file next to a manifest that records a
+hash per layer. The hash is taken over the unencoded f64 columns and mesh
+buffers plus the export options, so finding the unchanged layers costs a
+hash of their buffers and only changed layers are encoded and streamed to
+disk. Files of layers that disappeared are removed.
+
+Manifest layout::
+
+    {
+      "version": 1,
+      "layers": {
+        "<layer name>": {"file": "<relative path>", "hash": "<sha1>"}
+      }
+    }
+
+Every layer file is a regular HouData document holding a single layer, so it
+can be read with ``HouData.import_from_json``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from hou_bevy.component import HouData, HouLayer
+from hou_bevy.json_stream import write_json
+
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class IncrementalResult:
+    written: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+
+def _update(digest: Any, values: Any) -> None:
+    """
+    Feed a column to ``digest``, arrays by their raw bytes. Lists, as in
+    non columnar layers, by their repr, which keeps floats exact.
+    """
+    data = getattr(values, "data", values)
+    if isinstance(data, array):
+        digest.update(data.typecode.encode() + data.tobytes())
+    else:
+        digest.update(repr(data).encode())
+    digest.update(b"\0")
+
+
+def layer_hash(name: str, layer: HouLayer, salt: bytes = b"") -> str:
+    """
+    Hash of the layer content at full precision, stable across runs, without
+    encoding it. ``salt`` folds export options into the hash.
+    """
+    digest = hashlib.sha1(salt + b"\0" + name.encode("utf-8") + b"\0")
+    rects = layer.rect
+    if rects is None:
+        digest.update(b"-")
+    elif hasattr(rects, "translation") and hasattr(rects.translation, "data"):
+        for column in (rects.size, rects.translation, rects.uv):
+            _update(digest, column)
+    else:
+        _update(digest, rects)
+    for mesh in layer.mesh2d if layer.mesh2d is not None else [None]:
+        if mesh is None:
+            digest.update(b"-")
+            continue
+        for values in (mesh.vertices, mesh.normals, mesh.indices, (mesh.z, mesh.id)):
+            _update(digest, values)
+    batch = layer.mesh2d_batch
+    if batch is None:
+        digest.update(b"-")
+    else:
+        for values in (batch.vertices, batch.normals, batch.indices, batch.meshes):
+            _update(digest, values)
+    return digest.hexdigest()
+
+
+def layer_file_name(manifest_path: str, name: str) -> str:
+    stem = os.path.splitext(os.path.basename(manifest_path))[0]
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+    if safe != name:
+        # keep names that only differ in replaced characters apart
+        safe += "-" + hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+    return f"{stem}.{safe}.json"
+
+
+def load_manifest(manifest_path: str) -> Dict[str, Any]:
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "layers": {}}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "layers": {}}
+    return manifest
+
+
+def _replace(file_path: str, write) -> None:
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        write(f)
+    os.replace(tmp_path, file_path)
+
+
+def export_incremental(
+    hou_data: HouData,
+    manifest_path: str,
+    compact: bool = False,
+    precision: Optional[int] = None,
+) -> IncrementalResult:
+    """
+    Write changed layers of ``hou_data`` and update the manifest
+    """
+    directory = os.path.dirname(os.path.abspath(manifest_path))
+    previous = load_manifest(manifest_path)["layers"]
+    layers: Dict[str, Dict[str, str]] = {}
+    result = IncrementalResult()
+    indent = None if compact else 2
+    salt = f"{compact}:{precision}".encode()
+
+    for name, layer in hou_data.layer.items():
+        digest = layer_hash(name, layer, salt)
+        file_name = layer_file_name(manifest_path, name)
+        layers[name] = {"file": file_name, "hash": digest}
+
+        entry = previous.get(name)
+        file_path = os.path.join(directory, file_name)
+        if entry == layers[name] and os.path.exists(file_path):
+            result.skipped.append(name)
+            continue
+
+        single = HouData(layer={name: layer})
+        _replace(
+            file_path,
+            lambda f: write_json(single, f, indent=indent, precision=precision),
+        )
+        result.written.append(name)
+
+    current_files = {entry["file"] for entry in layers.values()}
+    for name, entry in previous.items():
+        if name in layers or entry.get("file") in current_files:
+            continue
+        try:
+            os.remove(os.path.join(directory, entry["file"]))
+        except OSError:
+            pass
+        result.removed.append(name)
+
+    manifest = {"version": MANIFEST_VERSION, "layers": layers}
+    _replace(manifest_path, lambda f: json.dump(manifest, f, indent=2))
+    return result
+
+
+def import_incremental(manifest_path: str, columnar: bool = False) -> HouData:
+    """
+    Read every layer referenced by a manifest back into one HouData
+    """
+    directory = os.path.dirname(os.path.abspath(manifest_path))
+    hou_data = HouData(columnar=columnar)
+    for name, entry in load_manifest(manifest_path)["layers"].items():
+        layer_data = HouData.import_from_json(
+            os.path.join(directory, entry["file"]), columnar=columnar
+        )
+        hou_data.layer[name] = layer_data.layer[name]
+    return hou_data
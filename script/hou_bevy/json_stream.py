@@ -0,0 +1,653 @@
+"""
+Streaming JSON serialization for HouData.
+
+``iter_json`` yields the document in small string pieces straight from the
+layers, so the nested dict tree built by ``HouData.to_dict`` never exists in
+memory. With the default ``indent=2`` the output is byte-identical to
+``json.dump(hou_data.to_dict(), f, indent=2)``. ``indent=None`` gives the
+compact form and ``precision`` rounds every float to that many decimals.
+``quantize`` writes the layers in the 16-bit form of ``hou_bevy.quantize``.
+
+For reading, ``_Scanner`` tokenizes a file chunk by chunk and skips values
+without decoding them. ``LazyLayers`` uses it to index layer offsets and decode
+each layer on first access, ``iter_layer`` to yield one element at a time.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import math
+import re
+from collections.abc import MutableMapping
+from json.encoder import encode_basestring_ascii
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from hou_bevy.component import (
+    Hou2dMesh,
+    Hou2dMeshBatch,
+    HouData,
+    HouLayer,
+    HouRect,
+    HouRectColumns,
+    VecArray,
+)
+from hou_bevy.quantize import (
+    Quantization,
+    dequantize_batch,
+    dequantize_mesh,
+    dequantize_rects,
+    quantization_saves,
+    quantize_batch,
+    quantize_mesh,
+    quantize_rects,
+)
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+class _Array:
+    """Lazily produced JSON array"""
+
+    def __init__(self, length: int, items: Iterable[Any]):
+        self.length = length
+        self.items = items
+
+
+class _Object:
+    """JSON object with ordered, possibly lazy values"""
+
+    def __init__(self, pairs: List[Tuple[str, Any]]):
+        self.pairs = pairs
+
+
+def _vectors(values: Any) -> _Array:
+    if isinstance(values, VecArray):
+        data = values.data
+        stride = values.stride
+        return _Array(
+            len(values),
+            (data[i : i + stride] for i in range(0, len(data), stride)),
+        )
+    return _Array(len(values), (value.to_dict() for value in values))
+
+
+def _column_rects(rects: HouRectColumns) -> Iterator[_Object]:
+    size = rects.size.data
+    translation = rects.translation.data
+    uv = rects.uv.data
+    for i in range(len(rects)):
+        yield _Object(
+            [
+                ("size", size[i * 2 : i * 2 + 2]),
+                ("translation", translation[i * 3 : i * 3 + 3]),
+                ("uv", [uv[j : j + 2] for j in range(i * 8, i * 8 + 8, 2)]),
+            ]
+        )
+
+
+def _mesh(mesh: Hou2dMesh) -> _Object:
+    return _Object(
+        [
+            ("vertices", _vectors(mesh.vertices)),
+            ("indices", mesh.indices),
+            ("normals", _vectors(mesh.normals)),
+            ("z", mesh.z),
+            ("id", mesh.id),
+        ]
+    )
+
+
+def _mesh_batch(batch: Hou2dMeshBatch) -> _Object:
+    return _Object(
+        [
+            ("vertices", _vectors(batch.vertices)),
+            ("normals", _vectors(batch.normals)),
+            ("indices", batch.indices),
+            ("meshes", [mesh_range.to_dict() for mesh_range in batch.meshes]),
+        ]
+    )
+
+
+def _quantized_pairs(layer: HouLayer, quantization: Quantization) -> _Object:
+    pairs: List[Tuple[str, Any]] = [("quantization", quantization.to_dict())]
+    if layer.rect is not None:
+        pairs.append(("rect", quantize_rects(layer.rect, quantization)))
+    if layer.mesh2d is not None:
+        meshes = (quantize_mesh(mesh, quantization) for mesh in layer.mesh2d)
+        pairs.append(("mesh2d", _Array(len(layer.mesh2d), meshes)))
+    if layer.mesh2d_batch is not None:
+        pairs.append(("mesh2d_batch", quantize_batch(layer.mesh2d_batch, quantization)))
+    return _Object(pairs)
+
+
+def _quantized_layer(layer: HouLayer) -> _Object:
+    """
+    The quantized layer, or the plain one when quantizing does not make it
+    smaller, e.g. for grid-snapped coordinates
+    """
+    quantization = Quantization.from_layer(layer)
+    if not quantization_saves(layer, quantization):
+        return _layer(layer)
+    return _quantized_pairs(layer, quantization)
+
+
+def _layer(layer: HouLayer) -> _Object:
+    pairs: List[Tuple[str, Any]] = []
+    if layer.rect is not None:
+        if isinstance(layer.rect, HouRectColumns):
+            rects: Iterable[Any] = _column_rects(layer.rect)
+        else:
+            rects = (rect.to_dict() for rect in layer.rect)
+        pairs.append(("rect", _Array(len(layer.rect), rects)))
+    if layer.mesh2d is not None:
+        pairs.append(("mesh2d", _Array(len(layer.mesh2d), map(_mesh, layer.mesh2d))))
+    if layer.mesh2d_batch is not None:
+        pairs.append(("mesh2d_batch", _mesh_batch(layer.mesh2d_batch)))
+    return _Object(pairs)
+
+
+def _document(hou_data: HouData, quantize: bool = False) -> _Object:
+    encode_layer = _quantized_layer if quantize else _layer
+    layers = [(name, encode_layer(layer)) for name, layer in hou_data.layer.items()]
+    return _Object([("layer", _Object(layers))])
+
+
+class _Encoder:
+    def __init__(self, indent: Optional[int], precision: Optional[int]):
+        self.indent = None if indent is None else " " * indent
+        self.precision = precision
+        self.item_separator = ","
+        self.key_separator = ":" if indent is None else ": "
+
+    def float(self, value: float) -> str:
+        if value != value:
+            return "NaN"
+        if math.isinf(value):
+            return "Infinity" if value > 0 else "-Infinity"
+        if self.precision is not None:
+            value = round(value, self.precision)
+        return float.__repr__(value)
+
+    def scalar(self, value: Any) -> str:
+        if isinstance(value, str):
+            return encode_basestring_ascii(value)
+        if value is None:
+            return "null"
+        if value is True:
+            return "true"
+        if value is False:
+            return "false"
+        if isinstance(value, int):
+            return int.__repr__(value)
+        if isinstance(value, float):
+            return self.float(value)
+        raise TypeError(
+            f"Object of type {type(value).__name__} is not JSON serializable"
+        )
+
+    def _newline(self, level: int) -> str:
+        return "\n" + self.indent * level
+
+    def encode(self, value: Any, level: int = 0) -> Iterator[str]:
+        if isinstance(value, _Object):
+            yield from self.object(value.pairs, level)
+        elif isinstance(value, dict):
+            yield from self.object(list(value.items()), level)
+        elif isinstance(value, _Array):
+            yield from self.array(value.length, value.items, level)
+        elif isinstance(value, (str, int, float)) or value is None:
+            yield self.scalar(value)
+        else:
+            yield from self.array(len(value), value, level)
+
+    def object(self, pairs: List[Tuple[str, Any]], level: int) -> Iterator[str]:
+        if not pairs:
+            yield "{}"
+            return
+        if self.indent is None:
+            separator = self.item_separator
+            yield "{"
+        else:
+            separator = self.item_separator + self._newline(level + 1)
+            yield "{" + self._newline(level + 1)
+        first = True
+        for key, value in pairs:
+            if not first:
+                yield separator
+            first = False
+            yield encode_basestring_ascii(key) + self.key_separator
+            yield from self.encode(value, level + 1)
+        yield "}" if self.indent is None else self._newline(level) + "}"
+
+    def array(self, length: int, items: Iterable[Any], level: int) -> Iterator[str]:
+        if length == 0:
+            yield "[]"
+            return
+        if self.indent is None:
+            separator = self.item_separator
+            yield "["
+        else:
+            separator = self.item_separator + self._newline(level + 1)
+            yield "[" + self._newline(level + 1)
+        first = True
+        for item in items:
+            if not first:
+                yield separator
+            first = False
+            if isinstance(item, (int, float)):
+                yield self.scalar(item)
+            elif self._is_number_list(item):
+                # fast path for vectors, the bulk of every level
+                yield self.numbers(item, level + 1)
+            else:
+                yield from self.encode(item, level + 1)
+        yield "]" if self.indent is None else self._newline(level) + "]"
+
+    @staticmethod
+    def _is_number_list(item: Any) -> bool:
+        if isinstance(item, (str, dict, _Object, _Array)):
+            return False
+        try:
+            return len(item) > 0 and all(
+                isinstance(value, (int, float)) and not isinstance(value, bool)
+                for value in item
+            )
+        except TypeError:
+            return False
+
+    def numbers(self, values: Any, level: int) -> str:
+        parts = [self.scalar(value) for value in values]
+        if self.indent is None:
+            return "[" + self.item_separator.join(parts) + "]"
+        separator = self.item_separator + self._newline(level + 1)
+        return (
+            "["
+            + self._newline(level + 1)
+            + separator.join(parts)
+            + self._newline(level)
+            + "]"
+        )
+
+
+def iter_json(
+    hou_data: HouData,
+    indent: Optional[int] = 2,
+    precision: Optional[int] = None,
+    quantize: bool = False,
+) -> Iterator[str]:
+    """
+    Yield the JSON document for ``hou_data`` piece by piece.
+    ``precision`` would also round the stored quantization bounds, so it can
+    not be combined with ``quantize``.
+    """
+    if quantize and precision is not None:
+        raise ValueError("precision can not be combined with quantize")
+    return _Encoder(indent, precision).encode(_document(hou_data, quantize))
+
+
+def iter_layer_json(
+    layer: HouLayer,
+    indent: Optional[int] = None,
+    precision: Optional[int] = None,
+    quantize: bool = False,
+) -> Iterator[str]:
+    """
+    Yield the JSON value of a single layer, as found under ``"layer"``
+    """
+    if quantize and precision is not None:
+        raise ValueError("precision can not be combined with quantize")
+    encoded = _quantized_layer(layer) if quantize else _layer(layer)
+    return _Encoder(indent, precision).encode(encoded)
+
+
+def write_json(
+    hou_data: HouData,
+    fp: IO[str],
+    indent: Optional[int] = 2,
+    precision: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    quantize: bool = False,
+) -> int:
+    """
+    Stream ``hou_data`` to ``fp`` in chunks of roughly ``chunk_size`` characters.
+    Returns the number of characters written.
+    """
+    pending: List[str] = []
+    pending_size = 0
+    written = 0
+    pieces = iter_json(hou_data, indent=indent, precision=precision, quantize=quantize)
+    for piece in pieces:
+        pending.append(piece)
+        pending_size += len(piece)
+        if pending_size >= chunk_size:
+            fp.write("".join(pending))
+            written += pending_size
+            pending = []
+            pending_size = 0
+    if pending:
+        fp.write("".join(pending))
+        written += pending_size
+    return written
+
+
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_CONTAINER_SPECIAL = re.compile(rb'["\[\]{}]')
+_STRING_SPECIAL = re.compile(rb'["\\]')
+_SCALAR_END = re.compile(rb"[,\]}\s]")
+
+
+class _Scanner:
+    """
+    Incremental JSON tokenizer over a binary file.
+
+    Only structural bytes are inspected, values are skipped without being
+    decoded. Consumed input is dropped on refill unless a value is being
+    captured, so memory is bounded by ``chunk_size`` plus the largest
+    captured value.
+    """
+
+    def __init__(self, fp: IO[bytes], chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = b""
+        self.pos = 0
+        self.base = 0
+        self.anchor: Optional[int] = None
+
+    @property
+    def offset(self) -> int:
+        return self.base + self.pos
+
+    def _fill(self) -> bool:
+        data = self.fp.read(self.chunk_size)
+        if not data:
+            return False
+        keep = self.pos if self.anchor is None else self.anchor
+        if keep:
+            self.buffer = self.buffer[keep:]
+            self.base += keep
+            self.pos -= keep
+            if self.anchor is not None:
+                self.anchor = 0
+        self.buffer += data
+        return True
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, "", self.offset)
+
+    def peek(self) -> bytes:
+        """
+        Skip whitespace and return the next byte, b"" at end of input
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos : self.pos + 1]
+            if not self._fill():
+                return b""
+
+    def expect(self, char: bytes) -> None:
+        if self.peek() != char:
+            raise self._error(f"Expecting {char.decode()!r}")
+        self.pos += 1
+
+    def next_item(self, close: bytes) -> bool:
+        """
+        Consume the separator after a member, False once ``close`` is reached
+        """
+        char = self.peek()
+        self.pos += 1
+        if char == b",":
+            return True
+        if char == close:
+            return False
+        raise self._error(f"Expecting ',' or {close.decode()!r}")
+
+    def open(self, char: bytes, close: bytes) -> bool:
+        """
+        Consume an opening bracket, False if the container is empty
+        """
+        self.expect(char)
+        if self.peek() == close:
+            self.pos += 1
+            return False
+        return True
+
+    def _search(self, pattern: re.Pattern) -> bytes:
+        while True:
+            match = pattern.search(self.buffer, self.pos)
+            if match:
+                self.pos = match.end()
+                return match.group()
+            self.pos = len(self.buffer)
+            if not self._fill():
+                raise self._error("Unterminated value")
+
+    def _skip_string(self) -> None:
+        while True:
+            if self._search(_STRING_SPECIAL) == b'"':
+                return
+            # skip the escaped character, refill first so pos never runs past
+            # the buffer, _fill would drop the escaped byte with it
+            while self.pos >= len(self.buffer):
+                if not self._fill():
+                    raise self._error("Unterminated string")
+            self.pos += 1
+
+    def skip_value(self) -> None:
+        char = self.peek()
+        if char in (b"{", b"["):
+            depth = 0
+            while True:
+                token = self._search(_CONTAINER_SPECIAL)
+                if token == b'"':
+                    self._skip_string()
+                elif token in (b"{", b"["):
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        return
+        elif char == b'"':
+            self.pos += 1
+            self._skip_string()
+        elif char:
+            while True:
+                match = _SCALAR_END.search(self.buffer, self.pos)
+                if match:
+                    self.pos = match.start()
+                    return
+                self.pos = len(self.buffer)
+                if not self._fill():
+                    return
+        else:
+            raise self._error("Expecting value")
+
+    def read_value(self) -> bytes:
+        """
+        Return the raw bytes of the next value
+        """
+        self.peek()
+        self.anchor = self.pos
+        try:
+            self.skip_value()
+            return self.buffer[self.anchor : self.pos]
+        finally:
+            self.anchor = None
+
+    def read_key(self) -> str:
+        key = json.loads(self.read_value())
+        self.expect(b":")
+        return key
+
+    def iter_members(self) -> Iterator[str]:
+        """
+        Yield the keys of an object, the caller consumes each value
+        """
+        if not self.open(b"{", b"}"):
+            return
+        while True:
+            yield self.read_key()
+            if not self.next_item(b"}"):
+                return
+
+    def iter_elements(self) -> Iterator[bytes]:
+        """
+        Yield the raw bytes of each element of an array
+        """
+        if not self.open(b"[", b"]"):
+            return
+        while True:
+            yield self.read_value()
+            if not self.next_item(b"]"):
+                return
+
+
+def index_layers(fp: IO[bytes]) -> Dict[str, Tuple[int, int]]:
+    """
+    Map each layer name to the byte span of its value without decoding it
+    """
+    scanner = _Scanner(fp)
+    spans: Dict[str, Tuple[int, int]] = {}
+    for key in scanner.iter_members():
+        if key != "layer":
+            scanner.skip_value()
+            continue
+        for name in scanner.iter_members():
+            scanner.peek()
+            start = scanner.offset
+            scanner.skip_value()
+            spans[name] = (start, scanner.offset)
+    return spans
+
+
+class LazyLayers(MutableMapping):
+    """
+    ``HouData.layer`` mapping that decodes each layer on first access
+    """
+
+    def __init__(
+        self,
+        spans: Dict[str, Tuple[int, int]],
+        read_span: Callable[[int, int], bytes],
+        columnar: bool = False,
+    ):
+        self._spans = spans
+        self._read_span = read_span
+        self._decoded: Dict[str, HouLayer] = {}
+        self._names: Dict[str, None] = dict.fromkeys(spans)
+        self.columnar = columnar
+
+    @classmethod
+    def from_file(cls, file_path: str, columnar: bool = False) -> LazyLayers:
+        with open(file_path, "rb") as f:
+            spans = index_layers(f)
+
+        def read_span(start: int, end: int) -> bytes:
+            with open(file_path, "rb") as f:
+                f.seek(start)
+                return f.read(end - start)
+
+        return cls(spans, read_span, columnar=columnar)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, columnar: bool = False) -> LazyLayers:
+        spans = index_layers(io.BytesIO(data))
+        return cls(spans, lambda start, end: data[start:end], columnar=columnar)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._decoded
+
+    def __getitem__(self, name: str) -> HouLayer:
+        if name in self._decoded:
+            return self._decoded[name]
+        if name not in self._spans:
+            raise KeyError(name)
+        data = json.loads(self._read_span(*self._spans.pop(name)))
+        layer = HouLayer.from_dict(data, columnar=self.columnar)
+        self._decoded[name] = layer
+        return layer
+
+    def __setitem__(self, name: str, layer: HouLayer) -> None:
+        self._spans.pop(name, None)
+        self._decoded[name] = layer
+        self._names[name] = None
+
+    def __delitem__(self, name: str) -> None:
+        if name not in self._names:
+            raise KeyError(name)
+        self._spans.pop(name, None)
+        self._decoded.pop(name, None)
+        del self._names[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._names))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._names
+
+    def __repr__(self) -> str:
+        return f"LazyLayers({list(self._names)}, loaded={list(self._decoded)})"
+
+
+def iter_layer(
+    file_path: str, name: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[HouRect | Hou2dMesh]:
+    """
+    Yield the rects, then the meshes, of layer ``name`` one element at a time
+    """
+    with open(file_path, "rb") as f:
+        scanner = _Scanner(f, chunk_size)
+        for key in scanner.iter_members():
+            if key != "layer":
+                scanner.skip_value()
+                continue
+            for layer_name in scanner.iter_members():
+                if layer_name != name:
+                    scanner.skip_value()
+                    continue
+                quantization = None
+                for kind in scanner.iter_members():
+                    if kind == "quantization":
+                        quantization = Quantization.from_dict(
+                            json.loads(scanner.read_value())
+                        )
+                    elif kind == "rect" and quantization is not None:
+                        # flat columns, decoded as a whole
+                        data = json.loads(scanner.read_value())
+                        yield from dequantize_rects(data, quantization)
+                    elif kind == "rect":
+                        for raw in scanner.iter_elements():
+                            yield HouRect.from_dict(json.loads(raw))
+                    elif kind == "mesh2d":
+                        for raw in scanner.iter_elements():
+                            if quantization is not None:
+                                yield dequantize_mesh(json.loads(raw), quantization)
+                            else:
+                                yield Hou2dMesh.from_dict(json.loads(raw))
+                    elif kind == "mesh2d_batch":
+                        data = json.loads(scanner.read_value())
+                        if quantization is not None:
+                            batch = dequantize_batch(data, quantization)
+                        else:
+                            batch = Hou2dMeshBatch.from_dict(data)
+                        for i in range(len(batch)):
+                            yield batch.mesh(i)
+                    else:
+                        scanner.skip_value()
+                return
+    raise KeyError(name)
@@ -0,0 +1,634 @@
+"""
+Live-reload channel pushing per-layer HouData changes to a running game.
+
+``LiveServer`` listens on a local TCP port (or a Unix socket) and every
+``publish`` sends connected clients what changed since the previous one.
+A client that connects first gets every layer in full, so it never needs a
+file export to catch up.
+
+Frames (integers little-endian)::
+
+    header   kind u8, reserved u8, name_size u16, payload_size u32
+    name     utf-8 layer name, empty for HELLO and SYNC
+    payload  depends on kind
+
+    HELLO        version u32, first frame on every connection
+    SYNC         sequence u32, ends a change set, apply everything before it at once
+    LAYER        packed layer (``hou_bevy.binary.pack_layer``), replaces the layer
+    REMOVE       no payload, the layer is gone
+    RECTS        changed u32, removed u32, added u32,
+                 changed indices u32[c], changed rects RECT[c],
+                 removed indices u32[r] (ascending), added rects RECT[a]
+    MESH_COUNT   mesh count u32, mesh2d is truncated or padded to it
+    MESH         index u32, packed layer holding only that mesh
+    BATCH        packed layer holding only the mesh2d_batch, empty when removed
+
+``RECT`` is 13 f32: size xy, translation xyz, uv 4 * xy. RECTS edits the rect
+list as the client holds it: changed rects are overwritten in place first,
+then the removed indices are deleted and the added rects appended. Rect order
+on the client may therefore differ from the export, the server tracks the
+client order.
+
+Run ``python -m hou_bevy.live [host:port]`` for a client stand-in printing
+every change set.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import queue
+import socket
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from hou_bevy.binary import pack_layer, unpack_layer
+from hou_bevy.component import HouData, HouLayer, HouRectColumns
+
+VERSION = 1
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 47920
+# change sets queued per client before a slow client is dropped
+MAX_PENDING = 64
+
+FRAME = struct.Struct("<BBHI")
+U32 = struct.Struct("<I")
+RECTS_HEADER = struct.Struct("<III")
+RECT = struct.Struct("<13f")
+RECT_FLOATS = 13
+
+HELLO = 0
+SYNC = 1
+LAYER = 2
+REMOVE = 3
+RECTS = 4
+MESH_COUNT = 5
+MESH = 6
+BATCH = 7
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+def frame(kind: int, name: str = "", payload: bytes = b"") -> bytes:
+    encoded = name.encode("utf-8")
+    return FRAME.pack(kind, 0, len(encoded), len(payload)) + encoded + payload
+
+
+def rect_columns(rects: Any) -> Any:
+    """
+    ``rects`` as columns
+    """
+    if isinstance(rects, HouRectColumns):
+        return rects
+    return HouRectColumns.from_rects(rects)
+
+
+def rect_records(rects: Any) -> List[bytes]:
+    """
+    One packed ``RECT`` per rect, used both as diff key and wire format
+    """
+    if not rects:
+        return []
+    rects = rect_columns(rects)
+    count = len(rects)
+    size = rects.size.data
+    translation = rects.translation.data
+    uv = rects.uv.data
+    records = array("f", bytes(count * RECT.size))
+    records[0::RECT_FLOATS] = array("f", size[0::2])
+    records[1::RECT_FLOATS] = array("f", size[1::2])
+    for axis in range(3):
+        records[2 + axis :: RECT_FLOATS] = array("f", translation[axis::3])
+    for component in range(8):
+        records[5 + component :: RECT_FLOATS] = array("f", uv[component::8])
+    if _BIG_ENDIAN:
+        records.byteswap()
+    data = records.tobytes()
+    return [data[i : i + RECT.size] for i in range(0, len(data), RECT.size)]
+
+
+def rects_from_records(records: List[bytes]) -> HouRectColumns:
+    values = array("f", b"".join(records))
+    if _BIG_ENDIAN:
+        values.byteswap()
+    size: List[float] = []
+    translation: List[float] = []
+    uv: List[float] = []
+    for i in range(0, len(values), RECT_FLOATS):
+        size += values[i : i + 2]
+        translation += values[i + 2 : i + 5]
+        uv += values[i + 5 : i + 13]
+    rects = HouRectColumns()
+    rects.extend_flat(size, translation, uv)
+    return rects
+
+
+@dataclass
+class RectDiff:
+    changed: List[Tuple[int, bytes]] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)
+    added: List[bytes] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.changed or self.removed or self.added)
+
+    def apply(self, records: List[bytes]) -> List[bytes]:
+        """
+        Apply to the rect list of the receiving side, in place when possible
+        """
+        for index, record in self.changed:
+            records[index] = record
+        if self.removed:
+            removed = set(self.removed)
+            records = [r for i, r in enumerate(records) if i not in removed]
+        records.extend(self.added)
+        return records
+
+    def pack(self) -> bytes:
+        u32 = "<%dI"
+        return b"".join(
+            (
+                RECTS_HEADER.pack(
+                    len(self.changed), len(self.removed), len(self.added)
+                ),
+                struct.pack(u32 % len(self.changed), *(i for i, _ in self.changed)),
+                b"".join(record for _, record in self.changed),
+                struct.pack(u32 % len(self.removed), *self.removed),
+                b"".join(self.added),
+            )
+        )
+
+    @classmethod
+    def unpack(cls, payload: bytes) -> RectDiff:
+        changed, removed, added = RECTS_HEADER.unpack_from(payload)
+        offset = RECTS_HEADER.size
+        indices = struct.unpack_from("<%dI" % changed, payload, offset)
+        offset += changed * 4
+        records = _split(payload, offset, changed)
+        offset += changed * RECT.size
+        removed_indices = list(struct.unpack_from("<%dI" % removed, payload, offset))
+        offset += removed * 4
+        return cls(
+            changed=list(zip(indices, records)),
+            removed=removed_indices,
+            added=_split(payload, offset, added),
+        )
+
+
+def _split(payload: bytes, offset: int, count: int) -> List[bytes]:
+    return [
+        payload[offset + i * RECT.size : offset + (i + 1) * RECT.size]
+        for i in range(count)
+    ]
+
+
+def diff_rects(old: List[bytes], new: List[bytes]) -> RectDiff:
+    """
+    Match rects by value, a rect that moved shows up as one changed slot
+    """
+    diff = RectDiff()
+    if old == new:
+        return diff
+    unmatched = Counter(new)
+    for index, record in enumerate(old):
+        if unmatched[record] > 0:
+            unmatched[record] -= 1
+        else:
+            diff.removed.append(index)
+    for record in new:
+        if unmatched[record] > 0:
+            unmatched[record] -= 1
+            diff.added.append(record)
+
+    # reuse removed slots for added rects
+    reused = min(len(diff.removed), len(diff.added))
+    diff.changed = list(zip(diff.removed[:reused], diff.added[:reused]))
+    diff.removed = diff.removed[reused:]
+    diff.added = diff.added[reused:]
+    return diff
+
+
+def _digest(*values: Any) -> bytes:
+    """
+    Hash of the unpacked values, arrays by their bytes, so an unchanged layer
+    is recognized without packing it
+    """
+    digest = hashlib.sha1()
+    for value in values:
+        data = getattr(value, "data", value)
+        if isinstance(data, array):
+            digest.update(data.typecode.encode() + data.tobytes())
+        else:
+            digest.update(repr(data).encode())
+    return digest.digest()
+
+
+def _rects_digest(rects: Any) -> bytes:
+    if rects is None:
+        return b""
+    rects = rect_columns(rects)
+    return _digest(rects.size, rects.translation, rects.uv)
+
+
+def _mesh_digest(mesh: Any) -> bytes:
+    return _digest(mesh.vertices, mesh.normals, mesh.indices, mesh.z, mesh.id)
+
+
+def _batch_digest(batch: Any) -> bytes:
+    if not batch:
+        return b""
+    return _digest(batch.vertices, batch.normals, batch.indices, batch.meshes)
+
+
+class _LayerState:
+    """
+    A layer as the clients hold it
+    """
+
+    def __init__(self, layer: HouLayer):
+        self.has_rect = layer.rect is not None
+        self.has_mesh2d = layer.mesh2d is not None
+        self.records = rect_records(layer.rect)
+        self.rects_digest = _rects_digest(layer.rect)
+        self.meshes = list(layer.mesh2d or [])
+        self.mesh_digests = [_mesh_digest(mesh) for mesh in self.meshes]
+        self.batch = layer.mesh2d_batch
+        self.batch_digest = _batch_digest(self.batch)
+
+    def matches_shape(self, layer: HouLayer) -> bool:
+        return (layer.rect is not None) == self.has_rect and (
+            layer.mesh2d is not None
+        ) == self.has_mesh2d
+
+    def to_layer(self) -> HouLayer:
+        layer = HouLayer.new(columnar=True)
+        if self.has_rect:
+            layer.rect = rects_from_records(self.records)
+        if self.has_mesh2d:
+            layer.mesh2d = list(self.meshes)
+        layer.mesh2d_batch = self.batch
+        return layer
+
+
+def diff_layer(name: str, state: _LayerState, layer: HouLayer) -> List[bytes]:
+    """
+    Frames bringing the clients from ``state`` to ``layer``, ``state`` is
+    updated to match
+    """
+    frames: List[bytes] = []
+    # only what changed is packed and diffed, unchanged parts are only hashed
+    rects_digest = _rects_digest(layer.rect)
+    if rects_digest != state.rects_digest:
+        rect_diff = diff_rects(state.records, rect_records(layer.rect))
+        if rect_diff:
+            frames.append(frame(RECTS, name, rect_diff.pack()))
+            state.records = rect_diff.apply(state.records)
+        state.rects_digest = rects_digest
+
+    meshes = list(layer.mesh2d or [])
+    mesh_digests = [_mesh_digest(mesh) for mesh in meshes]
+    if len(meshes) != len(state.meshes):
+        frames.append(frame(MESH_COUNT, name, U32.pack(len(meshes))))
+    for index, digest in enumerate(mesh_digests):
+        if index < len(state.mesh_digests) and state.mesh_digests[index] == digest:
+            continue
+        blob = pack_layer(HouLayer(mesh2d=[meshes[index]]))
+        frames.append(frame(MESH, name, U32.pack(index) + blob))
+    state.meshes = meshes
+    state.mesh_digests = mesh_digests
+
+    batch_digest = _batch_digest(layer.mesh2d_batch)
+    if batch_digest != state.batch_digest:
+        batch = layer.mesh2d_batch
+        blob = pack_layer(HouLayer(mesh2d_batch=batch)) if batch else b""
+        frames.append(frame(BATCH, name, blob))
+        state.batch = batch
+        state.batch_digest = batch_digest
+    return frames
+
+
+class _Client:
+    def __init__(self, server: LiveServer, connection: socket.socket, address: Any):
+        self.server = server
+        self.connection = connection
+        self.address = address
+        self.pending: queue.Queue = queue.Queue(MAX_PENDING)
+        self.thread = threading.Thread(target=self._send_loop, name="hou-live-send")
+        self.thread.daemon = True
+
+    def _send_loop(self) -> None:
+        try:
+            while True:
+                data = self.pending.get()
+                if data is None:
+                    return
+                self.connection.sendall(data)
+        except OSError:
+            pass
+        finally:
+            self.server._drop(self)
+
+    def close(self) -> None:
+        try:
+            self.pending.put_nowait(None)
+        except queue.Full:
+            pass
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.connection.close()
+
+
+class LiveServer:
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        unix_path: Optional[str] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.sequence = 0
+        self._layers: Dict[str, _LayerState] = {}
+        self._clients: List[_Client] = []
+        self._lock = threading.Lock()
+        self._socket: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Any:
+        if self._socket is None:
+            return None
+        return self._socket.getsockname()
+
+    @property
+    def client_count(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    def start(self) -> LiveServer:
+        if self.unix_path:
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            listener.bind(self.unix_path)
+        else:
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.bind((self.host, self.port))
+        listener.listen()
+        self._socket = listener
+        self._thread = threading.Thread(target=self._accept_loop, name="hou-live")
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        listener, self._socket = self._socket, None
+        if listener is not None:
+            try:
+                listener.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            listener.close()
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            client.close()
+
+    def _accept_loop(self) -> None:
+        while self._socket is not None:
+            try:
+                connection, address = self._socket.accept()
+            except OSError:
+                return
+            if connection.family != getattr(socket, "AF_UNIX", None):
+                connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client = _Client(self, connection, address)
+            with self._lock:
+                # queued under the lock, no change set can slip in between
+                client.pending.put(self._snapshot())
+                self._clients.append(client)
+            client.thread.start()
+
+    def _snapshot(self) -> bytes:
+        frames = [frame(HELLO, "", U32.pack(VERSION))]
+        for name, state in self._layers.items():
+            frames.append(frame(LAYER, name, pack_layer(state.to_layer())))
+        frames.append(frame(SYNC, "", U32.pack(self.sequence)))
+        return b"".join(frames)
+
+    def _drop(self, client: _Client) -> None:
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+        client.connection.close()
+
+    def publish(self, hou_data: HouData) -> int:
+        """
+        Send the changes since the previous publish, returns the size of the
+        change set in bytes, 0 when nothing changed
+        """
+        with self._lock:
+            frames: List[bytes] = []
+            for name in list(self._layers):
+                if name not in hou_data.layer:
+                    del self._layers[name]
+                    frames.append(frame(REMOVE, name))
+            for name, layer in hou_data.layer.items():
+                state = self._layers.get(name)
+                if state is None or not state.matches_shape(layer):
+                    self._layers[name] = _LayerState(layer)
+                    frames.append(frame(LAYER, name, pack_layer(layer)))
+                else:
+                    frames += diff_layer(name, state, layer)
+            if not frames:
+                return 0
+
+            self.sequence += 1
+            frames.append(frame(SYNC, "", U32.pack(self.sequence)))
+            data = b"".join(frames)
+            for client in list(self._clients):
+                try:
+                    client.pending.put_nowait(data)
+                except queue.Full:
+                    # a stalled client reconnects and starts from a snapshot
+                    self._clients.remove(client)
+                    client.close()
+            return len(data)
+
+
+class LiveClient:
+    """
+    Client stand-in keeping a mirror of the published layers
+    """
+
+    def __init__(self, connection: socket.socket):
+        self.connection = connection
+        self.version: Optional[int] = None
+        self.sequence = -1
+        self.records: Dict[str, List[bytes]] = {}
+        self.layers: Dict[str, HouLayer] = {}
+        self._buffer = bytearray()
+
+    @classmethod
+    def connect(
+        cls,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        unix_path: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> LiveClient:
+        if unix_path:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.settimeout(timeout)
+            connection.connect(unix_path)
+        else:
+            connection = socket.create_connection((host, port), timeout)
+        return cls(connection)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _read(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            chunk = self.connection.recv(max(65536, size - len(self._buffer)))
+            if not chunk:
+                raise ConnectionError("Live server closed the connection")
+            self._buffer += chunk
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def read_frame(self) -> Tuple[int, str, bytes]:
+        kind, _, name_size, payload_size = FRAME.unpack(self._read(FRAME.size))
+        name = self._read(name_size).decode("utf-8")
+        return kind, name, self._read(payload_size)
+
+    def receive(self, timeout: Optional[float] = None) -> List[Tuple[int, str]]:
+        """
+        Apply frames up to the next SYNC, returns ``(kind, layer name)`` of
+        every applied frame. Raises ``socket.timeout`` when none arrives.
+        """
+        self.connection.settimeout(timeout)
+        applied: List[Tuple[int, str]] = []
+        while True:
+            kind, name, payload = self.read_frame()
+            if kind == SYNC:
+                (self.sequence,) = U32.unpack(payload)
+                return applied
+            self.apply(kind, name, payload)
+            applied.append((kind, name))
+
+    def apply(self, kind: int, name: str, payload: bytes) -> None:
+        if kind == HELLO:
+            (self.version,) = U32.unpack(payload)
+            if self.version > VERSION:
+                raise ValueError(f"Unsupported live protocol version {self.version}")
+        elif kind == LAYER:
+            layer = unpack_layer(payload).to_layer(columnar=True)
+            self.layers[name] = layer
+            self.records[name] = rect_records(layer.rect)
+        elif kind == REMOVE:
+            self.layers.pop(name, None)
+            self.records.pop(name, None)
+        elif kind == RECTS:
+            records = RectDiff.unpack(payload).apply(self.records[name])
+            self.records[name] = records
+            self.layers[name].rect = rects_from_records(records)
+        elif kind == MESH_COUNT:
+            (count,) = U32.unpack(payload)
+            meshes = self.layers[name].mesh2d or []
+            meshes = meshes[:count] + [None] * (count - len(meshes))
+            self.layers[name].mesh2d = meshes
+        elif kind == MESH:
+            (index,) = U32.unpack_from(payload)
+            mesh = unpack_layer(payload[U32.size :]).meshes[0].to_mesh()
+            self.layers[name].mesh2d[index] = mesh
+        elif kind == BATCH:
+            batch = unpack_layer(payload).batch if payload else None
+            self.layers[name].mesh2d_batch = batch.to_batch() if batch else None
+        else:
+            raise ValueError(f"Unknown live frame kind {kind}")
+
+    def to_hou_data(self) -> HouData:
+        return HouData(layer=dict(self.layers), columnar=True)
+
+
+_server: Optional[LiveServer] = None
+
+
+def start_server(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    unix_path: Optional[str] = None,
+) -> LiveServer:
+    """
+    Start the session wide server, a running one is returned as is
+    """
+    global _server
+    if _server is None:
+        _server = LiveServer(host, port, unix_path).start()
+    return _server
+
+
+def stop_server() -> None:
+    global _server
+    if _server is not None:
+        _server.stop()
+        _server = None
+
+
+def get_server() -> Optional[LiveServer]:
+    return _server
+
+
+def publish(hou_data: HouData) -> int:
+    """
+    Publish to the running server, a no-op without one
+    """
+    if _server is None:
+        return 0
+    return _server.publish(hou_data)
+
+
+_KIND_NAMES = {
+    HELLO: "hello",
+    LAYER: "layer",
+    REMOVE: "remove",
+    RECTS: "rects",
+    MESH_COUNT: "mesh count",
+    MESH: "mesh",
+    BATCH: "batch",
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    host, port = DEFAULT_HOST, DEFAULT_PORT
+    if argv:
+        host, _, port_text = argv[0].rpartition(":")
+        host = host or DEFAULT_HOST
+        port = int(port_text)
+    client = LiveClient.connect(host, port)
+    try:
+        while True:
+            applied = client.receive()
+            received = time.strftime("%H:%M:%S")
+            changes = ", ".join(f"{_KIND_NAMES[k]} {name}" for k, name in applied)
+            rects = sum(len(layer.rect or ()) for layer in client.layers.values())
+            print(f"[{received}] #{client.sequence} {changes or 'no changes'}")
+            print(f"  {len(client.layers)} layers, {rects} rects")
+    except (ConnectionError, KeyboardInterrupt):
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
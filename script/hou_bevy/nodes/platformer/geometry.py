@@ -33,3 +33,14 @@ def reorder_points(
         reorded_points.append(points[i])
 
     return (reorded_points, points)
+
+
+def ray_to_plane(origin, direction, z: float = 0.0):
+    """
+    x, y where the viewport ray crosses the z plane the rects are drawn on,
+    the ray origin for rays parallel to it
+    """
+    if direction[2] == 0:
+        return origin[0], origin[1]
+    t = (z - origin[2]) / direction[2]
+    return origin[0] + direction[0] * t, origin[1] + direction[1] * t
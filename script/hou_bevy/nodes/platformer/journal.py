@@ -0,0 +1,224 @@
+"""
+Append-only edit journal for the platformer stash.
+
+Instead of freezing the whole stash and writing it back for every drawn or
+deleted rect, edits are appended to a JSON journal kept in the ``journal``
+string parm of the HDA. A Python SOP after the stash replays the journal on
+top of it::
+
+    from hou_bevy.nodes.platformer.journal import apply_journal
+    apply_journal()
+
+Ops are applied in order, prim numbers refer to the geometry as left by the
+previous op::
+
+    {"op": "add", "points": [x, y, z, ...]}     one polygon, 3 floats per point
+    {"op": "delete", "prims": [primnum, ...]}
+    {"op": "move", "prims": [primnum, ...], "offset": [dx, dy]}
+    {"op": "duplicate", "prims": [primnum, ...], "offset": [dx, dy]}
+
+``duplicate`` appends the offset copies after the last prim, in ``prims``
+order.
+
+Once the journal holds ``COMPACT_THRESHOLD`` ops, and before the hip file is
+saved, it is folded into the stash in one undo block.
+"""
+
+import json
+
+import hou
+
+JOURNAL_PARM = "journal"
+STASH_PARM = "stash"
+COMPACT_THRESHOLD = 256
+
+# paths of nodes whose journals are compacted before the hip file is saved
+_journal_nodes = set()
+
+
+def add_op(positions):
+    return {"op": "add", "points": [float(v) for p in positions for v in p]}
+
+
+def delete_op(primnums):
+    return {"op": "delete", "prims": sorted(set(primnums))}
+
+
+def move_op(primnums, offset):
+    return {
+        "op": "move",
+        "prims": sorted(set(primnums)),
+        "offset": [float(offset[0]), float(offset[1])],
+    }
+
+
+def duplicate_op(primnums, offset):
+    return {
+        "op": "duplicate",
+        "prims": sorted(set(primnums)),
+        "offset": [float(offset[0]), float(offset[1])],
+    }
+
+
+def _offset_positions(points, offset):
+    dx, dy = offset
+    positions = []
+    for point in points:
+        position = point.position()
+        positions.append((position[0] + dx, position[1] + dy, position[2]))
+    return positions
+
+
+def apply_ops(geo, ops):
+    """
+    Replay journal ``ops`` on the unfrozen geometry ``geo``
+    """
+    for op in ops:
+        kind = op["op"]
+        if kind == "add":
+            values = op["points"]
+            positions = [values[i : i + 3] for i in range(0, len(values), 3)]
+            poly = geo.createPolygon()
+            for point in geo.createPoints(positions):
+                poly.addVertex(point)
+        elif kind == "delete":
+            prims = [geo.prim(number) for number in op["prims"]]
+            geo.deletePrims(prims, keep_points=False)
+        elif kind == "move":
+            points = {}
+            for number in op["prims"]:
+                for point in geo.prim(number).points():
+                    points[point.number()] = point
+            points = list(points.values())
+            for point, position in zip(points, _offset_positions(points, op["offset"])):
+                point.setPosition(position)
+        elif kind == "duplicate":
+            sources = [geo.prim(number).points() for number in op["prims"]]
+            for points in sources:
+                poly = geo.createPolygon()
+                for point in geo.createPoints(_offset_positions(points, op["offset"])):
+                    poly.addVertex(point)
+        else:
+            raise ValueError(f"Unknown journal op '{kind}'")
+
+
+def parse_journal(text):
+    if not text:
+        return []
+    return json.loads(text)
+
+
+def apply_journal(node=None):
+    """
+    Python SOP callback, ``node`` defaults to the cooking SOP whose parent
+    HDA holds the journal
+    """
+    node = node or hou.pwd()
+    parm = node.parent().parm(JOURNAL_PARM)
+    if parm is None:
+        return
+    apply_ops(node.geometry(), parse_journal(parm.eval()))
+
+
+class Journal:
+    def __init__(self, node, stash_node):
+        self.node = node
+        self.stash_node = stash_node
+        self._text = None
+        self._ops = []
+
+    @staticmethod
+    def supported(node):
+        """
+        Older HDA versions have no journal parm, edits then rewrite the stash
+        """
+        return node.parm(JOURNAL_PARM) is not None
+
+    def sync(self):
+        """
+        Reload the journal if the parm was changed behind our back, e.g. by
+        an undo. Returns True when it was.
+        """
+        text = self.node.parm(JOURNAL_PARM).eval()
+        if text == self._text:
+            return False
+        changed = self._text is not None
+        self._text = text
+        self._ops = parse_journal(text)
+        return changed
+
+    def ops(self):
+        self.sync()
+        return self._ops
+
+    def append(self, *ops):
+        """
+        Record ``ops``, compacting the journal once it gets long. Appends to
+        the ops of the last ``sync``, which the state runs on every event.
+        """
+        journal = self._ops + list(ops)
+        if len(journal) >= COMPACT_THRESHOLD:
+            self._write(journal, compact=True)
+        else:
+            self._write(journal)
+
+    def compact(self):
+        """
+        Fold the journal into the stash
+        """
+        journal = self.ops()
+        if journal:
+            self._write(journal, compact=True)
+
+    def _write(self, journal, compact=False):
+        parm = self.node.parm(JOURNAL_PARM)
+        if not compact:
+            self._text = json.dumps(journal, separators=(",", ":"))
+            self._ops = journal
+            parm.set(self._text)
+            return
+
+        geo = self.stash_node.geometry().freeze()
+        apply_ops(geo, journal)
+        with hou.undos.group("Compact rect journal"):
+            self.node.parm(STASH_PARM).set(geo)
+            parm.set("")
+        self._text = ""
+        self._ops = []
+
+
+def track(node):
+    """
+    Compact the journal of ``node`` before the hip file is saved
+    """
+    path = node.path()
+    if path not in _journal_nodes:
+        _journal_nodes.add(path)
+        install_save_hook()
+
+
+def compact_all():
+    for path in list(_journal_nodes):
+        node = hou.node(path)
+        if node is None or not Journal.supported(node):
+            _journal_nodes.discard(path)
+            continue
+        stash_node = node.node("stash")
+        if stash_node is not None:
+            Journal(node, stash_node).compact()
+
+
+def _on_hip_event(event_type):
+    if event_type == hou.hipFileEventType.BeforeSave:
+        compact_all()
+
+
+def install_save_hook():
+    """
+    Compact every known journal before the hip file is saved
+    """
+    for callback in hou.hipFile.eventCallbacks():
+        if getattr(callback, "__name__", "") == _on_hip_event.__name__:
+            # replace callbacks left by a module reload
+            hou.hipFile.removeEventCallback(callback)
+    hou.hipFile.addEventCallback(_on_hip_event)
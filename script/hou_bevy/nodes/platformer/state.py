@@ -3,9 +3,12 @@ from winreg import KEY_READ
 import hou
 import viewerstate.utils as su
 from hou import Vector3
+from hou_bevy import live
+from hou_bevy.nodes.platformer import journal
 from hou_bevy.nodes.platformer.geometry import reorder_points
 from hou_bevy.nodes.platformer.tools.rect.rect_draw import DrawRect
 from hou_bevy.nodes.platformer.tools.rect.rect_edit import EditRect
+from hou_bevy.nodes.rop.export import build_hou_data
 
 
 class State(object):
@@ -15,8 +18,13 @@ class State(object):
         self.__dict__.update(kwargs)
         self.node = None
         self.stash = None
+        self.journal = None
+        # stash geometry counter after our last edit, HDAs without a journal
+        self.stash_version = None
         self.geometry = None
         self.pressed = False
+        # a live publish is queued, see publish_live
+        self.publish_posted = False
 
         self.active_tool: str | None = None
 
@@ -39,11 +47,116 @@ class State(object):
         self.stash = self.node.node("stash")
         self.mode = self.node.parm("mode").eval()
 
+        if journal.Journal.supported(self.node):
+            self.journal = journal.Journal(self.node, self.stash)
+            self.journal.sync()
+            journal.track(self.node)
+        else:
+            self.stash_version = self._stash_version()
+
         self.tool_draw_rect = DrawRect(self)
         self.tool_edit_rect = EditRect(self)
 
         self.text.show(True)
 
+    def edit(self, label, ops):
+        """
+        Apply journal ``ops`` as one undo block and one journal or stash write
+        """
+        with hou.undos.group(label):
+            if self.journal:
+                self.journal.append(*ops)
+            else:
+                geo = self.stash.geometry().freeze()
+                journal.apply_ops(geo, ops)
+                self.node.parm("stash").set(geo)
+                self.stash_version = self._stash_version()
+
+    def sync_edits(self):
+        """
+        Pick up an undo/redo of an edit, run before every event that may
+        edit, journal appends build on the ops synced here
+        """
+        changed = self.journal.sync() if self.journal else self.sync_stash()
+        if changed:
+            # the tools rebuild their indices
+            self.on_stash_changed()
+
+    def _stash_version(self):
+        geometry = self.stash.geometry()
+        return geometry.modificationCounter() if geometry else None
+
+    def sync_stash(self):
+        """
+        Without a journal an undo only shows in the stash geometry. Returns
+        True when it changed since our last edit.
+        """
+        version = self._stash_version()
+        changed = version != self.stash_version
+        self.stash_version = version
+        return changed
+
+    def add_rect(self, positions):
+        """
+        Add one polygon, through the journal when the HDA has one
+        """
+        self.edit("Add rect", [journal.add_op(positions)])
+
+        if self.tool_draw_rect:
+            self.tool_draw_rect.on_rect_added(positions)
+        if self.tool_edit_rect:
+            self.tool_edit_rect.on_rect_added()
+        self.publish_live()
+
+    def delete_prims(self, primnums):
+        if primnums:
+            self.edit("Delete rects", [journal.delete_op(primnums)])
+            self.on_stash_changed(rebuild=False)
+
+    def move_prims(self, primnums, offset):
+        if primnums:
+            self.edit("Move rects", [journal.move_op(primnums, offset)])
+            self.on_stash_changed(rebuild=False)
+
+    def duplicate_prims(self, primnums, offset):
+        if primnums:
+            self.edit("Duplicate rects", [journal.duplicate_op(primnums, offset)])
+            self.on_stash_changed(rebuild=False)
+
+    def on_stash_changed(self, rebuild=True):
+        """
+        ``rebuild`` is False for the edit tool's own bulk ops, it applies
+        them to its BVH itself. Anything else, e.g. an undo, rebuilds it.
+        """
+        if self.tool_draw_rect:
+            self.tool_draw_rect.invalidate_snap_index()
+        if rebuild and self.tool_edit_rect:
+            self.tool_edit_rect.on_stash_changed()
+        self.publish_live()
+
+    def publish_live(self):
+        """
+        Push the changed layers to live clients, see ``hou_bevy.live``. A
+        publish reads the whole geometry, edits in a row are published once
+        when the UI is idle again.
+        """
+        if live.get_server() is None or self.publish_posted:
+            return
+        self.publish_posted = True
+        hou.ui.postEventCallback(self.process_pending_publish)
+
+    def process_pending_publish(self):
+        self.publish_posted = False
+        if live.get_server() is None:
+            return
+        try:
+            hou_data = build_hou_data(self.node.geometry())
+        except (hou.Error, ValueError) as e:
+            # output without the name/type attributes the ROP expects
+            self.scene_viewer.setPromptMessage(f"Live reload skipped: {e}")
+            return
+        live.publish(hou_data)
+
     def start(self):
         if not self.pressed:
             self.scene_viewer.beginStateUndo("Add point")
@@ -56,6 +169,10 @@ class State(object):
             self.scene_viewer.endStateUndo()
         self.pressed = False
 
+    def onExit(self, kwargs):
+        # a move posted by the draw tool may still be queued
+        self.hide_preview()
+
     def onInterrupt(self, kwargs):
         self.finish()
         if self.mode == 1:
@@ -63,6 +180,8 @@ class State(object):
                 self.tool_edit_rect.onInterrupt()
 
     def onResume(self, kwargs):
+        # the geometry may have been edited while the state was interrupted
+        self.on_stash_changed()
         self.scene_viewer.setPromptMessage(State.MSG)
         if self.mode == 1:
             if self.tool_edit_rect:
@@ -71,12 +190,20 @@ class State(object):
     def onMouseEvent(self, kwargs):
         ui_event = kwargs["ui_event"]
         self.mode = self.node.parm("mode").eval()
+        self.sync_edits()
         if self.mode == 0 and self.tool_draw_rect and self.tool_edit_rect:
             self.tool_draw_rect.on_draw_rect(ui_event)
             self.tool_edit_rect.onRemoveSelectedPrim()
+            self.tool_edit_rect.set_hovered(None)
         elif self.mode == 1 and self.tool_edit_rect:
             self.tool_edit_rect.onEditRect(ui_event)
-            self.poly_guide.show(False)
+            self.hide_preview()
+        else:
+            self.hide_preview()
+
+    def hide_preview(self):
+        if self.tool_draw_rect:
+            self.tool_draw_rect.hide_preview()
         else:
             self.poly_guide.show(False)
 
@@ -98,6 +225,8 @@ class State(object):
         if self.tool_edit_rect:
             self.tool_edit_rect.selected_guide.draw(handle)
             self.tool_edit_rect.selected_edge.draw(handle)
+            self.tool_edit_rect.hover_guide.draw(handle)
+            self.tool_edit_rect.marquee_guide.draw(handle)
 
     # def onKeyTransitEvent(self, kwargs):
     #     ui_event = kwargs["ui_event"]
@@ -111,7 +240,15 @@ class State(object):
         ui_event = kwargs["ui_event"]
         key_pressed = ui_event.device().keyString()
 
+        if self.mode != 1 or not self.tool_edit_rect:
+            return False
+        self.sync_edits()
+
         # Ctrl+d > Delete key value
         if key_pressed == "Ctrl+d":
-            if self.mode == 1 and self.tool_edit_rect:
-                self.tool_edit_rect.onDeleteRect()
+            self.tool_edit_rect.onDeleteRect()
+            return True
+        if key_pressed == "Alt+d":
+            self.tool_edit_rect.onDuplicateRect()
+            return True
+        return False
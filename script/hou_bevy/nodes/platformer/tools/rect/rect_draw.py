@@ -2,6 +2,10 @@
 import hou
 import hou_bevy.nodes.platformer.geometry as platformer_geom
 from hou import Vector3
+from hou_bevy.spatial import SnapGrid
+
+# snap to existing points closer than this to the cursor
+SNAP_RADIUS = 5.0
 
 
 class DrawRect:
@@ -22,6 +26,17 @@ class DrawRect:
         self.first_axis = None
         self.click_count = 0
 
+        # snap candidates, rebuilt lazily after the stash changed
+        self.snap_grid = None
+        self.snap_positions = []
+
+        # rubber band preview, reused for every event
+        self.preview_geo = hou.Geometry()
+        self.preview_point_count = 0
+        self.preview_key = None
+        self.pending_move = None
+        self.move_posted = False
+
         self.guides()
 
     def guides(self):
@@ -70,26 +85,45 @@ class DrawRect:
         self.fourth_point = None
         self.click_count = 0
 
-    def on_draw_rect(self, ui_event):
-        """
-        Handle rectangle drawing logic.
+    def invalidate_snap_index(self):
+        self.snap_grid = None
 
-        Args:
-            ui_event: The Houdini UI event
+    def on_rect_added(self, positions):
         """
-        device = ui_event.device()
-        origin, direction = ui_event.ray()
-        x, y, z = origin[0], origin[1], 0
-        c = hou.Vector3(x, y, 0)
-
-        # Get geometry from stash (accessed through state instance)
-        stash_geo = self.state.node.geometry()
-        nearest = stash_geo.nearestPoints(c, 2, max_radius=5)
+        Add the corners of a new rect without rebuilding the snap index
+        """
+        if self.snap_grid is None:
+            return
+        for position in positions:
+            self.snap_grid.add(position[0], position[1])
+            self.snap_positions.extend((position[0], position[1], position[2]))
+
+    def snap_index(self):
+        if self.snap_grid is None:
+            geo = self.state.node.geometry()
+            self.snap_positions = list(geo.pointFloatAttribValues("P")) if geo else []
+            self.snap_grid = SnapGrid.from_positions(
+                self.snap_positions, 3, SNAP_RADIUS
+            )
+        return self.snap_grid
+
+    def snap(self, x, y):
+        """
+        Position of the closest existing point within SNAP_RADIUS, or None
+        """
+        index = self.snap_index().nearest(x, y, SNAP_RADIUS)
+        if index is None:
+            return None
+        return hou.Vector3(self.snap_positions[index * 3 : index * 3 + 3])
 
+    def cursor_position(self, x, y):
+        """
+        Cursor constrained to the axis of the rect being drawn and snapped to
+        existing points
+        """
+        z = 0
         cursor_pos = hou.Vector3(x, y, z)
-        snap_pos = None
-        if nearest:
-            snap_pos = nearest[0].position()
+        snap_pos = self.snap(x, y)
 
         # Handle different click states
         if self.click_count == 0:
@@ -129,63 +163,105 @@ class DrawRect:
 
             cursor_pos = hou.Vector3(x, y, z)
 
-        reason = ui_event.reason()
-
-        # Update drawable geometry
-        poly_geo = hou.Geometry()
-        cursor_point = poly_geo.createPoint()
-        cursor_point.setPosition(cursor_pos)
-
-        self.state.poly_guide.setGeometry(poly_geo)
-
-        # Handle mouse clicks
-        if device.isLeftButton():
-            if reason == hou.uiEventReason.Picked:
-                if self.first_point is None:
-                    self.first_point = cursor_pos
-                elif self.second_point is None:
-                    self.second_point = cursor_pos
-                elif self.third_point is None:
-                    self.third_point = cursor_pos
-
-                self.click_count += 1
-                if self.click_count > 2:
-                    self.create_rect_geo()
-                    self.reset()
-
-        # Draw rectangle preview
-        if self.first_point:
-            static_point_1 = poly_geo.createPoint()
-            static_point_1.setPosition(self.first_point)
-
-            if not self.second_point:
-                poly = poly_geo.createPolygon()
-                poly.addVertex(static_point_1)
-                poly.addVertex(cursor_point)
-            else:
-                # Add second point
-                static_point_2 = poly_geo.createPoint()
-                static_point_2.setPosition(self.second_point)
+        return cursor_pos
 
-                # Calculate fourth point
-                if self.first_axis == "Y":
-                    x4 = cursor_pos[0]
-                    y4 = self.first_point[1]
-                else:
-                    x4 = self.first_point[0]
-                    y4 = cursor_pos[1]
+    def fourth_point_for(self, cursor_pos):
+        if self.first_axis == "Y":
+            return hou.Vector3(cursor_pos[0], self.first_point[1], 0)
+        return hou.Vector3(self.first_point[0], cursor_pos[1], 0)
 
-                self.fourth_point = hou.Vector3(x4, y4, 0)
-                static_point_4 = poly_geo.createPoint()
-                static_point_4.setPosition(self.fourth_point)
+    def on_draw_rect(self, ui_event):
+        """
+        Handle rectangle drawing logic.
 
-                # Create rectangle polygon
-                poly = poly_geo.createPolygon()
-                poly.addVertex(static_point_1)
-                poly.addVertex(static_point_2)
-                poly.addVertex(cursor_point)
-                poly.addVertex(static_point_4)
+        Clicks are handled right away. Moves are coalesced: only the latest
+        one is processed once the UI event loop gets to it.
 
+        Args:
+            ui_event: The Houdini UI event
+        """
+        device = ui_event.device()
+        origin, direction = ui_event.ray()
+        x, y = origin[0], origin[1]
+
+        if device.isLeftButton() and ui_event.reason() == hou.uiEventReason.Picked:
+            # a pending move is superseded by the click
+            self.pending_move = None
+            cursor_pos = self.cursor_position(x, y)
+            self.on_click(cursor_pos)
+            self.update_preview(cursor_pos)
+            return
+
+        self.pending_move = (x, y)
+        if not self.move_posted:
+            self.move_posted = True
+            hou.ui.postEventCallback(self.process_pending_move)
+
+    def process_pending_move(self):
+        self.move_posted = False
+        move, self.pending_move = self.pending_move, None
+        # posted while drawing, the state may have left draw mode since
+        if move is not None and self.state.mode == 0:
+            self.update_preview(self.cursor_position(*move))
+
+    def hide_preview(self):
+        """
+        Hide the rubber band and drop a pending move, the next event draws it
+        again even when the cursor did not move
+        """
+        self.pending_move = None
+        self.preview_key = None
+        self.state.poly_guide.show(False)
+
+    def on_click(self, cursor_pos):
+        if self.first_point is None:
+            self.first_point = cursor_pos
+        elif self.second_point is None:
+            self.second_point = cursor_pos
+        elif self.third_point is None:
+            self.third_point = cursor_pos
+            self.fourth_point = self.fourth_point_for(cursor_pos)
+
+        self.click_count += 1
+        if self.click_count > 2:
+            self.create_rect_geo()
+            self.reset()
+
+    def update_preview(self, cursor_pos):
+        """
+        Move the rubber band to ``cursor_pos``, skipped when neither the
+        snapped cursor nor the click state changed
+        """
+        key = (self.click_count, tuple(cursor_pos))
+        if key == self.preview_key:
+            return
+        self.preview_key = key
+
+        if self.first_point is None:
+            positions = [cursor_pos]
+        elif self.second_point is None:
+            positions = [self.first_point, cursor_pos]
+        else:
+            self.fourth_point = self.fourth_point_for(cursor_pos)
+            positions = [self.first_point, self.second_point, cursor_pos]
+            positions.append(self.fourth_point)
+
+        geo = self.preview_geo
+        if len(positions) != self.preview_point_count:
+            # topology only changes on clicks
+            geo.clear()
+            points = geo.createPoints(positions)
+            if len(points) > 1:
+                poly = geo.createPolygon()
+                for point in points:
+                    poly.addVertex(point)
+            self.preview_point_count = len(positions)
+        else:
+            geo.setPointFloatAttribValues(
+                "P", [value for position in positions for value in position]
+            )
+
+        self.state.poly_guide.setGeometry(geo)
         self.state.poly_guide.show(True)
 
     def create_rect_geo(self):
@@ -197,15 +273,4 @@ class DrawRect:
             self.first_axis,
         )
 
-        # Access node through state instance
-        geo = self.state.stash.geometry().freeze()
-
-        points = geo.createPoints(reordered_points)
-        poly = geo.createPolygon()
-        poly.addVertex(points[0])
-        poly.addVertex(points[1])
-        poly.addVertex(points[2])
-        poly.addVertex(points[3])
-
-        # Set geometry using state's node reference
-        self.state.node.parm("stash").set(geo)
+        self.state.add_rect(reordered_points)
@@ -1,17 +1,150 @@
 # rect_tool.py
+import math
+
 import hou
 import hou_bevy.nodes.platformer.geometry as platformer_geom
 from hou import Vector3
+from hou_bevy.spatial import RectBVH, point_in_polygon
+
+# offset of the copies made by Alt+d
+DUPLICATE_OFFSET = (1.0, 1.0)
+# min distance between two lasso points
+LASSO_SPACING = 0.25
+
+
+def _polygon_geometry(positions):
+    """
+    Closed polygon through ``positions``
+    """
+    geo = hou.Geometry()
+    poly = geo.createPolygon()
+    for point in geo.createPoints(positions):
+        poly.addVertex(point)
+    return geo
+
+
+def _rect_geometry():
+    """
+    Closed quad whose corners are moved with ``_set_rect``
+    """
+    return _polygon_geometry([(0.0, 0.0, 0.0)] * 4)
+
+
+def _set_rect(geo, rect):
+    min_x, min_y, max_x, max_y = rect
+    geo.setPointFloatAttribValues(
+        "P",
+        (min_x, min_y, 0.0, max_x, min_y, 0.0, max_x, max_y, 0.0, min_x, max_y, 0.0),
+    )
+
+
+def _rect_positions(rects):
+    positions = []
+    for min_x, min_y, max_x, max_y in rects:
+        positions += (
+            (min_x, min_y, 0.0),
+            (max_x, min_y, 0.0),
+            (max_x, max_y, 0.0),
+            (min_x, max_y, 0.0),
+        )
+    return positions
+
+
+def _rects_geometry(rects):
+    """
+    One closed quad per rect
+    """
+    geo = hou.Geometry()
+    points = geo.createPoints(_rect_positions(rects))
+    geo.createPolygons([points[i : i + 4] for i in range(0, len(points), 4)])
+    return geo
+
+
+def _prim_bounds(prim):
+    box = prim.boundingBox()
+    lo = box.minvec()
+    hi = box.maxvec()
+    return lo[0], lo[1], hi[0], hi[1]
+
+
+def _quad_layout(geometry, prim_count):
+    """
+    Every prim a quad on its own four points, numbered in prim order, as the
+    journal ops build the stash. Checked on the counts and the first and
+    last prim.
+    """
+    if geometry.intrinsicValue("pointcount") != prim_count * 4:
+        return False
+    if geometry.intrinsicValue("vertexcount") != prim_count * 4:
+        return False
+    for number in (0, prim_count - 1):
+        points = [point.number() for point in geometry.prim(number).points()]
+        if points != list(range(number * 4, number * 4 + 4)):
+            return False
+    return True
+
+
+def _geometry_bounds(geometry):
+    """
+    Flat bounds of every prim, from one bulk read of P when the stash has the
+    quad layout, otherwise from one bounding box per prim
+    """
+    if geometry is None:
+        return []
+    prim_count = geometry.intrinsicValue("primitivecount")
+    if not prim_count:
+        return []
+    if not _quad_layout(geometry, prim_count):
+        bounds = []
+        for prim in geometry.prims():
+            bounds += _prim_bounds(prim)
+        return bounds
+
+    positions = geometry.pointFloatAttribValues("P")
+    xs = [positions[corner * 3 :: 12] for corner in range(4)]
+    ys = [positions[corner * 3 + 1 :: 12] for corner in range(4)]
+    bounds = [0.0] * (prim_count * 4)
+    bounds[0::4] = list(map(min, *xs))
+    bounds[1::4] = list(map(min, *ys))
+    bounds[2::4] = list(map(max, *xs))
+    bounds[3::4] = list(map(max, *ys))
+    return bounds
 
 
 class EditRect:
-    MSG = "Move the mouse over the geometry."
+    MSG = (
+        "Click or drag a box to select rects, Ctrl drags a lasso and Shift adds "
+        "to the selection. Drag the selection to move it, Ctrl+D deletes and "
+        "Alt+D duplicates it."
+    )
 
     def __init__(self, state_instance):
         self.state = state_instance
 
         ## mesh data
-        self.selected_prim = None
+        # ids into pick_index, prim numbers are pick_index.rank(id)
+        self.selection = set()
+        self.hovered_prim = None
+
+        # 2D BVH over the prim bounds, synced lazily after the stash changed:
+        # rebuilt when dirty, or only extended by the prims the draw tool
+        # appended
+        self.pick_index = None
+        self.pick_index_dirty = True
+        self.pick_index_appended = False
+
+        # mouse drag in progress: None, "move", "box" or "lasso"
+        self.drag = None
+        self.drag_start = None
+        self.drag_additive = False
+        self.lasso = []
+
+        # highlight geometry, the selection is rebuilt when it changes and
+        # offset in place while it is dragged
+        self.selected_geo = _rects_geometry([])
+        self.selected_positions = []
+        self.hover_geo = _rect_geometry()
+        self.marquee_geo = _rect_geometry()
 
         face = hou.GeometryDrawable(
             self.state.scene_viewer,
@@ -64,8 +197,34 @@ class EditRect:
         self.selected_edge.addDrawable(selected_line)
         self.selected_edge.addDrawable(point)
 
+        hover_line = hou.GeometryDrawable(
+            self.state.scene_viewer,
+            hou.drawableGeometryType.Line,
+            "line",
+            params={
+                "color1": (0.9, 0.9, 0.9, 1.0),
+                "style": hou.drawableGeometryLineStyle.Plain,
+                "line_width": 2,
+            },
+        )
+        self.hover_guide = hou.GeometryDrawableGroup("hover_guide")
+        self.hover_guide.addDrawable(hover_line)
+
+        marquee_line = hou.GeometryDrawable(
+            self.state.scene_viewer,
+            hou.drawableGeometryType.Line,
+            "line",
+            params={
+                "color1": (1.0, 1.0, 1.0, 1.0),
+                "style": hou.drawableGeometryLineStyle.Plain,
+                "line_width": 1,
+            },
+        )
+        self.marquee_guide = hou.GeometryDrawableGroup("marquee_guide")
+        self.marquee_guide.addDrawable(marquee_line)
+
     def show(self, visible):
-        self.selected_guide.show(visible)
+        self.selected_guide.show(visible and bool(self.selection))
 
     def onResume(self, kwargs):
         self.show(True)
@@ -75,57 +234,247 @@ class EditRect:
     def onInterrupt(self):
         self.show(False)
         self.selected_edge.show(False)
+        self.set_hovered(None)
+        self.cancel_drag()
+
+    def on_stash_changed(self):
+        """
+        The stash changed in a way the BVH knows nothing about, e.g. an undo,
+        rebuild it on the next sync
+        """
+        self.pick_index_dirty = True
+
+    def on_rect_added(self):
+        """
+        The draw tool appended prims, the next sync only adds those
+        """
+        self.pick_index_appended = True
+
+    def sync_pick_index(self):
+        """
+        Bring the BVH up to date with the node geometry. Prims appended by
+        the draw tool are added incrementally, anything else rebuilds it.
+        """
+        bvh = self.pick_index
+        if bvh is not None and not (self.pick_index_dirty or self.pick_index_appended):
+            return bvh
+        appended = self.pick_index_appended and not self.pick_index_dirty
+        self.pick_index_dirty = False
+        self.pick_index_appended = False
+
+        geometry = self.state.node.geometry()
+        prim_count = geometry.intrinsicValue("primitivecount") if geometry else 0
+        if (
+            appended
+            and bvh is not None
+            and 0 <= prim_count - len(bvh) <= RectBVH.TAIL_SIZE
+        ):
+            for number in range(len(bvh), prim_count):
+                bvh.append(*_prim_bounds(geometry.prim(number)))
+            return bvh
+
+        self.pick_index = RectBVH(_geometry_bounds(geometry))
+        self.cancel_drag()
+        self.onRemoveSelectedPrim()
+        self.set_hovered(None)
+        return self.pick_index
+
+    def set_hovered(self, prim_id):
+        if prim_id == self.hovered_prim:
+            return
+        self.hovered_prim = prim_id
+        if prim_id is None or prim_id in self.selection:
+            self.hover_guide.show(False)
+            return
+        _set_rect(self.hover_geo, self.pick_index.rect(prim_id))
+        self.hover_guide.setGeometry(self.hover_geo)
+        self.hover_guide.show(True)
+
+    def set_selection(self, prim_ids):
+        prim_ids = set(prim_ids)
+        if prim_ids != self.selection:
+            self.selection = prim_ids
+            self.refresh_selection()
+        if self.hovered_prim in self.selection:
+            self.hover_guide.show(False)
+        self.show(True)
+
+    def refresh_selection(self):
+        """
+        Rebuild the selection highlight from the BVH bounds
+        """
+        rects = [self.pick_index.rect(prim_id) for prim_id in sorted(self.selection)]
+        positions = _rect_positions(rects)
+        self.selected_positions = [value for p in positions for value in p]
+        self.selected_geo = _rects_geometry(rects)
+        self.selected_guide.setGeometry(self.selected_geo)
+
+    def select(self, prim_id, toggle=False):
+        if toggle:
+            self.set_selection(self.selection ^ {prim_id})
+        else:
+            self.set_selection((prim_id,))
+
+    def selected_primnums(self):
+        bvh = self.pick_index
+        return [bvh.rank(prim_id) for prim_id in sorted(self.selection)]
 
     def onDeleteRect(self):
-        if self.selected_prim and self.poly_geo:
-            geo = self.state.stash.geometry().freeze()
-            geo.deletePrims([self.selected_prim], keep_points=False)
-            self.state.node.parm("stash").set(geo)
-            self.onRemoveSelectedPrim()
+        if not self.selection:
+            return
+        self.state.delete_prims(self.selected_primnums())
+
+        # keep the BVH in step, the stash change then needs no rebuild
+        for prim_id in self.selection:
+            self.pick_index.remove(prim_id)
+        if self.hovered_prim in self.selection:
+            self.set_hovered(None)
+        self.onRemoveSelectedPrim()
+
+    def onDuplicateRect(self):
+        """
+        Copy the selection by ``DUPLICATE_OFFSET`` and select the copies
+        """
+        if not self.selection:
+            return
+        primnums = self.selected_primnums()
+        dx, dy = DUPLICATE_OFFSET
+        bounds = []
+        for prim_id in sorted(self.selection):
+            min_x, min_y, max_x, max_y = self.pick_index.rect(prim_id)
+            bounds += (min_x + dx, min_y + dy, max_x + dx, max_y + dy)
+
+        self.state.duplicate_prims(primnums, DUPLICATE_OFFSET)
+        # the copies are appended in prim order, as the journal op does
+        self.set_selection(self.pick_index.extend(bounds))
+
+    def move_selection(self, dx, dy):
+        if not self.selection or (dx == 0.0 and dy == 0.0):
+            self.preview_move(0.0, 0.0)
+            return
+        self.state.move_prims(self.selected_primnums(), (dx, dy))
+        self.pick_index.move(self.selection, dx, dy)
+        self.refresh_selection()
 
     def onRemoveSelectedPrim(self):
-        self.selected_prim = None
-        self.poly_geo = None
-        # self.selected_guide.setGeometry(self.poly_geo)
+        if self.selection:
+            self.selection = set()
+            self.selected_positions = []
         self.selected_guide.show(False)
 
+    def preview_move(self, dx, dy):
+        values = list(self.selected_positions)
+        values[0::3] = [value + dx for value in values[0::3]]
+        values[1::3] = [value + dy for value in values[1::3]]
+        self.selected_geo.setPointFloatAttribValues("P", values)
+        self.selected_guide.setGeometry(self.selected_geo)
+
+    def begin_drag(self, x, y, device):
+        """
+        A drag starting on a rect moves the selection, anywhere else or with
+        a modifier it selects with a box, or a lasso with Ctrl
+        """
+        self.drag_start = (x, y)
+        self.drag_additive = device.isShiftKey()
+        picked = self.pick_index.pick(x, y)
+        if picked is not None and not self.drag_additive and not device.isCtrlKey():
+            if picked not in self.selection:
+                self.select(picked)
+            self.drag = "move"
+        else:
+            self.drag = "lasso" if device.isCtrlKey() else "box"
+            self.lasso = [(x, y)]
+        self.set_hovered(None)
+
+    def update_drag(self, x, y):
+        start_x, start_y = self.drag_start
+        if self.drag == "move":
+            self.preview_move(x - start_x, y - start_y)
+            return
+
+        if self.drag == "box":
+            _set_rect(
+                self.marquee_geo,
+                (min(start_x, x), min(start_y, y), max(start_x, x), max(start_y, y)),
+            )
+            self.marquee_guide.setGeometry(self.marquee_geo)
+        else:
+            last_x, last_y = self.lasso[-1]
+            if math.hypot(x - last_x, y - last_y) < LASSO_SPACING:
+                return
+            self.lasso.append((x, y))
+            self.marquee_guide.setGeometry(
+                _polygon_geometry([(px, py, 0.0) for px, py in self.lasso])
+            )
+        self.marquee_guide.show(True)
+
+    def finish_drag(self, x, y):
+        drag = self.drag
+        lasso = self.lasso
+        start_x, start_y = self.drag_start
+        self.cancel_drag()
+        if (x, y) == (start_x, start_y):
+            self.click(x, y, self.drag_additive)
+            return
+
+        if drag == "move":
+            self.move_selection(x - start_x, y - start_y)
+            return
+
+        bvh = self.pick_index
+        if drag == "box":
+            prim_ids = bvh.query_aabb(
+                min(start_x, x), min(start_y, y), max(start_x, x), max(start_y, y)
+            )
+        else:
+            # rects whose center is inside the lasso
+            polygon = lasso + [(x, y)]
+            xs = [px for px, _ in polygon]
+            ys = [py for _, py in polygon]
+            prim_ids = []
+            for prim_id in bvh.query_aabb(min(xs), min(ys), max(xs), max(ys)):
+                min_x, min_y, max_x, max_y = bvh.rect(prim_id)
+                center_x = (min_x + max_x) * 0.5
+                center_y = (min_y + max_y) * 0.5
+                if point_in_polygon(center_x, center_y, polygon):
+                    prim_ids.append(prim_id)
+
+        if self.drag_additive:
+            prim_ids = self.selection.union(prim_ids)
+        self.set_selection(prim_ids)
+
+    def cancel_drag(self):
+        self.drag = None
+        self.lasso = []
+        self.marquee_guide.show(False)
+
+    def click(self, x, y, toggle=False):
+        picked = self.pick_index.pick(x, y)
+        if picked is not None:
+            self.select(picked, toggle)
+        elif not toggle:
+            self.onRemoveSelectedPrim()
+
     def onEditRect(self, ui_event):
         device = ui_event.device()
+        reason = ui_event.reason()
         origin, direction = ui_event.ray()
-        min_dist = float("inf")
+        x, y = platformer_geom.ray_to_plane(origin, direction)
+        self.sync_pick_index()
 
-        geometry = self.state.node.geometry()
-        position = hou.Vector3()
-        normal = hou.Vector3()
-        uvw = hou.Vector3()
-        intersected = geometry.intersect(origin, direction, position, normal, uvw)
-
-        # PRIM SELECTION
-        if intersected != -1:
-            prim = geometry.prim(intersected)
-            primnum = prim.number()
-
-            # on click
-            if device.isLeftButton():
-                self.selected_prim = prim
-                # print(self.selected_prim)
-                # print(self.selected_prim.number())
-
-                ## hightlight face
-                poly_points = geometry.prim(primnum).points()
-                self.poly_geo = hou.Geometry()
-                poly = self.poly_geo.createPolygon()
-                for pt in poly_points:
-                    point = self.poly_geo.createPoint()
-                    point.setPosition(pt.position())
-                    poly.addVertex(point)
-
-                # update the drawable
-                self.selected_guide.setGeometry(self.poly_geo)
-                self.show(True)
-        else:
-            if device.isLeftButton():
-                self.onRemoveSelectedPrim()
+        if reason == hou.uiEventReason.Start and device.isLeftButton():
+            self.begin_drag(x, y, device)
+        elif reason == hou.uiEventReason.Active and self.drag:
+            self.update_drag(x, y)
+        elif reason == hou.uiEventReason.Changed and self.drag:
+            self.finish_drag(x, y)
+        elif reason == hou.uiEventReason.Picked and device.isLeftButton():
+            self.cancel_drag()
+            self.click(x, y, device.isShiftKey())
+
+        # PRIM HOVER, the edits above may have changed the stash
+        if self.drag is None:
+            self.set_hovered(self.sync_pick_index().pick(x, y))
 
         # EDGE SELECTION
         # if self.selected_prim and self.poly_geo:
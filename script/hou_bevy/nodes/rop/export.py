@@ -1,70 +1,256 @@
 import json
-from importlib import reload
 from pathlib import Path
 
 import hou
-import hou_bevy.component
+from hou_bevy.binary import BINARY_EXTENSION
+from hou_bevy.chunks import export_chunks
+from hou_bevy.compressed import COMPRESSED_EXTENSION
+from hou_bevy import stats
+from hou_bevy.component import Hou2dMesh, HouData, HouRectColumns, Vec2, Vec3
+from hou_bevy.incremental import export_incremental
+from hou_bevy.optimize import merge_all_rects, optimize_all_meshes
 
-reload(hou_bevy.component)
 
-from hou_bevy.component import Hou2dMesh, HouData, HouRect, Vec2, Vec3
+def _parm_value(node, name, default):
+    """
+    Evaluate an optional ROP parameter, older HDA versions may not have it
+    """
+    parm = node.parm(name)
+    if parm is None:
+        return default
+    return parm.eval()
 
 
-def rop_output(kwargs):
+def _components(values, tuple_size, components):
     """
-    Rop output node
+    Pick ``components`` out of every ``tuple_size`` tuple of a flat attribute
+    buffer using extended slices instead of a per-prim loop
     """
-    node = kwargs["node"]
-    geo = node.geometry()
-    output_path = node.parm("sopoutput").eval()
+    width = len(components)
+    count = len(values) // tuple_size
+    result = [0.0] * (count * width)
+    for i, component in enumerate(components):
+        result[i::width] = values[component::tuple_size]
+    return result
 
-    hou_data = HouData()
-    if geo:
-        for prim in geo.prims():
-            # Get the vector value (e.g., [x, y, z])
-            layer_name = prim.attribValue("name")
-            layer_type = prim.attribValue("type")
 
-            data = None
+def _uv_components(tuple_size):
+    # uv is stored as 4 vectors, keep x/y of each (same as Vec2.to_list)
+    if tuple_size == 12:
+        return (0, 1, 3, 4, 6, 7, 9, 10)
+    if tuple_size == 8:
+        return tuple(range(8))
+    raise ValueError(f"uv must have 4 elements, got tuple size {tuple_size}")
 
-            if layer_type == "HouRect":
-                center = prim.attribValue("center")
-                translation = Vec3.new(center[0], center[1], center[2])
 
-                size = list(prim.attribValue("size"))[:2]
-                size = Vec2.new(size[0], size[1])
+def _runs(indices):
+    """
+    Split sorted prim numbers into [start, end) runs of consecutive prims
+    """
+    start = prev = indices[0]
+    for index in indices[1:]:
+        if index != prev + 1:
+            yield start, prev + 1
+            start = index
+        prev = index
+    yield start, prev + 1
 
-                uv = prim.attribValue("uv")
-                uv_list = Vec2.to_list(uv)
 
-                data = HouRect.new(size, translation, uv_list)
+def _prim_float_values(geo, name):
+    """
+    Flat values of a float prim attribute for all prims and its tuple size
+    """
+    attrib = geo.findPrimAttrib(name)
+    if attrib is None:
+        raise ValueError(f"Missing primitive attribute '{name}'")
+    return geo.primFloatAttribValues(name), attrib.size()
 
-            hou_data.create_layer(layer_name)  # creates layer only if not exists
-            hou_data.append_data(layer_name, data)
 
-        # if output_path:
-        #     hou_data.export_as_json(output_path)
-        p_list = geo.attribValue("P_list")
-        p_list_data = Vec2.to_list(p_list)
+def _read_rects(geo, hou_data, names, types):
+    """
+    Fetch every prim attribute with one bulk call and group prims by layer
+    """
+    groups = {}
+    for primnum, (layer_name, layer_type) in enumerate(zip(names, types)):
+        hou_data.create_layer(layer_name)  # creates layer only if not exists
+        if layer_type == "HouRect":
+            groups.setdefault(layer_name, []).append(primnum)
+
+    if not groups:
+        return
+
+    with stats.stage("hom_reads"):
+        center_values, center_size = _prim_float_values(geo, "center")
+        size_values, size_size = _prim_float_values(geo, "size")
+        uv_values, uv_size = _prim_float_values(geo, "uv")
+    center = _components(center_values, center_size, (0, 1, 2))
+    size = _components(size_values, size_size, (0, 1))
+    uv = _components(uv_values, uv_size, _uv_components(uv_size))
+
+    with stats.stage("build_objects"):
+        for layer_name, primnums in groups.items():
+            layer = hou_data.get_layer(layer_name)
+            if layer.rect is None:
+                layer.rect = HouRectColumns()
+            for start, end in _runs(primnums):
+                layer.rect.extend_flat(
+                    size[start * 2 : end * 2],
+                    center[start * 3 : end * 3],
+                    uv[start * 8 : end * 8],
+                )
+            stats.count("rects", len(primnums))
 
-        # normal
-        n_list = geo.attribValue("N")
-        n_list_data = Vec3.to_list(n_list)
-        # print(p_list_data)
-        # indices
-        indices = geo.attribValue("indices")
-        z = geo.attribValue("z")
-        id = 0
 
+def _mesh_from_attribs(attrib_value, id):
+    with stats.stage("hom_reads"):
+        positions = attrib_value("P_list")
+        normals = attrib_value("N")
+        indices = attrib_value("indices")
+        z = attrib_value("z")
+
+    with stats.stage("build_objects"):
         hou_2d_mesh = Hou2dMesh()
         hou_2d_mesh.id = id
-        hou_2d_mesh.normals = n_list_data
-        hou_2d_mesh.vertices = p_list_data
+        hou_2d_mesh.vertices = Vec2.to_list(positions)
+        hou_2d_mesh.normals = Vec3.to_list(normals)
         hou_2d_mesh.indices = indices
         hou_2d_mesh.z = z
+    stats.count("meshes")
+    stats.count("vec2_objects", len(hou_2d_mesh.vertices))
+    stats.count("vec3_objects", len(hou_2d_mesh.normals))
+    stats.count("mesh_indices", len(indices))
+    return hou_2d_mesh
+
+
+def _read_detail_mesh(geo, hou_data):
+    with stats.stage("hom_reads"):
+        has_mesh = geo.findGlobalAttrib("P_list") is not None
+    if not has_mesh:
+        return
+    hou_2d_mesh = _mesh_from_attribs(geo.attribValue, 0)
+    hou_data.create_layer("2d_mesh")
+    hou_data.append_data("2d_mesh", hou_2d_mesh)
+
+
+def _read_prim_meshes(geo, hou_data, names, types):
+    """
+    One Hou2dMesh per "Hou2dMesh" prim, read from its array attributes
+    """
+    primnums = [i for i, layer_type in enumerate(types) if layer_type == "Hou2dMesh"]
+    if not primnums:
+        return
+
+    with stats.stage("hom_reads"):
+        has_id = geo.findPrimAttrib("id") is not None
+    next_id = {}
+    for primnum in primnums:
+        with stats.stage("hom_reads"):
+            prim = geo.prim(primnum)
+        layer_name = names[primnum]
+        if has_id:
+            with stats.stage("hom_reads"):
+                mesh_id = prim.attribValue("id")
+        else:
+            mesh_id = next_id.get(layer_name, 0)
+            next_id[layer_name] = mesh_id + 1
+        hou_data.append_data(layer_name, _mesh_from_attribs(prim.attribValue, mesh_id))
+
+
+def build_hou_data(geo, batch_meshes=False, optimize_meshes=False):
+    """
+    Convert the ROP input geometry to HouData.
+    With ``optimize_meshes`` mesh vertices are welded and triangles reordered
+    for the vertex cache.
+    With ``batch_meshes`` all meshes of a layer share one vertex/index buffer.
+    """
+    hou_data = HouData(columnar=True)
+    if geo:
+        with stats.stage("hom_reads"):
+            names = geo.primStringAttribValues("name")
+            types = geo.primStringAttribValues("type")
+        stats.count("prims", len(names))
+        with stats.stage("rects"):
+            _read_rects(geo, hou_data, names, types)
+        with stats.stage("prim_meshes"):
+            _read_prim_meshes(geo, hou_data, names, types)
+        with stats.stage("detail_mesh"):
+            _read_detail_mesh(geo, hou_data)
+    if optimize_meshes:
+        with stats.stage("optimize_meshes"):
+            optimized = optimize_all_meshes(hou_data)
+        for name, reports in optimized.items():
+            for report in reports:
+                print(
+                    f"{name}: vertices {report.vertices_before} -> "
+                    f"{report.vertices_after}, ACMR {report.acmr_before:.3f} -> "
+                    f"{report.acmr_after:.3f}, {report.bytes_before} -> "
+                    f"{report.bytes_after} bytes (u{report.index_width * 8} indices)"
+                )
+    if batch_meshes:
+        with stats.stage("batch_meshes"):
+            for layer in hou_data.layer.values():
+                layer.batch_meshes()
+    stats.count("layers", len(hou_data.layer))
+    return hou_data
+
+
+def rop_output(kwargs):
+    """
+    Rop output node
+    """
+    node = kwargs["node"]
+    output_path = node.parm("sopoutput").eval()
+    # HOU_BEVY_STATS or the optional "stats" menu, see hou_bevy.stats
+    mode = stats.resolve_mode(_parm_value(node, "stats", 0))
+    with stats.collect("rop_output", output_path, mode):
+        _rop_output(node, output_path)
+
+
+def _rop_output(node, output_path):
+    with stats.stage("cook"):
+        geo = node.geometry()
+
+    with stats.stage("build_hou_data"):
+        hou_data = build_hou_data(
+            geo,
+            batch_meshes=bool(_parm_value(node, "batch_meshes", 0)),
+            optimize_meshes=bool(_parm_value(node, "optimize_meshes", 0)),
+        )
+
+    if _parm_value(node, "merge_rects", 0):
+        with stats.stage("merge_rects"):
+            merged = merge_all_rects(hou_data)
+        for name, report in merged.items():
+            print(f"{name}: merged {report.before} rects into {report.after}")
+
+    with stats.stage("print"):
+        print(hou_data)
+    with stats.stage("write"):
+        _write_output(node, hou_data, output_path)
 
-        hou_data.create_layer("2d_mesh")
-        hou_data.append_data("2d_mesh", hou_2d_mesh)
 
-    print(hou_data)
-    hou_data.export_as_json(output_path)
+def _write_output(node, hou_data, output_path):
+    chunk_size = _parm_value(node, "chunk_size", 0.0)
+    if chunk_size > 0:
+        # sopoutput is the chunk manifest, chunks are written next to it
+        manifest = export_chunks(hou_data, output_path, chunk_size)
+        print(f"written {len(manifest['chunks'])} chunks")
+    elif _parm_value(node, "incremental", 0):
+        # sopoutput is the manifest, layers are written next to it
+        result = export_incremental(hou_data, output_path)
+        print(
+            f"written: {result.written}, unchanged: {result.skipped}, "
+            f"removed: {result.removed}"
+        )
+    elif output_path.endswith(BINARY_EXTENSION):
+        hou_data.export_as_binary(output_path)
+    elif output_path.endswith(COMPRESSED_EXTENSION):
+        hou_data.export_as_compressed(
+            output_path,
+            codec=_parm_value(node, "compression", "zlib"),
+            quantize=bool(_parm_value(node, "quantize", 0)),
+        )
+    else:
+        hou_data.export_as_json(
+            output_path, quantize=bool(_parm_value(node, "quantize", 0))
+        )
@@ -0,0 +1,259 @@
+"""
+Content-addressed cache of usdrs exports.
+
+An export is keyed by the SHA-256 of the input USD bytes, of every file
+the stage is composed from (sublayers, references, payloads and the assets
+they point at), a fingerprint of the usdrs executable and the CLI flags that
+change the output. The dependencies are found with ``pxr.UsdUtils``; a stage
+whose dependencies can not all be resolved to files is not cached, and
+without pxr only a text layer without asset paths is.
+
+Objects are stored under ``<root>/objects/<key[:2]>/<key>``. A hit is
+hard-linked into place, or copied when linking is not possible, and marks
+the object as recently used through its mtime. Once the cache grows over
+``max_bytes`` the least recently used objects are evicted.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_ROOT = Path.home() / ".cache" / "hou_bevy" / "usdrs"
+DEFAULT_MAX_BYTES = 2 * 1024**3
+CHUNK_SIZE = 1 << 20
+
+# (path, size, mtime_ns) -> fingerprint, executables are hashed once per build
+_fingerprints: Dict[Tuple[str, int, int], str] = {}
+# header of text layers, crate files start with PXR-USDC
+USDA_MAGIC = b"#usda"
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def executable_fingerprint(exe_path: str) -> str:
+    """
+    Hash of the executable, so rebuilding usdrs invalidates the cache even
+    when its version number did not change
+    """
+    stat = os.stat(exe_path)
+    stamp = (os.path.abspath(exe_path), stat.st_size, stat.st_mtime_ns)
+    fingerprint = _fingerprints.get(stamp)
+    if fingerprint is None:
+        fingerprint = _fingerprints[stamp] = file_digest(exe_path)
+    return fingerprint
+
+
+def layer_dependencies(input_file: str) -> Optional[List[str]]:
+    """
+    Files besides ``input_file`` its stage is composed from, sorted. None
+    when some can not be resolved to a file, the export is then not
+    cacheable.
+    """
+    try:
+        from pxr import UsdUtils
+    except ImportError:
+        # crate files and asset paths can not be followed without pxr
+        with open(input_file, "rb") as f:
+            data = f.read()
+        return [] if data.startswith(USDA_MAGIC) and b"@" not in data else None
+
+    layers, assets, unresolved = UsdUtils.ComputeAllDependencies(input_file)
+    if unresolved:
+        return None
+    paths = {layer.realPath for layer in layers if not layer.anonymous}
+    paths.update(assets)
+    paths = {os.path.realpath(path) for path in paths}
+    paths.discard(os.path.realpath(input_file))
+    # e.g. layers inside a usdz package
+    if not all(os.path.isfile(path) for path in paths):
+        return None
+    return sorted(paths)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    evicted_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+class ExportCache:
+    def __init__(
+        self,
+        root: os.PathLike = DEFAULT_ROOT,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        link: bool = True,
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.link = link
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def key(
+        self,
+        input_file: str,
+        exe_path: str,
+        flags: Iterable[str] = (),
+        dependencies: Iterable[str] = (),
+    ) -> str:
+        """
+        ``dependencies`` are the files the stage is composed from, see
+        ``layer_dependencies``
+        """
+        digest = hashlib.sha256()
+        digest.update(file_digest(input_file).encode())
+        digest.update(executable_fingerprint(exe_path).encode())
+        for flag in flags:
+            digest.update(b"\0" + flag.encode("utf-8"))
+        for path in dependencies:
+            digest.update(b"\1" + path.encode("utf-8") + b"\0")
+            digest.update(file_digest(path).encode())
+        return digest.hexdigest()
+
+    def _object_path(self, key: str) -> Path:
+        return self.root / "objects" / key[:2] / key
+
+    def fetch(self, key: str, output_file: str) -> bool:
+        """
+        Place the cached output of ``key`` at ``output_file``, False on a miss
+        """
+        source = self._object_path(key)
+        try:
+            _place(source, Path(output_file), self.link)
+            os.utime(source)
+        except FileNotFoundError:
+            with self._lock:
+                self.stats.misses += 1
+            return False
+        with self._lock:
+            self.stats.hits += 1
+        return True
+
+    def store(self, key: str, output_file: str) -> None:
+        """
+        Copy a fresh export into the cache, then evict down to ``max_bytes``
+        """
+        target = self._object_path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # copy rather than link, usdrs may later rewrite the output in place
+        fd, temp = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+        os.close(fd)
+        try:
+            shutil.copyfile(output_file, temp)
+            os.replace(temp, target)
+        except BaseException:
+            os.unlink(temp)
+            raise
+        with self._lock:
+            self.stats.stores += 1
+        self.evict()
+
+    def entries(self) -> List[Tuple[float, int, Path]]:
+        """
+        ``(last_used, size, path)`` of every object, least recently used first
+        """
+        result = []
+        for path in (self.root / "objects").glob("*/*"):
+            if path.name.startswith(".tmp-"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            result.append((stat.st_mtime, stat.st_size, path))
+        result.sort()
+        return result
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Remove least recently used objects until the cache fits, returns the
+        number of removed objects
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= limit:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+            with self._lock:
+                self.stats.evictions += 1
+                self.stats.evicted_bytes += size
+        return removed
+
+    def clear(self) -> int:
+        return self.evict(0)
+
+
+def _place(source: Path, target: Path, link: bool) -> None:
+    """
+    Hard-link ``source`` to ``target``, falling back to a copy
+    """
+    if not source.exists():
+        raise FileNotFoundError(source)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.exists() or target.is_symlink():
+        target.unlink()
+    if link:
+        try:
+            os.link(source, target)
+            return
+        except OSError:
+            # other volume or no hard link support
+            pass
+    shutil.copyfile(source, target)
+
+
+def unlink_shared(path: str) -> None:
+    """
+    Remove ``path`` if it is hard-linked, e.g. to a cache object, so a
+    process rewriting it in place can not corrupt the other links
+    """
+    try:
+        if os.stat(path).st_nlink > 1:
+            os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+_cache: Optional[ExportCache] = None
+
+
+def get_cache() -> ExportCache:
+    global _cache
+    if _cache is None:
+        _cache = ExportCache()
+    return _cache
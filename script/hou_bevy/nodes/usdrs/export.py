@@ -1,15 +1,219 @@
 import os
-import subprocess
 import sys
-import threading
+import time
 from pathlib import Path
 
 import hou
+from hou_bevy import stats
+from hou_bevy.nodes.usdrs.cache import get_cache, layer_dependencies, unlink_shared
+from hou_bevy.nodes.usdrs.scheduler import get_scheduler
+from hou_bevy.nodes.usdrs.stream import Throttle, describe_event, run_streaming
+from hou_bevy.nodes.usdrs.worker import (
+    WorkerCrashed,
+    WorkerError,
+    WorkerPool,
+    WorkerUnsupported,
+)
 
+# wall-clock limit of one parse in seconds
+DEFAULT_TIMEOUT = 600.0
+# min seconds between two progress updates of the status bar
+STATUS_INTERVAL = 0.25
 
-def run_usd_parser(input_file, output_file=None, remove_input=bool):
+# persistent ``usdrs serve`` processes, keyed by executable
+_worker_pools = {}
+
+
+def _progress_reporter(input_file):
+    """
+    Progress event callback forwarding to the status bar at most every
+    ``STATUS_INTERVAL`` seconds
+    """
+    name = os.path.basename(input_file)
+    throttle = Throttle(
+        lambda text: hou.ui.setStatusMessage(
+            f"USD parsing {name}: {text}", severity=hou.severityType.Message
+        ),
+        STATUS_INTERVAL,
+    )
+    return lambda event: throttle(describe_event(event))
+
+
+def _run_process(cmd, timeout=DEFAULT_TIMEOUT):
     """
-    Run the usdrs.exe parser asynchronously
+    Run one usdrs.exe command on a scheduler worker thread, raises when it
+    fails or times out so the job ends up ``failed``
+    """
+    try:
+        result = run_streaming(cmd, timeout, on_event=_progress_reporter(cmd[2]))
+    except TimeoutError as e:
+        hou.ui.displayMessage(
+            f"USD parsing killed: {e}", severity=hou.severityType.Error
+        )
+        raise
+    except Exception as e:
+        hou.ui.displayMessage(
+            f"Failed to run usdrs.exe: {str(e)}", severity=hou.severityType.Error
+        )
+        raise
+
+    # Check result
+    if result.returncode != 0:
+        hou.ui.displayMessage(
+            f"Error parsing USD: {result.stderr.text()}",
+            severity=hou.severityType.Error,
+        )
+        raise RuntimeError(f"usdrs.exe exited with code {result.returncode}")
+
+    hou.ui.setStatusMessage(
+        f"USD parsing completed successfully in {result.seconds:.1f}s",
+        severity=hou.severityType.Message,
+    )
+    stdout = result.stdout.text()
+    if stdout:
+        print(f"Output: {stdout}")
+    return stdout
+
+
+def get_worker_pool(exe_path):
+    pool = _worker_pools.get(exe_path)
+    if pool is None:
+        pool = _worker_pools[exe_path] = WorkerPool([exe_path, "serve"])
+    return pool
+
+
+def _run_export(
+    exe_path,
+    cmd,
+    input_file,
+    output_file,
+    remove_input,
+    use_cache,
+    timeout,
+    stats_mode=stats.OFF,
+    submitted=None,
+):
+    """
+    Collect the stats of one export on its scheduler thread, written next to
+    the output, or next to the input when usdrs picks the output name
+    """
+    with stats.collect(
+        "run_usd_parser", output_file or input_file, stats_mode
+    ) as collected:
+        if collected is not None and submitted is not None:
+            collected.add_time("queued", time.perf_counter() - submitted)
+        stats.count_file("input_bytes", input_file)
+        result = _cached_export(
+            exe_path, cmd, input_file, output_file, remove_input, use_cache, timeout
+        )
+        if output_file:
+            stats.count_file("output_bytes", output_file)
+        return result
+
+
+def _cached_export(
+    exe_path, cmd, input_file, output_file, remove_input, use_cache, timeout
+):
+    """
+    Reuse a cached export of identical input, otherwise run usdrs.exe and
+    cache its output. Exports without an explicit output file, or of stages
+    whose layers can not all be resolved, are not cached.
+    """
+    dependencies = None
+    if use_cache and output_file:
+        with stats.stage("cache_dependencies"):
+            dependencies = layer_dependencies(input_file)
+        if dependencies is None:
+            stats.count("cache_bypassed")
+            print(f"{input_file}: layers not resolved, exporting without cache")
+    if dependencies is None:
+        with stats.stage("export"):
+            return _export(
+                exe_path, cmd, input_file, output_file, remove_input, timeout
+            )
+
+    cache = get_cache()
+    # --remove-input does not change the output
+    with stats.stage("cache_key"):
+        key = cache.key(input_file, exe_path, ["export"], dependencies)
+    with stats.stage("cache_fetch"):
+        hit = cache.fetch(key, output_file)
+    if hit:
+        stats.count("cache_hits")
+        if remove_input:
+            os.remove(input_file)
+        hou.ui.setStatusMessage(
+            f"USD export reused from cache ({cache.stats.hits} hits, "
+            f"{cache.stats.misses} misses)",
+            severity=hou.severityType.Message,
+        )
+        return output_file
+
+    stats.count("cache_misses")
+    # a previous hit may have linked the output to a cache object
+    unlink_shared(output_file)
+    with stats.stage("export"):
+        result = _export(exe_path, cmd, input_file, output_file, remove_input, timeout)
+    with stats.stage("cache_store"):
+        cache.store(key, output_file)
+    return result
+
+
+def _export(exe_path, cmd, input_file, output_file, remove_input, timeout):
+    """
+    Export through a persistent worker, falls back to one usdrs.exe process
+    per export when the binary has no worker mode
+    """
+    pool = get_worker_pool(exe_path)
+    if pool.supported:
+        try:
+            with stats.stage("worker"), pool.worker() as worker:
+                reply = worker.request(
+                    "export",
+                    timeout=timeout,
+                    on_event=_progress_reporter(input_file),
+                    input=input_file,
+                    output=output_file,
+                    remove_input=remove_input,
+                )
+        except WorkerUnsupported as e:
+            print(f"{e}, running one usdrs.exe process per export")
+        except TimeoutError as e:
+            hou.ui.displayMessage(
+                f"USD parsing killed: {e}", severity=hou.severityType.Error
+            )
+            raise
+        except (WorkerError, WorkerCrashed) as e:
+            hou.ui.displayMessage(
+                f"Error parsing USD: {e}", severity=hou.severityType.Error
+            )
+            raise
+        else:
+            hou.ui.setStatusMessage(
+                "USD parsing completed successfully",
+                severity=hou.severityType.Message,
+            )
+            return reply.get("output")
+
+    with stats.stage("process"):
+        return _run_process(cmd, timeout)
+
+
+def run_usd_parser(
+    input_file,
+    output_file=None,
+    remove_input=bool,
+    use_cache=True,
+    timeout=DEFAULT_TIMEOUT,
+    stats_mode=None,
+):
+    """
+    Queue the usdrs.exe parser on the shared scheduler and return the job.
+    Exporting the same input to the same output again while the first
+    export is still queued returns the queued job, exporting unchanged input
+    again reuses the cached output. A parse running longer than ``timeout``
+    seconds is killed, None waits forever. ``stats_mode`` turns on
+    ``hou_bevy.stats`` for this export in addition to ``HOU_BEVY_STATS``.
     """
     # Get the path to the executable
     # Assuming usdrs.exe is in the same directory as the HDA
@@ -28,53 +232,42 @@ def run_usd_parser(input_file, output_file=None, remove_input=bool):
     if remove_input:
         cmd.extend(["--remove-input"])
 
-    # Run asynchronously
-    def run_process():
-        try:
-            # Use Popen to run without blocking
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                creationflags=subprocess.CREATE_NO_WINDOW
-                if sys.platform == "win32"
-                else 0,
-            )
-
-            # Read output in background
-            stdout, stderr = process.communicate()
-
-            # Check result
-            if process.returncode == 0:
-                hou.ui.setStatusMessage(
-                    "USD parsing completed successfully",
-                    severity=hou.severityType.Message,
-                )
-                if stdout:
-                    print(f"Output: {stdout}")
-            else:
-                hou.ui.displayMessage(
-                    f"Error parsing USD: {stderr}", severity=hou.severityType.Error
-                )
-
-        except Exception as e:
-            hou.ui.displayMessage(
-                f"Failed to run usdrs.exe: {str(e)}", severity=hou.severityType.Error
-            )
-
-    # Start the thread
-    thread = threading.Thread(target=run_process)
-    thread.daemon = True  # Thread will exit when main program exits
-    thread.start()
+    job = get_scheduler().submit(
+        tuple(cmd),
+        _run_export,
+        exe_path,
+        cmd,
+        input_file,
+        output_file,
+        bool(remove_input),
+        use_cache,
+        timeout,
+        stats.resolve_mode(stats_mode),
+        time.perf_counter(),
+    )
 
     # Update status
     hou.ui.setStatusMessage(
-        "USD parsing started in background...",
+        f"USD parsing queued in background (job {job.id})...",
         severity=hou.severityType.ImportantMessage,
     )
 
-    return True
+    return job
+
+
+def cancel_usd_parser(job_id):
+    """
+    Cancel a queued export, returns False once it started
+    """
+    return get_scheduler().cancel(job_id)
+
+
+def usd_parser_status(job_id):
+    """
+    ``pending``, ``running``, ``done``, ``failed``, ``cancelled`` or None for
+    unknown jobs
+    """
+    return get_scheduler().status(job_id)
 
 
 def get_exe_path():
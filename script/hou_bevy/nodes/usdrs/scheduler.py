@@ -0,0 +1,223 @@
+"""
+Bounded job queue for usdrs exports.
+
+Jobs run in submission order on at most ``max_workers`` worker threads, so
+at most that many usdrs processes are alive at once. Submitting a job whose
+key (input and output file) is already waiting in the queue returns the
+waiting job instead of queueing a second one. Pending jobs can be cancelled,
+a job that already started runs to completion.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+# finished jobs kept around for status queries
+HISTORY_SIZE = 256
+
+
+@dataclass
+class Job:
+    id: int
+    key: Hashable
+    func: Callable[..., Any] = field(repr=False)
+    args: tuple = ()
+    status: str = PENDING
+    result: Any = None
+    error: Optional[str] = None
+    # submissions coalesced into this job, including the first one
+    submissions: int = 1
+    _finished: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the job finished, False on timeout
+        """
+        return self._finished.wait(timeout)
+
+
+class Scheduler:
+    def __init__(self, max_workers: int = DEFAULT_WORKERS):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self._cond = threading.Condition()
+        self._queue: Deque[Job] = deque()
+        self._pending: Dict[Hashable, Job] = {}
+        self._jobs: Dict[int, Job] = {}
+        self._history: Deque[int] = deque()
+        self._ids = itertools.count(1)
+        self._workers = 0
+        self._idle = 0
+        self._closed = False
+
+    def submit(self, key: Hashable, func: Callable[..., Any], *args: Any) -> Job:
+        """
+        Queue ``func(*args)``, or return the pending job with the same ``key``
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Scheduler is shut down")
+            job = self._pending.get(key)
+            if job is not None:
+                job.submissions += 1
+                return job
+
+            job = Job(next(self._ids), key, func, args)
+            self._jobs[job.id] = job
+            self._pending[key] = job
+            self._queue.append(job)
+            if len(self._queue) > self._idle and self._workers < self.max_workers:
+                self._start_worker()
+            self._cond.notify()
+            return job
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        Cancel a pending job, returns False when it already started
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != PENDING:
+                return False
+            self._queue.remove(job)
+            del self._pending[job.key]
+            self._finish(job, CANCELLED)
+            return True
+
+    def cancel_all(self) -> int:
+        """
+        Cancel every pending job, returns how many were cancelled
+        """
+        with self._cond:
+            jobs = list(self._queue)
+            self._queue.clear()
+            self._pending.clear()
+            for job in jobs:
+                self._finish(job, CANCELLED)
+            return len(jobs)
+
+    def job(self, job_id: int) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id: int) -> Optional[str]:
+        job = self.job(job_id)
+        return job.status if job else None
+
+    def jobs(self) -> List[Job]:
+        with self._cond:
+            return list(self._jobs.values())
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Number of known jobs per status
+        """
+        result = dict.fromkeys((PENDING, RUNNING, DONE, FAILED, CANCELLED), 0)
+        for job in self.jobs():
+            result[job.status] += 1
+        return result
+
+    def set_max_workers(self, max_workers: int) -> None:
+        """
+        Change the number of concurrent jobs, extra workers exit once their
+        current job finished
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        with self._cond:
+            self.max_workers = max_workers
+            while self._workers < min(max_workers, len(self._queue) + self._busy()):
+                self._start_worker()
+            self._cond.notify_all()
+
+    def shutdown(self, cancel_pending: bool = True) -> None:
+        """
+        Stop accepting jobs, workers exit once the queue is empty
+        """
+        with self._cond:
+            self._closed = True
+        if cancel_pending:
+            self.cancel_all()
+        with self._cond:
+            self._cond.notify_all()
+
+    def _busy(self) -> int:
+        return self._workers - self._idle
+
+    def _start_worker(self) -> None:
+        self._workers += 1
+        thread = threading.Thread(target=self._work, name="usdrs-worker")
+        thread.daemon = True
+        thread.start()
+
+    def _next_job(self) -> Optional[Job]:
+        with self._cond:
+            while not self._queue:
+                if self._closed or self._workers > self.max_workers:
+                    self._workers -= 1
+                    return None
+                self._idle += 1
+                self._cond.wait()
+                self._idle -= 1
+            if self._workers > self.max_workers:
+                self._workers -= 1
+                return None
+            job = self._queue.popleft()
+            del self._pending[job.key]
+            job.status = RUNNING
+            return job
+
+    def _work(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                result = job.func(*job.args)
+            except Exception as e:
+                with self._cond:
+                    job.error = str(e)
+                    self._finish(job, FAILED)
+            else:
+                with self._cond:
+                    job.result = result
+                    self._finish(job, DONE)
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job._finished.set()
+        self._history.append(job.id)
+        while len(self._history) > HISTORY_SIZE:
+            self._jobs.pop(self._history.popleft(), None)
+
+
+_scheduler: Optional[Scheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """
+    Scheduler shared by every usdrs export of the session
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler()
+        return _scheduler
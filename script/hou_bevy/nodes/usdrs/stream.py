@@ -0,0 +1,217 @@
+"""
+Line-by-line reading of usdrs output.
+
+stdout and stderr are read on their own threads as lines arrive instead of
+being buffered until the process exits. Lines that are JSON objects with an
+``event`` key, the same progress events the worker protocol sends, are
+passed to ``on_event``::
+
+    {"event": "progress", "stage": "parse", "progress": 0.5}
+
+Other output is kept in an ``OutputBuffer`` holding the last
+``max_lines`` lines, and a process still running after ``timeout`` seconds
+is killed.
+"""
+
+from __future__ import annotations
+
+import json
+import queue
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import IO, Any, Callable, Deque, Dict, Optional, Sequence
+
+MAX_LINES = 1000
+MAX_LINE_LENGTH = 4096
+
+
+def pump_lines(
+    stream: IO[str], target: Callable[[Optional[str]], None]
+) -> threading.Thread:
+    """
+    Feed the lines of ``stream`` to ``target`` on a thread, then None
+    """
+
+    def pump():
+        for line in stream:
+            target(line)
+        stream.close()
+        target(None)
+
+    thread = threading.Thread(target=pump, name="usdrs-io")
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def parse_event(line: str) -> Optional[Dict[str, Any]]:
+    line = line.strip()
+    if not line.startswith("{"):
+        return None
+    try:
+        message = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(message, dict) and "event" in message:
+        return message
+    return None
+
+
+def describe_event(event: Dict[str, Any]) -> str:
+    """
+    Status bar text of a progress event
+    """
+    text = str(event.get("stage") or event.get("message") or event["event"])
+    progress = event.get("progress")
+    if isinstance(progress, (int, float)):
+        text += f" {progress:.0%}"
+    return text
+
+
+class OutputBuffer:
+    """
+    Ring buffer of the last ``max_lines`` lines, longer lines are truncated
+    """
+
+    def __init__(
+        self, max_lines: int = MAX_LINES, max_line_length: int = MAX_LINE_LENGTH
+    ):
+        self.lines: Deque[str] = deque(maxlen=max_lines)
+        self.max_line_length = max_line_length
+        self.total = 0
+
+    def append(self, line: Optional[str]) -> None:
+        if line is None:
+            return
+        if len(line) > self.max_line_length:
+            line = line[: self.max_line_length] + "...\n"
+        self.lines.append(line)
+        self.total += 1
+
+    def clear(self) -> None:
+        self.lines.clear()
+        self.total = 0
+
+    @property
+    def dropped(self) -> int:
+        return self.total - len(self.lines)
+
+    def text(self) -> str:
+        text = "".join(self.lines)
+        if self.dropped:
+            text = f"[{self.dropped} earlier lines dropped]\n" + text
+        return text
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+
+class Throttle:
+    """
+    Call ``func`` with the latest message at most every ``interval`` seconds
+    """
+
+    def __init__(self, func: Callable[[str], None], interval: float = 0.25):
+        self.func = func
+        self.interval = interval
+        self._last = -float("inf")
+        self._pending: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __call__(self, message: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last < self.interval:
+                self._pending = message
+                return
+            self._last = now
+            self._pending = None
+        self.func(message)
+
+    def flush(self) -> None:
+        with self._lock:
+            message, self._pending = self._pending, None
+            self._last = time.monotonic()
+        if message is not None:
+            self.func(message)
+
+
+@dataclass
+class StreamResult:
+    returncode: int
+    stdout: OutputBuffer
+    stderr: OutputBuffer
+    seconds: float
+
+
+def _creationflags() -> int:
+    return subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+
+
+def run_streaming(
+    cmd: Sequence[str],
+    timeout: Optional[float] = None,
+    on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    on_line: Optional[Callable[[str, str], None]] = None,
+    max_lines: int = MAX_LINES,
+) -> StreamResult:
+    """
+    Run ``cmd`` reading its output as it arrives. ``on_line`` gets the
+    stream name and every line, ``on_event`` the progress events. Raises
+    ``TimeoutError`` after killing the process when it outlives ``timeout``.
+    """
+    start = time.monotonic()
+    deadline = None if timeout is None else start + timeout
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+        creationflags=_creationflags(),
+    )
+    lines: queue.Queue = queue.Queue()
+    buffers = {"stdout": OutputBuffer(max_lines), "stderr": OutputBuffer(max_lines)}
+    for name in buffers:
+        pump_lines(
+            getattr(process, name), lambda line, name=name: lines.put((name, line))
+        )
+
+    try:
+        open_streams = len(buffers)
+        while open_streams:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError(f"{cmd[0]} timed out after {timeout}s")
+            try:
+                name, line = lines.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if line is None:
+                open_streams -= 1
+                continue
+            if on_line:
+                on_line(name, line)
+            event = parse_event(line)
+            if event is None:
+                buffers[name].append(line)
+            elif on_event:
+                on_event(event)
+
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            returncode = process.wait(remaining)
+        except subprocess.TimeoutExpired:
+            raise TimeoutError(f"{cmd[0]} timed out after {timeout}s")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+    return StreamResult(
+        returncode, buffers["stdout"], buffers["stderr"], time.monotonic() - start
+    )
@@ -0,0 +1,274 @@
+"""
+Persistent usdrs worker speaking newline-delimited JSON.
+
+``usdrs serve`` reads one JSON request per line on stdin and answers every
+request with one JSON line on stdout, in order::
+
+    -> {"id": 1, "cmd": "export", "input": "a.usd", "remove_input": false}
+    <- {"id": 1, "event": "progress", "stage": "parse", "progress": 0.5}
+    <- {"id": 1, "ok": true, "output": "a.json"}
+
+    -> {"id": 2, "cmd": "export", "input": "missing.usd"}
+    <- {"id": 2, "ok": false, "error": "missing.usd: no such file"}
+
+Lines with an ``event`` key are progress notifications for the request with
+the same ``id``, lines that are not JSON are ignored. Every session starts
+with ``{"id": 0, "cmd": "hello"}``, answered with ``{"id": 0, "ok": true,
+"protocol": 1}``; a binary without worker mode fails the first handshake
+and ``WorkerUnsupported`` is raised. Once a handshake succeeded, a worker
+dying in a later one raises ``WorkerCrashed``.
+
+A worker whose process exited is restarted on the next request. A request
+is retried once when the worker died before it was written; one the worker
+may have read is not run twice, it may have removed its input already.
+``dev/usdrs_standin.py`` implements the protocol for testing without a usdrs
+build.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import queue
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from hou_bevy.nodes.usdrs.stream import OutputBuffer, pump_lines
+
+PROTOCOL_VERSION = 1
+START_TIMEOUT = 10.0
+# stderr lines kept for error messages
+STDERR_LINES = 200
+
+
+class WorkerError(RuntimeError):
+    """
+    usdrs answered the request with an error
+    """
+
+
+class WorkerCrashed(RuntimeError):
+    """
+    The worker process exited while a request was in flight. ``sent`` is
+    False when it exited before the request was written to it.
+    """
+
+    def __init__(self, message: str, sent: bool = True):
+        super().__init__(message)
+        self.sent = sent
+
+
+class WorkerUnsupported(RuntimeError):
+    """
+    The usdrs binary has no worker mode
+    """
+
+
+class UsdrsWorker:
+    def __init__(
+        self,
+        command: Sequence[str],
+        start_timeout: float = START_TIMEOUT,
+        verified: bool = False,
+    ):
+        self.command = list(command)
+        self.start_timeout = start_timeout
+        # set once the binary passed a handshake, later failures are crashes
+        self.verified = verified
+        self.starts = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._lines: queue.Queue = queue.Queue()
+        self._stderr = OutputBuffer(STDERR_LINES)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stdout_thread: Optional[threading.Thread] = None
+        self._stderr_thread: Optional[threading.Thread] = None
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    @property
+    def restarts(self) -> int:
+        return max(0, self.starts - 1)
+
+    def stderr_tail(self) -> str:
+        return "".join(self._stderr.lines)
+
+    def start(self) -> None:
+        """
+        Start the process and check the protocol version
+        """
+        self.stop()
+        try:
+            process = subprocess.Popen(
+                self.command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+                creationflags=(
+                    subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+                ),
+            )
+        except OSError as e:
+            raise WorkerUnsupported(f"Failed to start {self.command[0]}: {e}")
+        self._process = process
+        self._lines = queue.Queue()
+        self._stderr.clear()
+        self.starts += 1
+        self._stdout_thread = pump_lines(process.stdout, self._lines.put)
+        self._stderr_thread = pump_lines(process.stderr, self._stderr.append)
+
+        try:
+            reply = self._call({"id": 0, "cmd": "hello"}, self.start_timeout)
+        except (WorkerCrashed, WorkerError, TimeoutError) as e:
+            self.stop()
+            if self.verified:
+                raise
+            raise WorkerUnsupported(f"{self.command[0]} has no worker mode: {e}")
+        if reply.get("protocol") != PROTOCOL_VERSION:
+            self.stop()
+            raise WorkerUnsupported(
+                f"Unsupported usdrs worker protocol {reply.get('protocol')}"
+            )
+        self.verified = True
+
+    def stop(self, timeout: float = 2.0) -> None:
+        process = self._process
+        if process is None:
+            return
+        self._process = None
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def request(
+        self,
+        cmd: str,
+        timeout: Optional[float] = None,
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+        **params: Any,
+    ) -> Dict[str, Any]:
+        """
+        Send one request and wait for its reply, (re)starting the process
+        when needed. Raises ``WorkerError`` when usdrs reports an error.
+        """
+        with self._lock:
+            for attempt in (0, 1):
+                if not self.alive:
+                    self.start()
+                payload = {"id": next(self._ids), "cmd": cmd, **params}
+                try:
+                    return self._call(payload, timeout, on_event)
+                except WorkerCrashed as e:
+                    if attempt or e.sent:
+                        raise
+            raise AssertionError("unreachable")
+
+    def _call(
+        self,
+        payload: Dict[str, Any],
+        timeout: Optional[float],
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        try:
+            self._process.stdin.write(json.dumps(payload) + "\n")
+            self._process.stdin.flush()
+        except OSError:
+            raise self._crashed(sent=False)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                # the reply may still arrive, the session is out of step
+                self.stop(timeout=0)
+                raise TimeoutError(f"usdrs request timed out after {timeout}s")
+            try:
+                line = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if line is None:
+                raise self._crashed()
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(message, dict) or message.get("id") != payload["id"]:
+                continue
+            if "event" in message:
+                if on_event:
+                    on_event(message)
+                continue
+            if message.get("ok"):
+                return message
+            raise WorkerError(message.get("error", "unknown usdrs error"))
+
+    def _crashed(self, sent: bool = True) -> WorkerCrashed:
+        process = self._process
+        code = process.wait() if process else None
+        self._process = None
+        # let the stderr reader catch up with the last words of the process
+        self._stderr_thread.join(1.0)
+        tail = self.stderr_tail().strip()
+        return WorkerCrashed(
+            f"usdrs worker exited with code {code}" + (f": {tail}" if tail else ""),
+            sent,
+        )
+
+
+class WorkerPool:
+    """
+    Idle workers handed out to the scheduler threads, one process per
+    concurrent job
+    """
+
+    def __init__(self, command: Sequence[str], start_timeout: float = START_TIMEOUT):
+        self.command = list(command)
+        self.start_timeout = start_timeout
+        # cleared once a worker failed the first handshake
+        self.supported = True
+        # set once a worker passed it
+        self.verified = False
+        self._idle: List[UsdrsWorker] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> UsdrsWorker:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return UsdrsWorker(self.command, self.start_timeout, self.verified)
+
+    def release(self, worker: UsdrsWorker) -> None:
+        with self._lock:
+            self.verified = self.verified or worker.verified
+            self._idle.append(worker)
+
+    @contextmanager
+    def worker(self) -> Iterator[UsdrsWorker]:
+        worker = self.acquire()
+        try:
+            yield worker
+        except WorkerUnsupported:
+            self.supported = False
+            raise
+        finally:
+            self.release(worker)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
@@ -0,0 +1,354 @@
+"""
+Pre-export optimization passes.
+
+``merge_rects`` merges axis-aligned rects that touch or overlap, share ``z``
+and have identical UVs into fewer, larger rects. Each pass groups rects by the
+span they share on one axis, sorts every group along the other axis and
+sweeps adjacent runs together, so a pass is O(n log n). Passes alternate
+between the X and Y axis until nothing merges anymore.
+
+``optimize_mesh`` welds duplicate Hou2dMesh vertices, reorders triangles for
+the post-transform vertex cache (Tipsify) and reports the before/after ACMR,
+size in bytes and the narrowest index width the mesh fits in.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from hou_bevy.binary import index_width
+from hou_bevy.component import (
+    Hou2dMesh,
+    HouData,
+    HouLayer,
+    HouRectColumns,
+    Vec2Array,
+    Vec3Array,
+)
+
+# min_x, min_y, max_x, max_y, z, uv, source order
+_Box = Tuple[float, float, float, float, float, Tuple[float, ...], int]
+
+
+@dataclass
+class MergeReport:
+    before: int = 0
+    after: int = 0
+
+    @property
+    def removed(self) -> int:
+        return self.before - self.after
+
+
+def _boxes(layer: HouLayer) -> List[_Box]:
+    rects = layer.rect
+    if not isinstance(rects, HouRectColumns):
+        rects = HouRectColumns.from_rects(rects)
+    size = rects.size.data
+    translation = rects.translation.data
+    uv = rects.uv.data
+
+    boxes = []
+    for i in range(len(rects)):
+        hw = size[i * 2] * 0.5
+        hh = size[i * 2 + 1] * 0.5
+        x, y, z = translation[i * 3 : i * 3 + 3]
+        boxes.append(
+            (x - hw, y - hh, x + hw, y + hh, z, tuple(uv[i * 8 : i * 8 + 8]), i)
+        )
+    return boxes
+
+
+def _merge_pass(boxes: List[_Box], axis: int, tolerance: float) -> List[_Box]:
+    """
+    Merge along ``axis`` (0 = X, 1 = Y) boxes sharing the span of the other axis
+    """
+    other = 1 - axis
+
+    def key(box: _Box) -> Tuple:
+        return (
+            round(box[4] / tolerance),
+            round(box[other] / tolerance),
+            round(box[other + 2] / tolerance),
+            box[5],
+        )
+
+    groups: Dict[Tuple, List[_Box]] = {}
+    for box in boxes:
+        groups.setdefault(key(box), []).append(box)
+
+    merged: List[_Box] = []
+    for group in groups.values():
+        group.sort(key=lambda box: box[axis])
+        current = list(group[0])
+        for box in group[1:]:
+            if box[axis] <= current[axis + 2] + tolerance:
+                current[axis + 2] = max(current[axis + 2], box[axis + 2])
+                current[6] = min(current[6], box[6])
+            else:
+                merged.append(tuple(current))
+                current = list(box)
+        merged.append(tuple(current))
+    return merged
+
+
+def merge_rects(layer: HouLayer, tolerance: float = 1e-5) -> MergeReport:
+    """
+    Merge the rects of ``layer`` in place and report how many were removed
+    """
+    if not layer.rect:
+        return MergeReport()
+
+    boxes = _boxes(layer)
+    report = MergeReport(before=len(boxes))
+    axis = 0
+    unchanged_passes = 0
+    while unchanged_passes < 2:
+        count = len(boxes)
+        boxes = _merge_pass(boxes, axis, tolerance)
+        unchanged_passes = unchanged_passes + 1 if len(boxes) == count else 0
+        axis = 1 - axis
+
+    boxes.sort(key=lambda box: box[6])
+    size: List[float] = []
+    translation: List[float] = []
+    uv: List[float] = []
+    for min_x, min_y, max_x, max_y, z, box_uv, _ in boxes:
+        size += (max_x - min_x, max_y - min_y)
+        translation += ((min_x + max_x) * 0.5, (min_y + max_y) * 0.5, z)
+        uv += box_uv
+    rects = HouRectColumns()
+    rects.extend_flat(size, translation, uv)
+    layer.rect = rects if layer.columnar else list(rects)
+    layer.invalidate_spatial_index()
+
+    report.after = len(rects)
+    return report
+
+
+def merge_all_rects(
+    hou_data: HouData, tolerance: float = 1e-5
+) -> Dict[str, MergeReport]:
+    return {
+        name: merge_rects(layer, tolerance) for name, layer in hou_data.layer.items()
+    }
+
+
+@dataclass
+class MeshOptimizeReport:
+    vertices_before: int = 0
+    vertices_after: int = 0
+    acmr_before: float = 0.0
+    acmr_after: float = 0.0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    index_width: int = 4
+
+
+def mesh_size_bytes(
+    vertex_count: int, normal_count: int, index_count: int, width: int
+) -> int:
+    return vertex_count * 2 * 4 + normal_count * 3 * 4 + index_count * width
+
+
+def acmr(indices: Sequence[int], cache_size: int = 32) -> float:
+    """
+    Average cache miss ratio of a FIFO post-transform cache, misses per triangle
+    """
+    triangles = len(indices) // 3
+    if not triangles:
+        return 0.0
+    cache: deque = deque()
+    cached = set()
+    misses = 0
+    for index in indices:
+        if index in cached:
+            continue
+        misses += 1
+        cache.append(index)
+        cached.add(index)
+        if len(cache) > cache_size:
+            cached.discard(cache.popleft())
+    return misses / triangles
+
+
+def weld_vertices(
+    vertices: List[float],
+    normals: Optional[List[float]],
+    indices: Sequence[int],
+    tolerance: float,
+) -> Tuple[List[float], Optional[List[float]], List[int]]:
+    """
+    Merge vertices whose position (and normal) snap to the same ``tolerance``
+    grid cell. Unreferenced vertices are dropped.
+    """
+    lookup: Dict[Tuple, int] = {}
+    remap: Dict[int, int] = {}
+    new_vertices: List[float] = []
+    new_normals: Optional[List[float]] = [] if normals is not None else None
+    new_indices: List[int] = []
+    for index in indices:
+        target = remap.get(index)
+        if target is None:
+            position = vertices[index * 2 : index * 2 + 2]
+            key: Tuple = tuple(round(value / tolerance) for value in position)
+            if normals is not None:
+                normal = normals[index * 3 : index * 3 + 3]
+                key += tuple(round(value / tolerance) for value in normal)
+            target = lookup.get(key)
+            if target is None:
+                target = lookup[key] = len(new_vertices) // 2
+                new_vertices += position
+                if new_normals is not None:
+                    new_normals += normal
+            remap[index] = target
+        new_indices.append(target)
+    return new_vertices, new_normals, new_indices
+
+
+def tipsify(
+    indices: Sequence[int], vertex_count: int, cache_size: int = 16
+) -> List[int]:
+    """
+    Reorder triangles for post-transform vertex cache locality
+    (Sander, Nehab, Barczak: "Fast Triangle Reordering for Vertex Locality
+    and Reduced Overdraw", 2007). Runs in linear time.
+
+    Every index has to belong to a triangle, a leftover index is never
+    consumed and the reordering would not terminate:
+
+    >>> tipsify([0, 1, 2, 2], 3)
+    Traceback (most recent call last):
+    ...
+    ValueError: Index count 4 is not a multiple of 3
+    """
+    if len(indices) % 3:
+        raise ValueError(f"Index count {len(indices)} is not a multiple of 3")
+    triangle_count = len(indices) // 3
+    if triangle_count == 0:
+        return list(indices)
+
+    live = [0] * vertex_count
+    for index in indices:
+        live[index] += 1
+    offsets = [0] * (vertex_count + 1)
+    for v in range(vertex_count):
+        offsets[v + 1] = offsets[v] + live[v]
+    adjacency = [0] * offsets[-1]
+    fill = offsets[:-1]
+    for t in range(triangle_count):
+        for index in indices[t * 3 : t * 3 + 3]:
+            adjacency[fill[index]] = t
+            fill[index] += 1
+
+    cache_time = [0] * vertex_count
+    emitted = [False] * triangle_count
+    dead_end: List[int] = []
+    output: List[int] = []
+    timestamp = cache_size + 1
+    cursor = 1
+    fanning = 0
+
+    while fanning >= 0:
+        candidates = []
+        for t in adjacency[offsets[fanning] : offsets[fanning + 1]]:
+            if emitted[t]:
+                continue
+            for v in indices[t * 3 : t * 3 + 3]:
+                output.append(v)
+                dead_end.append(v)
+                candidates.append(v)
+                live[v] -= 1
+                if timestamp - cache_time[v] > cache_size:
+                    cache_time[v] = timestamp
+                    timestamp += 1
+            emitted[t] = True
+
+        # next fanning vertex: the candidate that stays in cache the longest
+        best = -1
+        best_priority = -1
+        for v in candidates:
+            if live[v] > 0:
+                priority = 0
+                if timestamp - cache_time[v] + 2 * live[v] <= cache_size:
+                    priority = timestamp - cache_time[v]
+                if priority > best_priority:
+                    best_priority = priority
+                    best = v
+        if best == -1:
+            while dead_end:
+                v = dead_end.pop()
+                if live[v] > 0:
+                    best = v
+                    break
+        if best == -1:
+            while cursor < vertex_count:
+                if live[cursor] > 0:
+                    best = cursor
+                    break
+                cursor += 1
+        fanning = best
+    return output
+
+
+def _flat(values: Any) -> List[float]:
+    if isinstance(values, (Vec2Array, Vec3Array)):
+        return values.data.tolist()
+    return [component for value in values for component in value.to_dict()]
+
+
+def optimize_mesh(
+    mesh: Hou2dMesh, tolerance: float = 1e-6, cache_size: int = 16
+) -> MeshOptimizeReport:
+    """
+    Weld vertices, reorder triangles for the vertex cache and pick the index
+    width, in place
+    """
+    vertices = _flat(mesh.vertices)
+    normals = _flat(mesh.normals)
+    indices = list(mesh.indices)
+    if len(indices) % 3:
+        raise ValueError(
+            f"Mesh {mesh.id}: index count {len(indices)} is not a multiple of 3"
+        )
+    vertex_count = len(vertices) // 2
+    per_vertex_normals = len(normals) == vertex_count * 3
+
+    report = MeshOptimizeReport(
+        vertices_before=vertex_count,
+        acmr_before=acmr(indices),
+        bytes_before=mesh_size_bytes(vertex_count, len(normals) // 3, len(indices), 4),
+    )
+
+    vertices, welded_normals, indices = weld_vertices(
+        vertices, normals if per_vertex_normals else None, indices, tolerance
+    )
+    if welded_normals is not None:
+        normals = welded_normals
+    vertex_count = len(vertices) // 2
+    indices = tipsify(indices, vertex_count, cache_size)
+
+    mesh.vertices = Vec2Array(vertices)
+    mesh.normals = Vec3Array(normals)
+    mesh.indices = array("I", indices)
+
+    report.vertices_after = vertex_count
+    report.acmr_after = acmr(indices)
+    report.index_width = index_width(vertex_count)
+    report.bytes_after = mesh_size_bytes(
+        vertex_count, len(normals) // 3, len(indices), report.index_width
+    )
+    return report
+
+
+def optimize_all_meshes(
+    hou_data: HouData, tolerance: float = 1e-6, cache_size: int = 16
+) -> Dict[str, List[MeshOptimizeReport]]:
+    return {
+        name: [optimize_mesh(mesh, tolerance, cache_size) for mesh in layer.mesh2d]
+        for name, layer in hou_data.layer.items()
+        if layer.mesh2d
+    }
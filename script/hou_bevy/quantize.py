@@ -0,0 +1,395 @@
+"""
+Opt-in 16-bit quantized encoding of layer geometry.
+
+Rect translation x/y, rect size and mesh vertices are stored as flat arrays
+of 16-bit fixed-point integers relative to the layer bounds, UVs relative to
+the UV bounds of the layer. A quantized layer starts with a ``quantization``
+entry, so streaming readers see it before any geometry::
+
+    "quantization": {
+      "bits": 16,
+      "min": [x, y],
+      "scale": [sx, sy],
+      "uv_min": [u, v],
+      "uv_scale": [su, sv],
+      "max_error": [ex, ey]
+    }
+
+    "rect": {"size": [qx, qy, ...], "translation": [qx, qy, ...], "z": z or [z, ...],
+             "uv": [qu, qv, ...]}
+    "mesh2d": [{"vertices": [qx, qy, ...], "indices": [...], "normals": [...], ...}]
+
+``z`` is a single number when every rect shares it. Layers that do not get
+smaller quantized, e.g. grid-snapped levels with short integral coordinates,
+are written unquantized, readers tell them apart by the ``quantization``
+entry.
+
+A position decodes as ``min + q * scale`` and a size as ``q * scale`` with
+``scale = extent / 65535``. Rounding to the nearest step bounds the error of
+every decoded value to half a step, ``max_error = scale / 2`` per axis (the
+same for UVs with ``uv_scale``), a 1000 unit wide level stays within 0.0077
+units. Rect and mesh z, normals and indices are written unchanged. Values
+outside of the bounds raise ``ValueError`` instead of being clamped.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from hou_bevy.component import (
+    Hou2dMesh,
+    Hou2dMeshBatch,
+    HouLayer,
+    HouRect,
+    HouRectColumns,
+    Vec2,
+    Vec2Array,
+    Vec3,
+    Vec3Array,
+    VecArray,
+    index_list,
+    vec_list_to_dict,
+)
+
+BITS = 16
+MAX_VALUE = (1 << BITS) - 1
+# values per column measured when estimating the quantized size
+SAMPLE_SIZE = 256
+# compact characters a rect object costs over its 12 flat values and commas,
+# {"size":[,],"translation":[,,],"uv":[[,],[,],[,],[,]]}, less 12 commas
+RECT_SYNTAX = 43
+
+
+def _flat(values: Any) -> Sequence[float]:
+    if isinstance(values, VecArray):
+        return values.data
+    return [component for value in values for component in value.to_dict()]
+
+
+def _columns(rects: Any) -> HouRectColumns:
+    if isinstance(rects, HouRectColumns):
+        return rects
+    return HouRectColumns.from_rects(rects)
+
+
+class _Bounds:
+    def __init__(self):
+        self.min_x = self.min_y = math.inf
+        self.max_x = self.max_y = -math.inf
+
+    def add(self, xs: Sequence[float], ys: Sequence[float]) -> None:
+        if not xs:
+            return
+        self.min_x = min(self.min_x, min(xs))
+        self.min_y = min(self.min_y, min(ys))
+        self.max_x = max(self.max_x, max(xs))
+        self.max_y = max(self.max_y, max(ys))
+
+    def origin_and_scale(self) -> Tuple[Vec2, Vec2]:
+        if self.min_x > self.max_x:
+            return Vec2.splat(0.0), Vec2.splat(1.0)
+        return (
+            Vec2.new(self.min_x, self.min_y),
+            Vec2.new(
+                (self.max_x - self.min_x) / MAX_VALUE or 1.0,
+                (self.max_y - self.min_y) / MAX_VALUE or 1.0,
+            ),
+        )
+
+
+@dataclass
+class Quantization:
+    min: Vec2 = field(default_factory=lambda: Vec2.splat(0.0))
+    scale: Vec2 = field(default_factory=lambda: Vec2.splat(1.0))
+    uv_min: Vec2 = field(default_factory=lambda: Vec2.splat(0.0))
+    uv_scale: Vec2 = field(default_factory=lambda: Vec2.splat(1.0))
+
+    @property
+    def max_error(self) -> Vec2:
+        return Vec2.new(self.scale.x * 0.5, self.scale.y * 0.5)
+
+    @classmethod
+    def from_layer(cls, layer: HouLayer) -> Quantization:
+        """
+        Bounds of every rect AABB and mesh vertex of ``layer``
+        """
+        positions = _Bounds()
+        uvs = _Bounds()
+        if layer.rect:
+            rects = _columns(layer.rect)
+            size = rects.size.data
+            translation = rects.translation.data
+            half_x = [value * 0.5 for value in size[0::2]]
+            half_y = [value * 0.5 for value in size[1::2]]
+            xs = translation[0::3]
+            ys = translation[1::3]
+            positions.add(
+                [x - h for x, h in zip(xs, half_x)], [y - h for y, h in zip(ys, half_y)]
+            )
+            positions.add(
+                [x + h for x, h in zip(xs, half_x)], [y + h for y, h in zip(ys, half_y)]
+            )
+            uv = rects.uv.data
+            uvs.add(uv[0::2], uv[1::2])
+        for mesh in layer.mesh2d or []:
+            vertices = _flat(mesh.vertices)
+            positions.add(vertices[0::2], vertices[1::2])
+        if layer.mesh2d_batch is not None:
+            vertices = layer.mesh2d_batch.vertices.data
+            positions.add(vertices[0::2], vertices[1::2])
+
+        origin, scale = positions.origin_and_scale()
+        uv_origin, uv_scale = uvs.origin_and_scale()
+        return cls(min=origin, scale=scale, uv_min=uv_origin, uv_scale=uv_scale)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "bits": BITS,
+            "min": self.min.to_dict(),
+            "scale": self.scale.to_dict(),
+            "uv_min": self.uv_min.to_dict(),
+            "uv_scale": self.uv_scale.to_dict(),
+            "max_error": self.max_error.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Quantization:
+        bits = data.get("bits", BITS)
+        if bits != BITS:
+            raise ValueError(f"Unsupported quantization bits {bits}, expected {BITS}")
+        return cls(
+            min=Vec2.from_dict(data["min"]),
+            scale=Vec2.from_dict(data["scale"]),
+            uv_min=Vec2.from_dict(data["uv_min"]),
+            uv_scale=Vec2.from_dict(data["uv_scale"]),
+        )
+
+
+def _encode(
+    xs: Sequence[float], ys: Sequence[float], origin: Vec2, scale: Vec2
+) -> List[int]:
+    """
+    Interleaved fixed-point x/y. Raises ``ValueError`` for values outside of
+    the 16-bit range, clamping would break the ``max_error`` guarantee.
+    """
+    result = [0] * (len(xs) * 2)
+    result[0::2] = [round((x - origin.x) / scale.x) for x in xs]
+    result[1::2] = [round((y - origin.y) / scale.y) for y in ys]
+    if result and (min(result) < 0 or max(result) > MAX_VALUE):
+        raise ValueError("Value outside of the quantization bounds")
+    return result
+
+
+def _decode(values: Sequence[int], origin: Vec2, scale: Vec2) -> List[float]:
+    result = [0.0] * len(values)
+    result[0::2] = [origin.x + q * scale.x for q in values[0::2]]
+    result[1::2] = [origin.y + q * scale.y for q in values[1::2]]
+    return result
+
+
+def quantize_rects(rects: Any, quantization: Quantization) -> Dict[str, Any]:
+    rects = _columns(rects)
+    size = rects.size.data
+    translation = rects.translation.data
+    uv = rects.uv.data
+    z = list(translation[2::3])
+    return {
+        "size": _encode(size[0::2], size[1::2], Vec2.splat(0.0), quantization.scale),
+        "translation": _encode(
+            translation[0::3], translation[1::3], quantization.min, quantization.scale
+        ),
+        "z": z[0] if z and z.count(z[0]) == len(z) else z,
+        "uv": _encode(uv[0::2], uv[1::2], quantization.uv_min, quantization.uv_scale),
+    }
+
+
+def quantize_mesh(mesh: Hou2dMesh, quantization: Quantization) -> Dict[str, Any]:
+    vertices = _flat(mesh.vertices)
+    return {
+        "vertices": _encode(
+            vertices[0::2], vertices[1::2], quantization.min, quantization.scale
+        ),
+        "indices": index_list(mesh.indices),
+        "normals": vec_list_to_dict(mesh.normals),
+        "z": mesh.z,
+        "id": mesh.id,
+    }
+
+
+def quantize_batch(batch: Hou2dMeshBatch, quantization: Quantization) -> Dict[str, Any]:
+    result = batch.to_dict()
+    vertices = batch.vertices.data
+    result["vertices"] = _encode(
+        vertices[0::2], vertices[1::2], quantization.min, quantization.scale
+    )
+    return result
+
+
+def _value_saving(
+    xs: Sequence[float], ys: Sequence[float], origin: Vec2, scale: Vec2
+) -> float:
+    """
+    Characters saved per value by quantizing the x/y columns, the mean
+    length of the plain and of the fixed-point values of an evenly strided
+    sample
+    """
+    step = max(1, len(xs) // SAMPLE_SIZE)
+    xs = xs[::step]
+    ys = ys[::step]
+    if not xs:
+        return 0.0
+    plain = sum(len(repr(value)) for column in (xs, ys) for value in column)
+    quantized = sum(len(str(value)) for value in _encode(xs, ys, origin, scale))
+    return (plain - quantized) / (len(xs) * 2)
+
+
+def _vertices_saving(vertices: Sequence[float], quantization: Quantization) -> float:
+    # the plain form wraps every vertex in [x,y], 2 characters more
+    count = len(vertices) // 2
+    saved = _value_saving(
+        vertices[0::2], vertices[1::2], quantization.min, quantization.scale
+    )
+    return count * (saved * 2 + 2)
+
+
+def quantization_saves(layer: HouLayer, quantization: Quantization) -> bool:
+    """
+    Whether the quantized form of ``layer`` is smaller than the plain one,
+    estimated from the lengths of the values quantizing replaces instead of
+    encoding the layer twice
+    """
+    # the quantization entry and the "z" key only the quantized form has
+    saved = -len(json.dumps(quantization.to_dict(), separators=(",", ":"))) - 22
+    if layer.rect:
+        rects = _columns(layer.rect)
+        size = rects.size.data
+        translation = rects.translation.data
+        uv = rects.uv.data
+        count = len(rects)
+        columns = (
+            (2, size[0::2], size[1::2], Vec2.splat(0.0), quantization.scale),
+            (
+                2,
+                translation[0::3],
+                translation[1::3],
+                quantization.min,
+                quantization.scale,
+            ),
+            (8, uv[0::2], uv[1::2], quantization.uv_min, quantization.uv_scale),
+        )
+        for per_rect, xs, ys, origin, scale in columns:
+            saved += count * per_rect * _value_saving(xs, ys, origin, scale)
+        saved += count * RECT_SYNTAX
+        z = translation[2::3]
+        if z.count(z[0]) == len(z):
+            # written once
+            saved += count * len(repr(z[0]))
+        else:
+            saved -= count
+    for mesh in layer.mesh2d or []:
+        saved += _vertices_saving(_flat(mesh.vertices), quantization)
+    if layer.mesh2d_batch is not None:
+        saved += _vertices_saving(layer.mesh2d_batch.vertices.data, quantization)
+    return saved > 0
+
+
+def quantize_layer(
+    layer: HouLayer, quantization: Optional[Quantization] = None
+) -> Dict[str, Any]:
+    """
+    Quantized dict form of ``layer``, bounds are measured when not given.
+    The plain form is returned when quantizing does not make it smaller.
+    """
+    if quantization is None:
+        quantization = Quantization.from_layer(layer)
+    if not quantization_saves(layer, quantization):
+        return layer.to_dict()
+    result: Dict[str, Any] = {"quantization": quantization.to_dict()}
+    if layer.rect is not None:
+        result["rect"] = quantize_rects(layer.rect, quantization)
+    if layer.mesh2d is not None:
+        result["mesh2d"] = [quantize_mesh(mesh, quantization) for mesh in layer.mesh2d]
+    if layer.mesh2d_batch is not None:
+        result["mesh2d_batch"] = quantize_batch(layer.mesh2d_batch, quantization)
+    return result
+
+
+def _dequantize_rects(
+    data: Dict[str, Any], quantization: Quantization
+) -> HouRectColumns:
+    q_size = data["size"]
+    q_translation = data["translation"]
+    q_uv = data["uv"]
+    z = data.get("z", 0.0)
+    if not isinstance(z, list):
+        # shared by every rect
+        z = [z] * (len(q_size) // 2)
+
+    translation_xy = _decode(q_translation, quantization.min, quantization.scale)
+    translation = [0.0] * (len(z) * 3)
+    translation[0::3] = translation_xy[0::2]
+    translation[1::3] = translation_xy[1::2]
+    translation[2::3] = z
+
+    rects = HouRectColumns()
+    rects.extend_flat(
+        _decode(q_size, Vec2.splat(0.0), quantization.scale),
+        translation,
+        _decode(q_uv, quantization.uv_min, quantization.uv_scale),
+    )
+    return rects
+
+
+def dequantize_rects(data: Any, quantization: Quantization) -> Iterator[HouRect]:
+    return iter(_dequantize_rects(data, quantization))
+
+
+def dequantize_mesh(
+    data: Dict[str, Any], quantization: Quantization, columnar: bool = False
+) -> Hou2dMesh:
+    vertices = _decode(data.get("vertices", []), quantization.min, quantization.scale)
+    mesh = Hou2dMesh(
+        vertices=Vec2Array(vertices),
+        normals=Vec3Array.from_list(
+            Vec3.from_dict(norm) for norm in data.get("normals", [])
+        ),
+        indices=list(data.get("indices", [])),
+        z=data.get("z", 0.0),
+        id=data.get("id", 0),
+    )
+    if columnar:
+        return mesh.to_columnar()
+    mesh.vertices = list(mesh.vertices)
+    mesh.normals = list(mesh.normals)
+    return mesh
+
+
+def dequantize_batch(
+    data: Dict[str, Any], quantization: Quantization
+) -> Hou2dMeshBatch:
+    vertices = _decode(data.get("vertices", []), quantization.min, quantization.scale)
+    batch = Hou2dMeshBatch.from_dict({**data, "vertices": []})
+    batch.vertices = Vec2Array(vertices)
+    return batch
+
+
+def dequantize_layer(data: Dict[str, Any], columnar: bool = False) -> HouLayer:
+    """
+    Decode the dict written by ``quantize_layer``
+    """
+    quantization = Quantization.from_dict(data["quantization"])
+    layer = HouLayer.new(columnar=columnar)
+    if data.get("rect") is not None:
+        rects = _dequantize_rects(data["rect"], quantization)
+        layer.rect = rects if columnar else list(rects)
+    if data.get("mesh2d") is not None:
+        layer.mesh2d = [
+            dequantize_mesh(mesh_data, quantization, columnar=columnar)
+            for mesh_data in data["mesh2d"]
+        ]
+    if data.get("mesh2d_batch") is not None:
+        layer.mesh2d_batch = dequantize_batch(data["mesh2d_batch"], quantization)
+    return layer
@@ -0,0 +1,553 @@
+"""
+Spatial queries over HouLayer rects.
+
+``RectGrid`` buckets rect AABBs into a uniform grid. A rect covers
+``translation.xy +- size / 2``. Queries return rect indices into
+``HouLayer.rect``.
+
+``SnapGrid`` hashes 2D points for constant-time snap lookups in the viewer
+state tools, ``RectBVH`` answers picks and box selections over a rect set
+that is edited in place.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+Cell = Tuple[int, int]
+
+
+def rect_bounds(rects: Any) -> array:
+    """
+    Flat ``[min_x, min_y, max_x, max_y] * n`` AABBs of ``rects``
+    """
+    bounds = array("d")
+    size = getattr(rects, "size", None)
+    translation = getattr(rects, "translation", None)
+    if size is not None and hasattr(size, "data"):
+        # HouRectColumns, read the flat columns directly
+        size = size.data
+        translation = translation.data
+        for i in range(len(size) // 2):
+            hw = size[i * 2] * 0.5
+            hh = size[i * 2 + 1] * 0.5
+            x = translation[i * 3]
+            y = translation[i * 3 + 1]
+            bounds.extend((x - hw, y - hh, x + hw, y + hh))
+        return bounds
+
+    for rect in rects:
+        hw = rect.size.x * 0.5
+        hh = rect.size.y * 0.5
+        x = rect.translation.x
+        y = rect.translation.y
+        bounds.extend((x - hw, y - hh, x + hw, y + hh))
+    return bounds
+
+
+def point_in_polygon(
+    x: float, y: float, polygon: Sequence[Tuple[float, float]]
+) -> bool:
+    """
+    Even-odd test of the point against the closed ``polygon``
+    """
+    inside = False
+    px, py = polygon[-1]
+    for qx, qy in polygon:
+        if (qy > y) != (py > y) and x < px + (y - py) * (qx - px) / (qy - py):
+            inside = not inside
+        px, py = qx, qy
+    return inside
+
+
+class RectGrid:
+    """
+    Uniform grid over rect AABBs.
+
+    The cell size defaults to the average rect extent, grown when needed so the
+    grid holds at most ``4 * n`` cells.
+    """
+
+    def __init__(self, bounds: Iterable[float], cell_size: Optional[float] = None):
+        self.bounds = array("d", bounds)
+        self.count = len(self.bounds) // 4
+        self.cells: Dict[Cell, List[int]] = {}
+
+        if self.count == 0:
+            self.cell_size = cell_size or 1.0
+            self.extent = (0.0, 0.0, 0.0, 0.0)
+            return
+
+        b = self.bounds
+        min_x = min(b[0::4])
+        min_y = min(b[1::4])
+        max_x = max(b[2::4])
+        max_y = max(b[3::4])
+        self.extent = (min_x, min_y, max_x, max_y)
+
+        if cell_size is None:
+            widths = sum(b[2::4]) - sum(b[0::4])
+            heights = sum(b[3::4]) - sum(b[1::4])
+            cell_size = (widths + heights) / (2 * self.count)
+            area = (max_x - min_x) * (max_y - min_y)
+            if cell_size > 0 and area / (cell_size * cell_size) > 4 * self.count:
+                cell_size = math.sqrt(area / (4 * self.count))
+        if not cell_size or cell_size <= 0:
+            cell_size = max(max_x - min_x, max_y - min_y, 1.0)
+        self.cell_size = cell_size
+
+        for i in range(self.count):
+            x0, y0, x1, y1 = self._cell_range(
+                b[i * 4], b[i * 4 + 1], b[i * 4 + 2], b[i * 4 + 3]
+            )
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    self.cells.setdefault((cx, cy), []).append(i)
+
+    @classmethod
+    def from_rects(cls, rects: Any, cell_size: Optional[float] = None) -> RectGrid:
+        return cls(rect_bounds(rects), cell_size)
+
+    def _cell(self, value: float) -> int:
+        return math.floor(value / self.cell_size)
+
+    def _cell_range(self, min_x, min_y, max_x, max_y) -> Tuple[int, int, int, int]:
+        return (
+            self._cell(min_x),
+            self._cell(min_y),
+            self._cell(max_x),
+            self._cell(max_y),
+        )
+
+    def _overlaps(self, i: int, min_x, min_y, max_x, max_y) -> bool:
+        b = self.bounds
+        j = i * 4
+        return (
+            b[j] <= max_x
+            and b[j + 2] >= min_x
+            and b[j + 1] <= max_y
+            and b[j + 3] >= min_y
+        )
+
+    def query_aabb(
+        self, min_x: float, min_y: float, max_x: float, max_y: float
+    ) -> List[int]:
+        """
+        Indices of rects overlapping the box, sorted
+        """
+        x0, y0, x1, y1 = self._cell_range(min_x, min_y, max_x, max_y)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self.cells):
+            # query larger than the grid, walk the occupied cells instead
+            candidates = {i for ids in self.cells.values() for i in ids}
+        else:
+            candidates = set()
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    ids = self.cells.get((cx, cy))
+                    if ids:
+                        candidates.update(ids)
+        return sorted(
+            i for i in candidates if self._overlaps(i, min_x, min_y, max_x, max_y)
+        )
+
+    def query_point(self, x: float, y: float) -> List[int]:
+        """
+        Indices of rects containing the point, sorted
+        """
+        ids = self.cells.get((self._cell(x), self._cell(y)), ())
+        return [i for i in ids if self._overlaps(i, x, y, x, y)]
+
+    def _ray_hit(self, i: int, ox, oy, inv_x, inv_y) -> Optional[float]:
+        """
+        Slab test, entry distance of the ray into rect ``i``
+        """
+        b = self.bounds
+        j = i * 4
+        t_min = 0.0
+        t_max = math.inf
+        for origin, inv, lo, hi in (
+            (ox, inv_x, b[j], b[j + 2]),
+            (oy, inv_y, b[j + 1], b[j + 3]),
+        ):
+            if inv is None:
+                if origin < lo or origin > hi:
+                    return None
+                continue
+            t0 = (lo - origin) * inv
+            t1 = (hi - origin) * inv
+            if t0 > t1:
+                t0, t1 = t1, t0
+            t_min = max(t_min, t0)
+            t_max = min(t_max, t1)
+            if t_min > t_max:
+                return None
+        return t_min
+
+    def raycast(
+        self,
+        ox: float,
+        oy: float,
+        dx: float,
+        dy: float,
+        max_distance: float = math.inf,
+    ) -> Optional[Tuple[int, float]]:
+        """
+        First rect hit by the ray, as ``(index, t)`` with the hit point at
+        ``origin + t * direction``
+        """
+        if self.count == 0 or (dx == 0 and dy == 0):
+            return None
+        inv_x = 1.0 / dx if dx != 0 else None
+        inv_y = 1.0 / dy if dy != 0 else None
+
+        # clip the ray to the grid extent
+        min_x, min_y, max_x, max_y = self.extent
+        t_enter, t_exit = 0.0, max_distance
+        for origin, inv, lo, hi in (
+            (ox, inv_x, min_x, max_x),
+            (oy, inv_y, min_y, max_y),
+        ):
+            if inv is None:
+                if origin < lo or origin > hi:
+                    return None
+                continue
+            t0 = (lo - origin) * inv
+            t1 = (hi - origin) * inv
+            if t0 > t1:
+                t0, t1 = t1, t0
+            t_enter = max(t_enter, t0)
+            t_exit = min(t_exit, t1)
+        if t_enter > t_exit:
+            return None
+
+        # walk the cells along the ray (Amanatides & Woo)
+        size = self.cell_size
+        cx = self._cell(ox + dx * t_enter)
+        cy = self._cell(oy + dy * t_enter)
+        step_x = 1 if dx > 0 else -1
+        step_y = 1 if dy > 0 else -1
+        if inv_x is None:
+            t_next_x = t_delta_x = math.inf
+        else:
+            boundary = (cx + (step_x > 0)) * size
+            t_next_x = (boundary - ox) * inv_x
+            t_delta_x = size * abs(inv_x)
+        if inv_y is None:
+            t_next_y = t_delta_y = math.inf
+        else:
+            boundary = (cy + (step_y > 0)) * size
+            t_next_y = (boundary - oy) * inv_y
+            t_delta_y = size * abs(inv_y)
+
+        best: Optional[Tuple[int, float]] = None
+        t_cell = t_enter
+        while t_cell <= t_exit:
+            for i in self.cells.get((cx, cy), ()):
+                t = self._ray_hit(i, ox, oy, inv_x, inv_y)
+                if (
+                    t is not None
+                    and t <= max_distance
+                    and (best is None or t < best[1])
+                ):
+                    best = (i, t)
+            t_cell = min(t_next_x, t_next_y)
+            if best is not None and best[1] <= t_cell:
+                break
+            if t_next_x < t_next_y:
+                cx += step_x
+                t_next_x += t_delta_x
+            else:
+                cy += step_y
+                t_next_y += t_delta_y
+        return best
+
+
+class SnapGrid:
+    """
+    Hash grid over 2D points for cursor snapping.
+
+    With ``cell_size`` at least the snap radius ``nearest`` only visits the
+    3x3 cells around the cursor, so a lookup costs the same however many
+    points the level holds.
+    """
+
+    def __init__(self, points: Iterable[float], cell_size: float):
+        if cell_size <= 0:
+            raise ValueError(f"cell_size must be positive, got {cell_size}")
+        self.points = array("d", points)
+        self.count = len(self.points) // 2
+        self.cell_size = cell_size
+        self.cells: Dict[Cell, List[int]] = {}
+        p = self.points
+        for i in range(self.count):
+            key = (self._cell(p[i * 2]), self._cell(p[i * 2 + 1]))
+            self.cells.setdefault(key, []).append(i)
+
+    def add(self, x: float, y: float) -> int:
+        """
+        Insert one point, returns its index
+        """
+        index = self.count
+        self.points.extend((x, y))
+        self.count += 1
+        self.cells.setdefault((self._cell(x), self._cell(y)), []).append(index)
+        return index
+
+    @classmethod
+    def from_positions(
+        cls, positions: Sequence[float], stride: int, cell_size: float
+    ) -> SnapGrid:
+        """
+        Build from flat positions with ``stride`` components per point, e.g.
+        the result of ``hou.Geometry.pointFloatAttribValues("P")``
+        """
+        count = len(positions) // stride
+        points = [0.0] * (count * 2)
+        points[0::2] = positions[0::stride]
+        points[1::2] = positions[1::stride]
+        return cls(points, cell_size)
+
+    def _cell(self, value: float) -> int:
+        return math.floor(value / self.cell_size)
+
+    def nearest(self, x: float, y: float, max_radius: float) -> Optional[int]:
+        """
+        Index of the closest point within ``max_radius``, the lowest index on
+        ties
+        """
+        reach = max(1, math.ceil(max_radius / self.cell_size))
+        cx = self._cell(x)
+        cy = self._cell(y)
+        p = self.points
+        best = None
+        best_distance = max_radius * max_radius
+        for gx in range(cx - reach, cx + reach + 1):
+            for gy in range(cy - reach, cy + reach + 1):
+                for i in self.cells.get((gx, gy), ()):
+                    dx = p[i * 2] - x
+                    dy = p[i * 2 + 1] - y
+                    distance = dx * dx + dy * dy
+                    if distance < best_distance or (
+                        distance == best_distance and (best is None or i < best)
+                    ):
+                        best = i
+                        best_distance = distance
+        return best
+
+
+class RectBVH:
+    """
+    Packed 2D bounding volume hierarchy over rect AABBs.
+
+    Nodes are stored depth first in flat arrays, the left child of an inner
+    node directly follows it and ``node_first`` holds the right child. Leaves
+    hold up to ``LEAF_SIZE`` ids of ``order``. Ids are stable: ``append``
+    keeps new rects in an unsorted tail of at most ``TAIL_SIZE`` rects,
+    ``remove`` only tombstones and ``move`` detaches a rect from the tree into
+    the tail. The tree is rebuilt once the tail is full or the tombstones
+    exceed ``rebuild_ratio`` of it.
+    """
+
+    LEAF_SIZE = 4
+    TAIL_SIZE = 64
+
+    # values of ``alive``
+    REMOVED = 0
+    LIVE = 1
+    DETACHED = 2
+
+    def __init__(self, bounds: Iterable[float] = (), rebuild_ratio: float = 0.25):
+        self.bounds = array("d", bounds)
+        self.alive = bytearray(b"\x01") * (len(self.bounds) // 4)
+        self.removed_ids: List[int] = []
+        self.rebuild_ratio = rebuild_ratio
+        self.build()
+
+    @classmethod
+    def from_rects(cls, rects: Any) -> RectBVH:
+        return cls(rect_bounds(rects))
+
+    def __len__(self) -> int:
+        return len(self.alive) - len(self.removed_ids)
+
+    def _limit(self) -> int:
+        return max(16, int(self.tree_size * self.rebuild_ratio))
+
+    def build(self) -> None:
+        self.order = array("i")
+        self.node_bounds = array("d")
+        self.node_first = array("i")
+        self.node_count = array("i")
+        self.tail: List[int] = []
+        ids = [i for i, alive in enumerate(self.alive) if alive]
+        for i in ids:
+            self.alive[i] = self.LIVE
+        self.tree_size = len(ids)
+        self.tombstones = 0
+        if ids:
+            self._build_node(ids)
+
+    def _build_node(self, ids: List[int]) -> int:
+        b = self.bounds
+        min_x = min(b[i * 4] for i in ids)
+        min_y = min(b[i * 4 + 1] for i in ids)
+        max_x = max(b[i * 4 + 2] for i in ids)
+        max_y = max(b[i * 4 + 3] for i in ids)
+
+        node = len(self.node_count)
+        self.node_bounds.extend((min_x, min_y, max_x, max_y))
+        self.node_first.append(0)
+        self.node_count.append(0)
+
+        if len(ids) <= self.LEAF_SIZE:
+            self.node_first[node] = len(self.order)
+            self.node_count[node] = len(ids)
+            self.order.extend(ids)
+            return node
+
+        # median split along the longer axis of the node
+        axis = 0 if max_x - min_x >= max_y - min_y else 1
+        ids.sort(key=lambda i: b[i * 4 + axis] + b[i * 4 + axis + 2])
+        middle = len(ids) // 2
+        self._build_node(ids[:middle])
+        self.node_first[node] = self._build_node(ids[middle:])
+        return node
+
+    def append(self, min_x: float, min_y: float, max_x: float, max_y: float) -> int:
+        """
+        Add a rect, returns its id
+        """
+        index = len(self.alive)
+        self.bounds.extend((min_x, min_y, max_x, max_y))
+        self.alive.append(1)
+        self.tail.append(index)
+        if len(self.tail) > self.TAIL_SIZE:
+            self.build()
+        return index
+
+    def extend(self, bounds: Sequence[float]) -> range:
+        """
+        Add many rects with at most one rebuild, returns their ids
+        """
+        first = len(self.alive)
+        count = len(bounds) // 4
+        self.bounds.extend(bounds[: count * 4])
+        self.alive.extend(b"\x01" * count)
+        self.tail.extend(range(first, first + count))
+        if len(self.tail) > self.TAIL_SIZE:
+            self.build()
+        return range(first, first + count)
+
+    def move(self, ids: Iterable[int], dx: float, dy: float) -> None:
+        """
+        Offset rects keeping their ids. Moved tree rects are detached to the
+        tail, a large move rebuilds the tree once.
+        """
+        b = self.bounds
+        detached = 0
+        for index in ids:
+            if not self.alive[index]:
+                continue
+            j = index * 4
+            b[j] += dx
+            b[j + 1] += dy
+            b[j + 2] += dx
+            b[j + 3] += dy
+            if self.alive[index] == self.LIVE and index not in self.tail:
+                self.alive[index] = self.DETACHED
+                self.tail.append(index)
+                detached += 1
+        self.tombstones += detached
+        if len(self.tail) > self.TAIL_SIZE or self.tombstones > self._limit():
+            self.build()
+
+    def remove(self, index: int) -> None:
+        """
+        Tombstone rect ``index``, its id is not reused
+        """
+        if not self.alive[index]:
+            return
+        self.alive[index] = self.REMOVED
+        bisect.insort(self.removed_ids, index)
+        if index in self.tail:
+            self.tail.remove(index)
+            return
+        self.tombstones += 1
+        if self.tombstones > self._limit():
+            self.build()
+
+    def rank(self, index: int) -> int:
+        """
+        Position of ``index`` among the live ids, e.g. the prim number of a
+        rect after the removed prims were deleted from the geometry
+        """
+        return index - bisect.bisect_left(self.removed_ids, index)
+
+    def rect(self, index: int) -> Tuple[float, float, float, float]:
+        return tuple(self.bounds[index * 4 : index * 4 + 4])
+
+    def query_aabb(
+        self, min_x: float, min_y: float, max_x: float, max_y: float
+    ) -> List[int]:
+        """
+        Ids of live rects overlapping the box, sorted
+        """
+        b = self.bounds
+        nb = self.node_bounds
+        result = [
+            i
+            for i in self.tail
+            if b[i * 4] <= max_x
+            and b[i * 4 + 2] >= min_x
+            and b[i * 4 + 1] <= max_y
+            and b[i * 4 + 3] >= min_y
+        ]
+        stack = [0] if self.node_count else []
+        while stack:
+            node = stack.pop()
+            j = node * 4
+            if (
+                nb[j] > max_x
+                or nb[j + 2] < min_x
+                or nb[j + 1] > max_y
+                or nb[j + 3] < min_y
+            ):
+                continue
+            count = self.node_count[node]
+            if count == 0:
+                stack.append(self.node_first[node])
+                stack.append(node + 1)
+                continue
+            first = self.node_first[node]
+            for i in self.order[first : first + count]:
+                if (
+                    self.alive[i] == self.LIVE
+                    and b[i * 4] <= max_x
+                    and b[i * 4 + 2] >= min_x
+                    and b[i * 4 + 1] <= max_y
+                    and b[i * 4 + 3] >= min_y
+                ):
+                    result.append(i)
+        result.sort()
+        return result
+
+    def query_point(self, x: float, y: float) -> List[int]:
+        return self.query_aabb(x, y, x, y)
+
+    def pick(self, x: float, y: float) -> Optional[int]:
+        """
+        Id of the smallest live rect containing the point, the most recently
+        added one on ties
+        """
+        b = self.bounds
+        best = None
+        best_area = math.inf
+        for i in self.query_point(x, y):
+            area = (b[i * 4 + 2] - b[i * 4]) * (b[i * 4 + 3] - b[i * 4 + 1])
+            if area <= best_area:
+                best = i
+                best_area = area
+        return best
@@ -0,0 +1,230 @@
+"""
+Opt-in export instrumentation.
+
+Inside ``collect`` the exporters time their stages and count what they
+produce, outside of it ``stage`` and ``count`` do nothing. Stages nest, a
+stage is reported under its path, e.g. ``build_hou_data/rects/hom_reads``,
+and summed over all paths under its own name. Collection is per thread, so
+usdrs jobs on the scheduler threads collect separately from the ROP.
+
+Set ``HOU_BEVY_STATS=1`` to collect for every export, or
+``HOU_BEVY_STATS=profile`` to also run cProfile. ROPs with a ``stats`` menu
+parameter (0 off, 1 on, 2 profile) can switch it per node. The stats are
+written next to the output file as ``<name>.stats.json``, a profile also as
+``<name>.prof`` for pstats or snakeviz.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+ENV_VAR = "HOU_BEVY_STATS"
+STATS_VERSION = 1
+# functions listed in the sidecar, the .prof file has all of them
+PROFILE_LIMIT = 30
+STATS_SUFFIX = ".stats.json"
+PROFILE_SUFFIX = ".prof"
+
+OFF = 0
+ON = 1
+PROFILE = 2
+
+_local = threading.local()
+_null_stage = nullcontext()
+
+
+def env_mode() -> int:
+    value = os.environ.get(ENV_VAR, "").strip().lower()
+    if value == "profile":
+        return PROFILE
+    if value in ("", "0", "off", "false", "no"):
+        return OFF
+    return ON
+
+
+def resolve_mode(mode: Optional[int] = None) -> int:
+    """
+    The higher of ``mode``, e.g. a ROP parameter, and the environment
+    """
+    return max(env_mode(), int(mode or OFF))
+
+
+def stats_path(output_file: str) -> str:
+    return str(Path(output_file).with_suffix(STATS_SUFFIX))
+
+
+@dataclass
+class StageStats:
+    seconds: float = 0.0
+    calls: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"seconds": self.seconds, "calls": self.calls}
+
+
+class ExportStats:
+    def __init__(self, label: str, output_file: Optional[str] = None):
+        self.label = label
+        self.output_file = output_file
+        self.stages: Dict[str, StageStats] = {}
+        self.counts: Dict[str, int] = {}
+        self.profile: Optional[cProfile.Profile] = None
+        self.seconds = 0.0
+        self._stack: List[str] = []
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        self._stack.append(name)
+        path = "/".join(self._stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            self.add_time(path, time.perf_counter() - start)
+
+    def add_time(self, path: str, seconds: float) -> None:
+        entry = self.stages.get(path)
+        if entry is None:
+            entry = self.stages[path] = StageStats()
+        entry.seconds += seconds
+        entry.calls += 1
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def by_name(self) -> Dict[str, StageStats]:
+        """
+        Stage totals by name over all paths, nested repeats counted once
+        """
+        totals: Dict[str, StageStats] = {}
+        for path, entry in self.stages.items():
+            names = path.split("/")
+            name = names[-1]
+            if name in names[:-1]:
+                continue
+            total = totals.setdefault(name, StageStats())
+            total.seconds += entry.seconds
+            total.calls += entry.calls
+        return totals
+
+    def profile_summary(self, limit: int = PROFILE_LIMIT) -> List[Dict[str, Any]]:
+        """
+        The ``limit`` functions with the highest cumulative time
+        """
+        if self.profile is None:
+            return []
+        entries = pstats.Stats(self.profile).stats
+        top = sorted(entries.items(), key=lambda item: item[1][3], reverse=True)
+        return [
+            {
+                "function": f"{file}:{line}({function})",
+                "calls": calls,
+                "seconds": own,
+                "cumulative_seconds": cumulative,
+            }
+            for (file, line, function), (_, calls, own, cumulative, _) in top[:limit]
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            "version": STATS_VERSION,
+            "label": self.label,
+            "output": self.output_file,
+            "seconds": self.seconds,
+            "stages": {path: entry.to_dict() for path, entry in self.stages.items()},
+            "by_name": {
+                name: entry.to_dict() for name, entry in self.by_name().items()
+            },
+            "counts": dict(self.counts),
+        }
+        if self.profile is not None:
+            result["profile"] = self.profile_summary()
+        return result
+
+    def write(self, path: Optional[str] = None) -> str:
+        """
+        Write the sidecar, by default next to the output file
+        """
+        path = path or stats_path(self.output_file)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        if self.profile is not None:
+            base = path[: -len(STATS_SUFFIX)] if path.endswith(STATS_SUFFIX) else path
+            self.profile.dump_stats(base + PROFILE_SUFFIX)
+        return path
+
+
+def current() -> Optional[ExportStats]:
+    return getattr(_local, "stats", None)
+
+
+def stage(name: str) -> ContextManager[None]:
+    stats = current()
+    if stats is None:
+        return _null_stage
+    return stats.stage(name)
+
+
+def count(name: str, value: int = 1) -> None:
+    stats = current()
+    if stats is not None:
+        stats.count(name, value)
+
+
+def count_file(name: str, path: str) -> None:
+    """
+    Count the size of ``path`` in bytes, the file is only stat'ed while
+    collecting
+    """
+    stats = current()
+    if stats is not None and os.path.exists(path):
+        stats.count(name, os.path.getsize(path))
+
+
+@contextmanager
+def collect(
+    label: str, output_file: Optional[str] = None, mode: Optional[int] = None
+) -> Iterator[Optional[ExportStats]]:
+    """
+    Collect the stats of one export on this thread and write them next to
+    ``output_file`` at the end, yields None when collection is off. ``mode``
+    None uses the environment.
+    """
+    mode = env_mode() if mode is None else mode
+    if mode == OFF:
+        yield None
+        return
+
+    previous = current()
+    stats = _local.stats = ExportStats(label, output_file)
+    if mode == PROFILE:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            stats.profile = profile
+        except ValueError as e:
+            # another profiler is active
+            print(f"{label}: profiling skipped, {e}")
+    try:
+        yield stats
+    finally:
+        if stats.profile is not None:
+            stats.profile.disable()
+        stats.seconds = time.perf_counter() - stats._start
+        _local.stats = previous
+        if output_file:
+            try:
+                print(f"{label} stats written to {stats.write()}")
+            except OSError as e:
+                print(f"{label}: failed to write stats, {e}")